@@ -190,4 +190,27 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Comentario sobre limpieza
-COMMENT ON FUNCTION cleanup_expired_reset_codes() IS 'Función para limpiar códigos de recuperación expirados (ejecutar periódicamente)';
\ No newline at end of file
+COMMENT ON FUNCTION cleanup_expired_reset_codes() IS 'Función para limpiar códigos de recuperación expirados (ejecutar periódicamente)';
+
+-- ============================================
+-- CACHÉ DE AUDIO FEATURES DE SPOTIFY
+-- ============================================
+
+-- Las audio features de un track no cambian: se guardan una sola vez
+CREATE TABLE IF NOT EXISTS track_audio_features (
+    track_id VARCHAR(64) PRIMARY KEY,
+    features JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE track_audio_features IS 'Audio features de Spotify por track, compartidas por filtrado y análisis';
+
+-- Índice nombre de artista -> ID de Spotify (los artistas semilla no cambian de ID)
+CREATE TABLE IF NOT EXISTS spotify_artists (
+    name_key VARCHAR(200) PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    artist_id VARCHAR(64) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE spotify_artists IS 'Resolución persistente de nombres de artista a IDs de Spotify';
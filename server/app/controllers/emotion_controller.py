@@ -1,15 +1,108 @@
-from fastapi import HTTPException, status, UploadFile
+from fastapi import HTTPException, status, UploadFile, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models.user import User
+from app.utils.security import decode_access_token
 from app.services.rekognition_service import rekognition_service
 from app.services.history_service import HistoryService
-from app.schemas.emotion_schemas import EmotionAnalysisResponse
+from app.services.recommendation_prefetch import recommendation_prefetcher
+from app.services.blocking_pool import PoolSaturatedError, db_pool, rekognition_pool
+from app.services.image_preprocessing import image_preprocessor
+from app.services.emotion_result_cache import emotion_result_cache
+from app.services.emotion_backends import EmotionBackendUnavailableError, emotion_router
+from app.services.emotion_stream import EmotionSmoother, EmotionStreamSession, FrameGate
+from app.services.upload_reader import UploadRejectedError, UploadTooLargeError, read_upload
+from app.schemas.emotion_schemas import (
+    EmotionAnalysisResponse,
+    BatchEmotionAnalysisItem,
+    BatchEmotionAnalysisResponse
+)
 from app.schemas.history_schemas import EmotionAnalysisCreate
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Tamaño máximo de cada imagen subida, el mismo que exige validate_image (se deja de leer al superarlo)
+UPLOAD_MAX_MB = 5
+
+# Lote: máximo de imágenes por petición y llamadas a Rekognition en vuelo a la vez
+BATCH_MAX_IMAGES = int(os.getenv('EMOTION_BATCH_MAX_IMAGES', 50))
+BATCH_CONCURRENCY = int(os.getenv('EMOTION_BATCH_CONCURRENCY', 4))
+
+# Cámara en tiempo real: suavizado, tamaño máximo de fotograma y duración máxima de la sesión
+STREAM_SMOOTHING = float(os.getenv('EMOTION_STREAM_SMOOTHING', 0.4))
+STREAM_MAX_FRAME_BYTES = int(os.getenv('EMOTION_STREAM_MAX_FRAME_BYTES', 1024 * 1024))
+STREAM_MAX_SECONDS = float(os.getenv('EMOTION_STREAM_MAX_SECONDS', 600))
+
+# Autenticación del stream: subprotocolo `bearer, <JWT>` o primer mensaje `{"type": "auth", "token": ...}`
+STREAM_AUTH_SUBPROTOCOL = 'bearer'
+STREAM_AUTH_TIMEOUT = float(os.getenv('EMOTION_STREAM_AUTH_TIMEOUT', 10))
+
 class EmotionController:
     
+    @staticmethod
+    def _check_head(head: bytes):
+        """Comprueba los magic bytes con el primer bloque de la subida."""
+        validation = rekognition_service.validate_image(head)
+        return None if validation['valid'] else validation['error']
+    
+    @staticmethod
+    async def _read_image(file: UploadFile) -> bytearray:
+        """
+        Lee la imagen por bloques: un formato no válido se rechaza tras el primer
+        bloque (400) y una imagen demasiado grande al pasar del tope (413).
+        """
+        try:
+            return await read_upload(file, UPLOAD_MAX_MB * 1024 * 1024, check_head=EmotionController._check_head)
+        except UploadTooLargeError:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f'La imagen excede el tamaño máximo de {UPLOAD_MAX_MB}MB'
+            )
+        except UploadRejectedError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    @staticmethod
+    async def _detect(file: UploadFile, image_bytes: bytes, user_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Analiza una imagen ya validada: caché de resultados, preprocesado y
+        Rekognition. Devuelve (resultado, metadata de la foto).
+        
+        La caché y el preprocesado son CPU y van en hilos aparte: `rekognition_pool`
+        queda solo para el detector, así que un acierto de caché nunca recibe 503.
+        """
+        # Misma foto (o casi) ya analizada: se reutiliza el resultado sin llamar a AWS
+        result, fingerprint = await asyncio.to_thread(emotion_result_cache.lookup, image_bytes, str(user_id))
+        cached = result is not None
+        preprocessing = {'bytes': 0}
+        
+        if not cached:
+            # Reducir la imagen antes de subirla a AWS (decodificar es CPU: también fuera del loop)
+            upload_bytes, preprocessing = await asyncio.to_thread(image_preprocessor.process, image_bytes)
+            
+            # Analizar emociones con el backend configurado (Rekognition o local; bloqueante: fuera del event loop)
+            result = await rekognition_pool.run(emotion_router.detect_faces_and_emotions, upload_bytes)
+            emotion_result_cache.store(fingerprint, result)
+        
+        # Metadata de la foto (NO guardamos la foto, solo info)
+        photo_metadata = {
+            'filename': file.filename,
+            'content_type': file.content_type,
+            'size': len(image_bytes),
+            'sent_size': preprocessing['bytes'],
+            'cached': cached,
+            'backend': (result or {}).get('backend'),
+            'faces_detected': (result or {}).get('faces_detected', 0)
+        }
+        return result, photo_metadata
+    
     @staticmethod
     async def analyze_emotion(file: UploadFile, user_id: str, db: Session) -> EmotionAnalysisResponse:
         """
@@ -24,8 +117,8 @@ class EmotionController:
             EmotionAnalysisResponse con los resultados del análisis
         """
         try:
-            # Leer el archivo
-            image_bytes = await file.read()
+            # Leer el archivo por bloques (tope de tamaño y magic bytes al primer bloque)
+            image_bytes = await EmotionController._read_image(file)
             
             # Validar la imagen
             validation = rekognition_service.validate_image(image_bytes)
@@ -35,8 +128,7 @@ class EmotionController:
                     detail=validation['error']
                 )
             
-            # Analizar emociones
-            result = rekognition_service.detect_faces_and_emotions(image_bytes)
+            result, photo_metadata = await EmotionController._detect(file, image_bytes, user_id)
             
             if not result['success']:
                 raise HTTPException(
@@ -44,14 +136,6 @@ class EmotionController:
                     detail=result.get('error', 'Error al procesar la imagen')
                 )
             
-            # Preparar metadata de la foto (NO guardamos la foto, solo info)
-            photo_metadata = {
-                'filename': file.filename,
-                'content_type': file.content_type,
-                'size': len(image_bytes),
-                'faces_detected': result['faces_detected']
-            }
-            
             # Guardar el análisis en la base de datos
             try:
                 analysis_data = EmotionAnalysisCreate(
@@ -61,7 +145,8 @@ class EmotionController:
                     photo_metadata=photo_metadata
                 )
                 
-                saved_analysis = HistoryService.create_emotion_analysis(
+                saved_analysis = await db_pool.run(
+                    HistoryService.create_emotion_analysis,
                     user_id=user_id,
                     analysis_data=analysis_data,
                     db=db
@@ -78,13 +163,329 @@ class EmotionController:
                 result['analysis_id'] = None
                 result['warning'] = 'Análisis completado pero no se pudo guardar en el historial'
             
+            # Prefetch especulativo: el cliente pedirá a continuación la música de la emoción dominante
+            try:
+                recommendation_prefetcher.schedule(user_id, result['dominant_emotion']['type'])
+            except Exception as prefetch_error:
+                logger.warning(f"No se pudo lanzar el prefetch de recomendaciones: {prefetch_error}")
+            
             return EmotionAnalysisResponse(**result)
             
         except HTTPException:
             raise
+        except PoolSaturatedError as e:
+            logger.warning(f"Análisis rechazado: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="El servicio de análisis está saturado, inténtalo de nuevo en unos segundos"
+            )
+        except EmotionBackendUnavailableError as e:
+            logger.error(f"Análisis rechazado: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e)
+            )
         except Exception as e:
             logger.error(f"Error en analyze_emotion: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error al procesar la imagen: {str(e)}"
-            )
\ No newline at end of file
+            )
+    
+    @staticmethod
+    async def analyze_emotions_batch(files: List[UploadFile], user_id: str, db: Session) -> BatchEmotionAnalysisResponse:
+        """
+        Analiza varias imágenes de una sola petición (importación de galería)
+        
+        Cada imagen se valida y se analiza por separado: una foto sin rostro no
+        hace fallar el lote. Como mucho `BATCH_CONCURRENCY` llamadas a
+        Rekognition en vuelo a la vez, y todos los análisis correctos se guardan
+        en una sola transacción.
+        
+        Args:
+            files: Archivos de imagen cargados
+            user_id: ID del usuario que realiza el análisis
+            db: Sesión de base de datos
+            
+        Returns:
+            BatchEmotionAnalysisResponse con un resultado por imagen, en el orden recibido
+        """
+        if not files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No se recibió ninguna imagen"
+            )
+        if len(files) > BATCH_MAX_IMAGES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Máximo {BATCH_MAX_IMAGES} imágenes por lote"
+            )
+        
+        semaphore = asyncio.Semaphore(max(1, BATCH_CONCURRENCY))
+        
+        async def analyze_one(index: int, file: UploadFile) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    image_bytes = await EmotionController._read_image(file)
+                    validation = rekognition_service.validate_image(image_bytes)
+                    if not validation['valid']:
+                        return {'success': False, 'faces_detected': 0, 'all_emotions': {}, 'error': validation['error']}, {}
+                    return await EmotionController._detect(file, image_bytes, user_id)
+                except HTTPException as e:
+                    error = e.detail
+                except PoolSaturatedError:
+                    error = 'El servicio de análisis está saturado, inténtalo de nuevo en unos segundos'
+                except EmotionBackendUnavailableError as e:
+                    error = str(e)
+                except Exception as e:
+                    logger.error(f"Error analizando la imagen {index} del lote: {str(e)}")
+                    error = f'Error al procesar la imagen: {str(e)}'
+                return {'success': False, 'faces_detected': 0, 'all_emotions': {}, 'error': error}, {}
+        
+        outcomes = await asyncio.gather(*(analyze_one(i, f) for i, f in enumerate(files)))
+        
+        items = []
+        to_save = []
+        for index, (file, (result, photo_metadata)) in enumerate(zip(files, outcomes)):
+            result = dict(result or {'success': False, 'faces_detected': 0, 'all_emotions': {}})
+            result.setdefault('all_emotions', {})
+            result.setdefault('faces_detected', 0)
+            if not result['success']:
+                result.setdefault('error', 'Error al procesar la imagen')
+            items.append(BatchEmotionAnalysisItem(index=index, filename=file.filename, **result))
+            if result['success']:
+                to_save.append((len(items) - 1, EmotionAnalysisCreate(
+                    dominant_emotion=result['dominant_emotion']['type'],
+                    confidence=result['dominant_emotion']['confidence'],
+                    emotion_details=result['all_emotions'],
+                    photo_metadata=photo_metadata
+                )))
+        
+        # Guardar todos los análisis correctos en una sola transacción
+        warning = None
+        if to_save:
+            try:
+                ids = await db_pool.run(
+                    HistoryService.create_emotion_analyses,
+                    user_id=user_id,
+                    analyses=[data for _, data in to_save],
+                    db=db
+                )
+                for (position, _), analysis_id in zip(to_save, ids):
+                    items[position].analysis_id = str(analysis_id)
+                logger.info(f"Lote de {len(files)} imágenes: {len(ids)} análisis guardados")
+            except Exception as db_error:
+                logger.error(f"Error al guardar el lote en BD: {str(db_error)}")
+                warning = 'Análisis completados pero no se pudieron guardar en el historial'
+        
+        succeeded = len(to_save)
+        return BatchEmotionAnalysisResponse(
+            total=len(files),
+            succeeded=succeeded,
+            failed=len(files) - succeeded,
+            results=items,
+            warning=warning
+        )
+    
+    # ============ CÁMARA EN TIEMPO REAL ============
+    
+    @staticmethod
+    def _authenticate_token(token: str) -> Optional[str]:
+        """ID del usuario activo del token JWT, o None (sesión corta: no se retiene durante el stream)"""
+        payload = decode_access_token(token) if token else None
+        if not payload or not payload.get("sub"):
+            return None
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.id == payload["sub"]).first()
+            return str(user.id) if user is not None and user.is_active else None
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _save_stream_summary(user_id: str, summary: Dict[str, Any]) -> Any:
+        """Guarda el resumen de la sesión como un único análisis del historial"""
+        db = SessionLocal()
+        try:
+            analysis_data = EmotionAnalysisCreate(
+                dominant_emotion=summary['dominant_emotion'],
+                confidence=summary['confidence'],
+                emotion_details=summary['all_emotions'],
+                photo_metadata={
+                    'source': 'stream',
+                    'duration_s': summary['duration_s'],
+                    'frames': summary['frames'],
+                    'timeline': summary['timeline']
+                }
+            )
+            return HistoryService.create_emotion_analysis(user_id=user_id, analysis_data=analysis_data, db=db)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _subprotocol_token(websocket: WebSocket) -> Optional[str]:
+        """Token ofrecido como subprotocolo (`Sec-WebSocket-Protocol: bearer, <JWT>`), o None"""
+        offered = [p.strip() for p in (websocket.headers.get('sec-websocket-protocol') or '').split(',')]
+        if len(offered) >= 2 and offered[0] == STREAM_AUTH_SUBPROTOCOL and offered[1]:
+            return offered[1]
+        return None
+    
+    @staticmethod
+    async def _receive_auth_token(websocket: WebSocket) -> Optional[str]:
+        """Token del primer mensaje (`{"type": "auth", "token": ...}`), o None si no llega a tiempo"""
+        try:
+            message = await asyncio.wait_for(websocket.receive(), timeout=STREAM_AUTH_TIMEOUT)
+        except (asyncio.TimeoutError, WebSocketDisconnect):
+            return None
+        if message.get('type') != 'websocket.receive' or message.get('text') is None:
+            return None
+        try:
+            command = json.loads(message['text'])
+        except ValueError:
+            return None
+        if isinstance(command, dict) and command.get('type') == 'auth' and isinstance(command.get('token'), str):
+            return command['token']
+        return None
+    
+    @staticmethod
+    def _check_frame(frame: bytes) -> Optional[Tuple[int, str]]:
+        """(código de cierre, motivo) si el fotograma no es aceptable, o None"""
+        if len(frame) > STREAM_MAX_FRAME_BYTES:
+            return status.WS_1009_MESSAGE_TOO_BIG, f'El fotograma excede el tamaño máximo de {STREAM_MAX_FRAME_BYTES} bytes'
+        validation = rekognition_service.validate_image(frame)
+        if not validation['valid']:
+            return status.WS_1003_UNSUPPORTED_DATA, validation['error']
+        return None
+    
+    @staticmethod
+    async def stream_emotions(websocket: WebSocket):
+        """
+        Seguimiento continuo de emociones desde la cámara
+        
+        El token JWT no viaja en la URL (quedaría en logs y en el historial): el
+        cliente lo ofrece como subprotocolo (`new WebSocket(url, ['bearer', token])`)
+        o lo envía en el primer mensaje, `{"type": "auth", "token": ...}`.
+        
+        Después envía fotogramas (JPEG/PNG/WEBP) como mensajes binarios y
+        `{"type": "stop"}` para terminar. Un fotograma demasiado grande cierra
+        la conexión con 1009 y uno que no es una imagen, con 1003. Solo se
+        analizan los fotogramas que pasan `FrameGate` y, mientras hay un
+        análisis en curso, los fotogramas nuevos se descartan (siempre se
+        analiza el más reciente). El servidor envía `{"type": "emotion", ...}`
+        solo cuando cambia la emoción dominante suavizada y, al terminar,
+        `{"type": "summary", ...}`. En el historial se guarda únicamente el
+        resumen de la sesión.
+        
+        Args:
+            websocket: Conexión WebSocket
+        """
+        token = EmotionController._subprotocol_token(websocket)
+        if token is not None:
+            user_id = await db_pool.run(EmotionController._authenticate_token, token)
+            if user_id is None:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token inválido o expirado")
+                return
+            await websocket.accept(subprotocol=STREAM_AUTH_SUBPROTOCOL)
+        else:
+            await websocket.accept()
+            token = await EmotionController._receive_auth_token(websocket)
+            user_id = await db_pool.run(EmotionController._authenticate_token, token) if token else None
+            if user_id is None:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token inválido o expirado")
+                return
+        
+        session = EmotionStreamSession(
+            detect=emotion_router.detect_faces_and_emotions,
+            gate=FrameGate.from_env(),
+            smoother=EmotionSmoother(STREAM_SMOOTHING),
+            max_frame_bytes=STREAM_MAX_FRAME_BYTES
+        )
+        await websocket.send_json({
+            'type': 'ready',
+            'min_interval_ms': int(session.gate.min_interval * 1000),
+            'max_frame_bytes': STREAM_MAX_FRAME_BYTES
+        })
+        logger.info(f"🎥 Sesión de cámara iniciada para usuario {user_id}")
+        
+        connected = True
+        rejected: Optional[Tuple[int, str]] = None
+        pending: Optional[asyncio.Task] = None
+        
+        async def analyze(frame: bytes):
+            # El filtro de fotogramas es CPU: fuera de rekognition_pool, que queda para el detector
+            if not await asyncio.to_thread(session.admit, frame):
+                return
+            try:
+                update = await rekognition_pool.run(session.analyze, frame)
+            except PoolSaturatedError:
+                session.drop(admitted=True)
+                return
+            if update is not None and connected:
+                await websocket.send_json(update)
+        
+        def report(task: Optional[asyncio.Task]):
+            # Recoge el error de un análisis ya terminado (p. ej. el cliente se fue durante el envío)
+            if task is not None and task.done() and not task.cancelled() and task.exception() is not None:
+                logger.warning(f"⚠ Error en el análisis de un fotograma: {task.exception()}")
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + STREAM_MAX_SECONDS
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(websocket.receive(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if message['type'] == 'websocket.disconnect':
+                    connected = False
+                    break
+                if message.get('text') is not None:
+                    try:
+                        command = json.loads(message['text'])
+                    except ValueError:
+                        command = None
+                    if isinstance(command, dict) and command.get('type') == 'stop':
+                        break
+                    continue
+                frame = message.get('bytes')
+                if not frame:
+                    continue
+                rejected = EmotionController._check_frame(frame)
+                if rejected is not None:
+                    break
+                if pending is not None and not pending.done():
+                    session.drop()
+                    continue
+                report(pending)
+                pending = asyncio.create_task(analyze(frame))
+        except WebSocketDisconnect:
+            connected = False
+        
+        if pending is not None:
+            try:
+                await pending
+            except Exception as e:
+                logger.warning(f"⚠ Último fotograma no analizado: {e}")
+        
+        summary = session.summary()
+        if summary is not None:
+            try:
+                saved = await db_pool.run(EmotionController._save_stream_summary, user_id, summary)
+                summary['analysis_id'] = str(saved.id)
+            except Exception as db_error:
+                logger.error(f"Error al guardar la sesión de cámara en BD: {str(db_error)}")
+                summary['analysis_id'] = None
+        logger.info(f"🎥 Sesión de cámara terminada para usuario {user_id}: {session.stats()}")
+        
+        if connected:
+            try:
+                if rejected is not None:
+                    await websocket.close(code=rejected[0], reason=rejected[1])
+                else:
+                    await websocket.send_json({'type': 'summary', 'summary': summary, 'frames': session.stats()})
+                    await websocket.close()
+            except Exception:
+                pass
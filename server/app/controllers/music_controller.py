@@ -1,45 +1,85 @@
 from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.services.spotify_service import spotify_service
 from app.services.spotify_user_service import spotify_user_service
-from app.schemas.music_schemas import MusicRecommendationsResponse
+from app.services.recommendation_prefetch import recommendation_prefetcher
+from app.schemas.music_schemas import (
+    BatchRecommendationsRequest,
+    BatchRecommendationsResponse,
+    MusicRecommendationsResponse,
+)
 from app.models.user import User
+import json
+import time
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 class MusicController:
     
+    VALID_EMOTIONS = ['HAPPY', 'SAD', 'ANGRY', 'CALM', 'SURPRISED', 'FEAR', 'DISGUSTED', 'CONFUSED']
+
     @staticmethod
-    def get_recommendations(emotion: str, limit: int = 20) -> MusicRecommendationsResponse:
+    def _validate_recommendation_request(emotion: str, limit: int):
+        """Valida la emoción y el límite de una petición de recomendaciones."""
+        # Validar emoción
+        valid_emotions = MusicController.VALID_EMOTIONS
+        if emotion.upper() not in valid_emotions:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Emoción inválida. Debe ser una de: {', '.join(valid_emotions)}"
+            )
+        
+        # Validar límite
+        if limit < 1 or limit > 100:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El límite debe estar entre 1 y 100"
+            )
+
+    @staticmethod
+    def get_recommendations(
+        emotion: str,
+        limit: int = 20,
+        deadline_ms: Optional[int] = None,
+        user_id: Optional[str] = None
+    ) -> MusicRecommendationsResponse:
         """
         Obtiene recomendaciones musicales basadas en la emoción
         
         Args:
             emotion: Emoción detectada
             limit: Número de canciones a recomendar
+            deadline_ms: Presupuesto de latencia; al vencer se responde con los
+                candidatos recibidos hasta entonces (`partial: true`)
+            user_id: Usuario que pide; si su último análisis dejó un prefetch
+                de esta emoción, se sirve desde ahí
             
         Returns:
             MusicRecommendationsResponse con las recomendaciones
         """
         try:
-            # Validar emoción
-            valid_emotions = ['HAPPY', 'SAD', 'ANGRY', 'CALM', 'SURPRISED', 'FEAR', 'DISGUSTED', 'CONFUSED']
-            if emotion.upper() not in valid_emotions:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Emoción inválida. Debe ser una de: {', '.join(valid_emotions)}"
-                )
-            
-            # Validar límite
-            if limit < 1 or limit > 100:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="El límite debe estar entre 1 y 100"
-                )
+            MusicController._validate_recommendation_request(emotion, limit)
             
+            # Recomendaciones precalculadas tras el análisis del usuario
+            result = None
+            if user_id:
+                started = time.monotonic()
+                deadline = deadline_ms / 1000 if deadline_ms else None
+                result = recommendation_prefetcher.take(user_id, emotion, limit, deadline=deadline)
+                if result is None and deadline_ms:
+                    # Lo que quede del presupuesto para el camino normal
+                    deadline_ms = max(1, deadline_ms - int((time.monotonic() - started) * 1000))
+
             # Obtener recomendaciones
-            result = spotify_service.get_recommendations(emotion.upper(), limit)
+            if result is not None:
+                logger.info(f"⚡ Recomendaciones de '{emotion.upper()}' servidas desde el prefetch")
+            elif deadline_ms:
+                result = spotify_service.get_recommendations(emotion.upper(), limit, deadline_ms=deadline_ms)
+            else:
+                result = spotify_service.get_recommendations(emotion.upper(), limit)
             
             if not result['success']:
                 raise HTTPException(
@@ -61,6 +101,90 @@ class MusicController:
                 detail=f"Error al obtener recomendaciones: {str(e)}"
             )
 
+    @staticmethod
+    def get_batch_recommendations(request: BatchRecommendationsRequest) -> BatchRecommendationsResponse:
+        """
+        Obtiene recomendaciones para varias emociones ponderadas en una llamada.
+
+        Args:
+            request: Emociones con sus pesos, límite por emoción (o total si
+                `blend`), si se mezclan en una sola lista y el presupuesto de
+                latencia opcional (`deadline_ms`)
+
+        Returns:
+            BatchRecommendationsResponse con los resultados por emoción
+        """
+        try:
+            for item in request.emotions:
+                MusicController._validate_recommendation_request(item.emotion, request.limit)
+
+            options = {'deadline_ms': request.deadline_ms} if request.deadline_ms else {}
+            result = spotify_service.get_batch_recommendations(
+                [(item.emotion.upper(), item.weight) for item in request.emotions],
+                limit=request.limit,
+                blend=request.blend,
+                **options
+            )
+            return BatchRecommendationsResponse(**result)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error en get_batch_recommendations: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al obtener recomendaciones: {str(e)}"
+            )
+
+    @staticmethod
+    def stream_recommendations(
+        emotion: str,
+        limit: int = 20,
+        fmt: str = "ndjson",
+        deadline_ms: Optional[int] = None
+    ) -> StreamingResponse:
+        """
+        Recomendaciones en streaming (NDJSON o Server-Sent Events).
+
+        Envía frames `tracks` en cuanto hay una primera selección diversificada,
+        los refina a medida que llegan más candidatos y termina con un frame
+        `summary` con los `music_params`.
+
+        Args:
+            emotion: Emoción detectada
+            limit: Número de canciones a recomendar
+            fmt: "ndjson" o "sse"
+            deadline_ms: Presupuesto de latencia; al vencer el stream se cierra
+                con los candidatos recibidos (`partial: true` en el `summary`)
+        """
+        MusicController._validate_recommendation_request(emotion, limit)
+        options = {'deadline_ms': deadline_ms} if deadline_ms else {}
+
+        def frames():
+            try:
+                for frame in spotify_service.stream_recommendations(emotion.upper(), limit, **options):
+                    yield MusicController._encode_frame(frame, fmt)
+            except Exception as e:
+                logger.error(f"Error en stream_recommendations: {str(e)}")
+                yield MusicController._encode_frame(
+                    {'event': 'error', 'success': False, 'error': f"Error al obtener recomendaciones: {str(e)}"},
+                    fmt
+                )
+
+        media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+        return StreamingResponse(
+            frames(),
+            media_type=media_type,
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @staticmethod
+    def _encode_frame(frame: dict, fmt: str) -> str:
+        payload = json.dumps(frame, ensure_ascii=False)
+        if fmt == "sse":
+            return f"event: {frame.get('event', 'message')}\ndata: {payload}\n\n"
+        return payload + "\n"
+
     @staticmethod
     def create_spotify_playlist(
         user: User,
@@ -4,6 +4,8 @@
 from . import password_reset_code  # noqa: F401
 from . import emotion_analysis  # noqa: F401
 from . import user  # noqa: F401
+from . import track_audio_features  # noqa: F401
+from . import spotify_artist  # noqa: F401
 
 # Expose User at package level for convenience
 from .user import User  # noqa: F401
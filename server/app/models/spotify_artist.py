@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from app.config.database import Base
+
+class SpotifyArtist(Base):
+    """Resolución de nombre de artista a ID de Spotify (se cachea indefinidamente)"""
+    __tablename__ = "spotify_artists"
+    
+    name_key = Column(String(200), primary_key=True)
+    name = Column(String(200), nullable=False)
+    artist_id = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<SpotifyArtist(name='{self.name}', artist_id='{self.artist_id}')>"
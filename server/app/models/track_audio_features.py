@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.config.database import Base
+
+class TrackAudioFeatures(Base):
+    """Audio features de Spotify por track (inmutables, se cachean indefinidamente)"""
+    __tablename__ = "track_audio_features"
+    
+    track_id = Column(String(64), primary_key=True)
+    features = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<TrackAudioFeatures(track_id='{self.track_id}')>"
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, UploadFile, File, status
+from fastapi import APIRouter, Depends, UploadFile, File, WebSocket, status
+from typing import List
 from sqlalchemy.orm import Session
 from app.config.database import get_db
 from app.controllers.emotion_controller import EmotionController
-from app.schemas.emotion_schemas import EmotionAnalysisResponse
+from app.schemas.emotion_schemas import EmotionAnalysisResponse, BatchEmotionAnalysisResponse
 from app.middlewares.auth_middleware import get_current_active_user
 from app.models.user import User
 
@@ -42,4 +43,52 @@ async def analyze_emotion(
         file=file,
         user_id=str(current_user.id),
         db=db
-    )
\ No newline at end of file
+    )
+
+
+@router.post(
+    "/analyze/batch",
+    response_model=BatchEmotionAnalysisResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Analizar emociones en varias imágenes",
+    description="Analiza varias imágenes en una sola petición y guarda todos los resultados en una transacción"
+)
+async def analyze_emotions_batch(
+    files: List[UploadFile] = File(..., description="Imágenes a analizar (JPG, PNG, WEBP - Máx. 5MB cada una)"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Analiza un lote de imágenes (por ejemplo, una importación de galería):
+    
+    - **files**: Archivos de imagen (campo `files` repetido en el multipart)
+    - Máximo `EMOTION_BATCH_MAX_IMAGES` imágenes por lote
+    
+    Una imagen inválida o sin rostro no hace fallar el lote: su resultado
+    lleva `success=false` y el error. Los análisis correctos se guardan juntos.
+    
+    Retorna:
+    - **total**, **succeeded**, **failed**: recuento del lote
+    - **results**: un resultado por imagen, en el orden recibido, con su `analysis_id`
+    """
+    return await EmotionController.analyze_emotions_batch(
+        files=files,
+        user_id=str(current_user.id),
+        db=db
+    )
+
+
+@router.websocket("/stream")
+async def stream_emotions(websocket: WebSocket):
+    """
+    Seguimiento de emociones en tiempo real desde la cámara:
+    
+    - Conectar a `/api/emotions/stream` con el subprotocolo `['bearer', <JWT>]`,
+      o enviar primero `{"type": "auth", "token": "<JWT>"}`
+    - Enviar fotogramas como mensajes binarios (JPEG recomendado, máx. 1MB)
+    - Enviar `{"type": "stop"}` para terminar
+    
+    Mensajes del servidor: `ready`, `emotion` (solo cuando cambia la emoción
+    dominante) y `summary` al cerrar. Solo el resumen se guarda en el historial.
+    """
+    await EmotionController.stream_emotions(websocket)
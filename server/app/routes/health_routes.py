@@ -1,5 +1,10 @@
 from fastapi import APIRouter
 
+from app.services.lazy_service import services_health
+from app.services.blocking_pool import pools_stats
+from app.services.emotion_backends import emotion_router
+from app.services.emotion_result_cache import emotion_result_cache
+
 router = APIRouter()
 
 @router.get("/health")
@@ -8,4 +13,35 @@ def health_check():
     return {
         "status": "healthy",
         "service": "anima-api"
-    }
\ No newline at end of file
+    }
+
+@router.get("/health/services")
+def services_health_check():
+    """Estado del warm-up de los servicios externos (Spotify, Rekognition...)"""
+    services = services_health()
+    degraded = [name for name, h in services.items() if h['status'] not in ('ok', 'pending')]
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "services": services
+    }
+
+@router.get("/health/pools")
+def pools_health_check():
+    """Métricas de los pools de trabajo bloqueante (hilos activos, cola, esperas)"""
+    pools = pools_stats()
+    saturated = [name for name, p in pools.items() if p['max_queue'] and p['queued'] >= p['max_queue']]
+    return {
+        "status": "saturated" if saturated else "healthy",
+        "pools": pools
+    }
+
+@router.get("/health/emotion")
+def emotion_health_check():
+    """Backend de emociones activo (Rekognition/local/sombra), sus latencias y la caché de resultados"""
+    backend = emotion_router.stats()
+    degraded = backend['mode'] in ('local', 'local_first') and not backend['local_available']
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "backend": backend,
+        "cache": emotion_result_cache.stats()
+    }
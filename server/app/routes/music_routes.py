@@ -2,11 +2,15 @@ from fastapi import APIRouter, Depends, Query, status, Body
 from sqlalchemy.orm import Session
 from app.config.database import get_db
 from app.controllers.music_controller import MusicController
-from app.schemas.music_schemas import MusicRecommendationsResponse
+from app.schemas.music_schemas import (
+    BatchRecommendationsRequest,
+    BatchRecommendationsResponse,
+    MusicRecommendationsResponse,
+)
 from app.middlewares.auth_middleware import get_current_active_user
 from app.models.user import User
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(
     prefix="/api/music",
@@ -30,6 +34,7 @@ class CreateSpotifyPlaylistRequest(BaseModel):
 def get_music_recommendations(
     emotion: str,
     limit: int = Query(20, ge=1, le=100, description="Número de canciones a recomendar"),
+    deadline_ms: Optional[int] = Query(None, ge=100, le=60000, description="Presupuesto de latencia en milisegundos"),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -37,6 +42,7 @@ def get_music_recommendations(
     
     - **emotion**: Emoción detectada (HAPPY, SAD, ANGRY, CALM, SURPRISED, FEAR, DISGUSTED, CONFUSED)
     - **limit**: Número de canciones (1-100, default: 20)
+    - **deadline_ms**: Opcional. Si vence, se responde con los candidatos recibidos hasta entonces y `partial: true`
     
     Las recomendaciones se basan en:
     - **Valence**: Nivel de positividad musical
@@ -51,7 +57,61 @@ def get_music_recommendations(
     - Preview de audio (si disponible)
     - Imagen del álbum
     """
-    return MusicController.get_recommendations(emotion, limit)
+    return MusicController.get_recommendations(emotion, limit, deadline_ms, user_id=str(current_user.id))
+
+@router.post(
+    "/recommendations/batch",
+    response_model=BatchRecommendationsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Obtener recomendaciones para varias emociones",
+    description="Recomendaciones para varias emociones ponderadas en una sola llamada, por emoción o mezcladas"
+)
+def get_batch_music_recommendations(
+    request: BatchRecommendationsRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Recomendaciones para las emociones principales de un análisis (p. ej. las
+    2-3 primeras de `all_emotions`):
+
+    - **emotions**: lista de `{emotion, weight}` (1-8 emociones)
+    - **limit**: canciones por emoción, o en total si `blend` (1-100, default: 20)
+    - **blend**: `false` devuelve `results` por emoción; `true` además una lista
+      `tracks` mezclada en proporción a los pesos
+    - **deadline_ms**: Opcional. Si vence, los pools aún en construcción se sirven
+      con los candidatos recibidos y `partial: true`
+
+    Las consultas que comparten las emociones se hacen una sola vez.
+    """
+    return MusicController.get_batch_recommendations(request)
+
+@router.get(
+    "/recommendations/{emotion}/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Obtener recomendaciones musicales en streaming",
+    description="Envía las recomendaciones a medida que se recolectan (NDJSON o Server-Sent Events)"
+)
+def stream_music_recommendations(
+    emotion: str,
+    limit: int = Query(20, ge=1, le=100, description="Número de canciones a recomendar"),
+    response_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$", description="Formato del stream: ndjson o sse"),
+    deadline_ms: Optional[int] = Query(None, ge=100, le=60000, description="Presupuesto de latencia en milisegundos"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Variante en streaming de las recomendaciones:
+
+    - **emotion**: Emoción detectada (HAPPY, SAD, ANGRY, CALM, SURPRISED, FEAR, DISGUSTED, CONFUSED)
+    - **limit**: Número de canciones (1-100, default: 20)
+    - **format**: `ndjson` (un JSON por línea) o `sse` (Server-Sent Events)
+    - **deadline_ms**: Opcional. Si vence, el stream termina con los candidatos recibidos y `partial: true`
+
+    Frames emitidos:
+    - `tracks`: selección diversificada actual (cada frame reemplaza al anterior; `final` indica el último)
+    - `summary`: `music_params`, géneros usados y descripción de playlist
+    - `error`: si la recolección falla a mitad del stream
+    """
+    return MusicController.stream_recommendations(emotion, limit, response_format, deadline_ms)
 
 @router.post(
     "/spotify/create-playlist",
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 class EmotionResponse(BaseModel):
     """Respuesta del análisis de emociones"""
@@ -27,6 +27,20 @@ class EmotionAnalysisResponse(BaseModel):
     face_details: Optional[FaceDetailsResponse] = None
     error: Optional[str] = None
 
+class BatchEmotionAnalysisItem(EmotionAnalysisResponse):
+    """Resultado de una imagen dentro de un lote"""
+    index: int
+    filename: Optional[str] = None
+    analysis_id: Optional[str] = None
+
+class BatchEmotionAnalysisResponse(BaseModel):
+    """Respuesta del análisis en lote (un resultado por imagen, en el orden recibido)"""
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchEmotionAnalysisItem]
+    warning: Optional[str] = None
+
 class EmotionAnalysisError(BaseModel):
     """Respuesta de error"""
     success: bool = False
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 
 class TrackResponse(BaseModel):
@@ -29,8 +29,42 @@ class MusicRecommendationsResponse(BaseModel):
     genres_used: List[str]
     music_params: MusicParamsInfo
     playlist_description: Optional[str] = None
+    partial: Optional[bool] = None
 
 class MusicRecommendationRequest(BaseModel):
     """Request para obtener recomendaciones"""
     emotion: str
-    limit: Optional[int] = 20
\ No newline at end of file
+    limit: Optional[int] = 20
+
+class EmotionWeight(BaseModel):
+    """Emoción con su peso dentro de una petición batch"""
+    emotion: str
+    weight: float = Field(default=1.0, ge=0)
+
+class BatchRecommendationsRequest(BaseModel):
+    """Request para obtener recomendaciones de varias emociones a la vez"""
+    emotions: List[EmotionWeight] = Field(..., min_length=1, max_length=8)
+    limit: int = Field(default=20, ge=1, le=100)
+    blend: bool = Field(default=False, description="Mezclar todas las emociones en una sola lista")
+    deadline_ms: Optional[int] = Field(default=None, ge=100, le=60000, description="Presupuesto de latencia en milisegundos")
+
+class EmotionRecommendations(BaseModel):
+    """Recomendaciones de una emoción dentro de un batch"""
+    emotion: str
+    weight: float
+    tracks: List[TrackResponse]
+    total: int
+    genres_used: List[str]
+    music_params: MusicParamsInfo
+    playlist_description: Optional[str] = None
+
+class BatchRecommendationsResponse(BaseModel):
+    """Respuesta con recomendaciones de varias emociones"""
+    success: bool
+    blended: bool
+    emotions: List[EmotionWeight]
+    results: List[EmotionRecommendations]
+    tracks: Optional[List[TrackResponse]] = None
+    total: Optional[int] = None
+    music_params: Optional[MusicParamsInfo] = None
+    partial: Optional[bool] = None
@@ -0,0 +1,158 @@
+import os
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from app.services.db_backoff import DbBackoff
+
+logger = logging.getLogger("artist_index")
+
+
+class ArtistIndex:
+    """
+    Índice nombre de artista -> ID de Spotify: memoria + tabla en Postgres.
+
+    El ID de un artista no cambia, así que las entradas no expiran. Al primer
+    uso se cargan todas las filas de la tabla (son pocas: artistas semilla y
+    los que se hayan resuelto después). Si la base de datos no responde, el
+    nivel persistente se salta durante una pausa creciente (`DbBackoff`), el
+    índice sigue en memoria y la carga inicial se reintenta después.
+    """
+
+    def __init__(self, session_factory: Optional[Callable] = None, persist: bool = True):
+        self._ids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._session_factory = session_factory
+        self._persist = persist
+        self._db_backoff = DbBackoff("Índice de artistas")
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ArtistIndex":
+        return cls(
+            persist=os.getenv('SPOTIFY_ARTIST_INDEX_PERSIST', 'true').lower() in ('1', 'true', 'yes')
+        )
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return " ".join(name.split()).casefold()
+
+    def get(self, name: str) -> Optional[str]:
+        self._ensure_loaded()
+        with self._lock:
+            artist_id = self._ids.get(self.normalize(name))
+            if artist_id:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return artist_id
+
+    def put(self, name: str, artist_id: str):
+        key = self.normalize(name)
+        with self._lock:
+            if self._ids.get(key) == artist_id:
+                return
+            self._ids[key] = artist_id
+        self._save_to_db(key, name, artist_id)
+
+    def resolve(self, name: str, search: Callable[[str], Optional[str]]) -> Optional[str]:
+        """Devuelve el ID conocido o lo busca con `search` y lo guarda."""
+        artist_id = self.get(name)
+        if artist_id:
+            return artist_id
+        artist_id = search(name)
+        if artist_id:
+            self.put(name, artist_id)
+        return artist_id
+
+    def seed(self, names: Iterable[str], search: Callable[[str], Optional[str]]) -> int:
+        """Resuelve por adelantado los nombres que falten; devuelve cuántos quedan resueltos."""
+        resolved = 0
+        for name in dict.fromkeys(names):
+            try:
+                if self.resolve(name, search):
+                    resolved += 1
+            except Exception as e:
+                logger.debug(f"No se pudo resolver el artista {name}: {e}")
+        return resolved
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ============ NIVEL POSTGRES ============
+
+    def _open_session(self):
+        if not self._persist or not self._db_backoff.ready():
+            return None
+        if self._session_factory is None:
+            from app.config.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _ensure_loaded(self):
+        # Doble comprobación: solo el primer hilo carga; el resto espera a que termine
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            rows = self._load_from_db()
+            if rows is None:
+                return  # Base de datos en pausa: se reintenta en un acceso posterior
+            with self._lock:
+                for key, artist_id in rows.items():
+                    self._ids.setdefault(key, artist_id)
+            self._loaded = True
+        if rows:
+            logger.info(f"✓ Índice de artistas cargado con {len(rows)} entradas")
+
+    def _load_from_db(self) -> Optional[Dict[str, str]]:
+        """Filas persistidas; {} sin nivel persistente y None si no se pudo leer (reintentar)."""
+        if not self._persist:
+            return {}
+        try:
+            db = self._open_session()
+        except Exception as e:
+            self._db_backoff.failed(e)
+            return None
+        if db is None:
+            return None
+
+        try:
+            from app.models.spotify_artist import SpotifyArtist
+            rows = {row.name_key: row.artist_id for row in db.query(SpotifyArtist).all()}
+            self._db_backoff.succeeded()
+            return rows
+        except Exception as e:
+            db.rollback()
+            self._db_backoff.failed(e)
+            return None
+        finally:
+            db.close()
+
+    def _save_to_db(self, key: str, name: str, artist_id: str):
+        try:
+            db = self._open_session()
+        except Exception as e:
+            self._db_backoff.failed(e)
+            return
+        if db is None:
+            return
+
+        try:
+            from sqlalchemy.dialects.postgresql import insert
+            from app.models.spotify_artist import SpotifyArtist
+            stmt = insert(SpotifyArtist).values(
+                name_key=key, name=name, artist_id=artist_id
+            ).on_conflict_do_update(index_elements=['name_key'], set_={'artist_id': artist_id})
+            db.execute(stmt)
+            db.commit()
+            self._db_backoff.succeeded()
+        except Exception as e:
+            db.rollback()
+            self._db_backoff.failed(e)
+        finally:
+            db.close()
@@ -0,0 +1,99 @@
+"""
+Representación columnar de audio features de Spotify con NumPy.
+
+Los filtros de `SpotifyService.EMOTION_FEATURE_FILTERS` se compilan una sola
+vez a predicados vectoriales, y los promedios salen de una única reducción,
+de modo que el coste por track es el de una operación de NumPy y no el de un
+recorrido de diccionarios en Python.
+"""
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+from numpy.lib import recfunctions
+
+# Columnas y valores por defecto cuando Spotify no devuelve el campo
+FEATURE_DEFAULTS = {
+    'valence': 0.5,
+    'energy': 0.5,
+    'danceability': 0.5,
+    'acousticness': 0.5,
+    'tempo': 120.0,
+    'mode': 0.0,
+}
+FEATURE_COLUMNS = tuple(FEATURE_DEFAULTS)
+FEATURE_DTYPE = np.dtype([(name, 'f8') for name in FEATURE_COLUMNS])
+
+# Márgenes de tolerancia de los filtros
+TOLERANCE = 0.05
+TEMPO_TOLERANCE = 10
+
+# filtro -> (columna, comparación, margen)
+_THRESHOLD_FILTERS = {
+    'min_valence': ('valence', 'ge', -TOLERANCE),
+    'max_valence': ('valence', 'le', TOLERANCE),
+    'min_energy': ('energy', 'ge', -TOLERANCE),
+    'max_energy': ('energy', 'le', TOLERANCE),
+    'min_danceability': ('danceability', 'ge', -TOLERANCE),
+    'max_acousticness': ('acousticness', 'le', TOLERANCE),
+    'min_acousticness': ('acousticness', 'ge', -TOLERANCE),
+    'max_tempo': ('tempo', 'le', TEMPO_TOLERANCE),
+}
+
+Predicate = Callable[[np.ndarray], np.ndarray]
+
+
+def features_to_array(features_list: Iterable[Dict]) -> np.ndarray:
+    """Convierte una lista de dicts de audio features en un array estructurado."""
+    rows = [
+        tuple(
+            FEATURE_DEFAULTS[name] if f.get(name) is None else f[name]
+            for name in FEATURE_COLUMNS
+        )
+        for f in features_list
+    ]
+    return np.array(rows, dtype=FEATURE_DTYPE)
+
+
+def _freeze(filters: Dict) -> Tuple:
+    return tuple(sorted(
+        (key, tuple(value) if isinstance(value, (list, tuple)) else value)
+        for key, value in filters.items()
+    ))
+
+
+@lru_cache(maxsize=64)
+def _compile_frozen(frozen: Tuple) -> Predicate:
+    bounds: List[Tuple[str, str, float]] = []
+    for key, value in frozen:
+        if key == 'tempo_range':
+            lo, hi = value
+            bounds.append(('tempo', 'ge', lo - TEMPO_TOLERANCE))
+            bounds.append(('tempo', 'le', hi + TEMPO_TOLERANCE))
+        elif key in _THRESHOLD_FILTERS:
+            column, op, margin = _THRESHOLD_FILTERS[key]
+            bounds.append((column, op, value + margin))
+
+    def predicate(arr: np.ndarray) -> np.ndarray:
+        mask = np.ones(arr.shape[0], dtype=bool)
+        for column, op, limit in bounds:
+            if op == 'ge':
+                mask &= arr[column] >= limit
+            else:
+                mask &= arr[column] <= limit
+        return mask
+
+    return predicate
+
+
+def compile_filters(filters: Dict) -> Predicate:
+    """Compila un dict de filtros (ej. EMOTION_FEATURE_FILTERS['HAPPY']) a un predicado vectorial."""
+    return _compile_frozen(_freeze(filters or {}))
+
+
+def feature_means(arr: np.ndarray) -> Dict[str, float]:
+    """Promedio de cada columna en una sola reducción."""
+    if arr.shape[0] == 0:
+        return dict(FEATURE_DEFAULTS)
+    means = recfunctions.structured_to_unstructured(arr).mean(axis=0)
+    return {name: float(value) for name, value in zip(FEATURE_COLUMNS, means)}
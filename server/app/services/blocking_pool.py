@@ -0,0 +1,134 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("blocking_pool")
+
+_registry: Dict[str, "BlockingPool"] = {}
+
+
+class PoolSaturatedError(RuntimeError):
+    """La cola del pool está llena: la petición se rechaza en lugar de esperar."""
+
+
+class BlockingPool:
+    """
+    Pool de hilos dimensionado para trabajo bloqueante llamado desde endpoints async.
+
+    boto3 y la sesión síncrona de SQLAlchemy bloquean el hilo que los llama; si
+    se invocan directamente dentro de un `async def`, congelan el event loop
+    del worker. `run()` los ejecuta en este pool y los espera sin bloquear.
+
+    Cada pool tiene su propio tamaño (`max_workers`), para que una dependencia
+    lenta no consuma los hilos de otra, y una cola opcional acotada
+    (`max_queue`): al llenarse, `run()` lanza `PoolSaturatedError`.
+    """
+
+    def __init__(self, name: str, max_workers: int = 8, max_queue: int = 0):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+        _registry[name] = self
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, max_workers: int = 8, max_queue: int = 0) -> "BlockingPool":
+        return cls(
+            name,
+            max_workers=int(os.getenv(f'{prefix}_POOL_SIZE', max_workers)),
+            max_queue=int(os.getenv(f'{prefix}_POOL_MAX_QUEUE', max_queue))
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-pool"
+                    )
+        return self._executor
+
+    def _execute(self, fn: Callable, enqueued_at: float) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._wait_total += started - enqueued_at
+        ok = False
+        try:
+            result = fn()
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._run_total += time.perf_counter() - started
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Ejecuta `fn(*args, **kwargs)` en el pool y espera su resultado sin bloquear el loop."""
+        with self._lock:
+            if self.max_queue and self._queued >= self.max_queue:
+                self.rejected += 1
+                raise PoolSaturatedError(f"Pool '{self.name}' saturado ({self._queued} en cola)")
+            self._queued += 1
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queued)
+
+        call = partial(self._execute, partial(fn, *args, **kwargs), time.perf_counter())
+        future = self._get_executor().submit(call)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future):
+        # Una tarea cancelada antes de empezar sigue contando como encolada
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            started = finished + self._active
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'active': self._active,
+                'queued': self._queued,
+                'max_queue_depth': self.max_queue_depth,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self._wait_total / started * 1000, 2) if started else 0.0,
+                'avg_run_ms': round(self._run_total / finished * 1000, 2) if finished else 0.0
+            }
+
+
+def pools_stats() -> Dict[str, Dict[str, Any]]:
+    """Métricas de cada pool registrado."""
+    return {name: pool.stats() for name, pool in _registry.items()}
+
+
+# Pools del pipeline de emociones: llamadas a AWS y escrituras en la base de datos
+rekognition_pool = BlockingPool.from_env('rekognition', 'REKOGNITION', max_workers=8, max_queue=64)
+db_pool = BlockingPool.from_env('db', 'DB_WRITE', max_workers=4)
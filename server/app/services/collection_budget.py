@@ -0,0 +1,100 @@
+"""
+Presupuesto adaptativo para la recolección de candidatos.
+
+La recolección se lanza en oleadas. Tras cada oleada se mide el rendimiento
+marginal (tracks y artistas únicos nuevos por consulta) y se decide si seguir:
+
+  - objetivo de diversidad cumplido: hay al menos `CANDIDATES_PER_TRACK ·
+    limit` tracks únicos y `ARTISTS_PER_TRACK · limit` artistas únicos, que es
+    lo que necesita `diversify` para llenar la fase estricta (1 por artista) y
+    dejar margen al filtrado por audio features;
+  - rendimientos decrecientes: la última oleada aportó menos de
+    `MIN_NEW_TRACKS_PER_QUERY` tracks nuevos por consulta;
+  - se alcanzó `target_count`;
+  - o venció el `deadline` (instante de `time.monotonic()`): la recolección
+    se corta con lo que haya llegado.
+"""
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.services.track_record import track_artist, track_id
+
+
+class CollectionBudget:
+    """Cuenta tracks/artistas únicos y decide cuándo dejar de lanzar consultas."""
+
+    CANDIDATES_PER_TRACK = 5
+    ARTISTS_PER_TRACK = 1.0
+    MIN_NEW_TRACKS_PER_QUERY = 2.0
+
+    def __init__(self, limit: Optional[int] = None, target_count: int = 300, deadline: Optional[float] = None):
+        self.limit = limit
+        self.target_count = target_count
+        self.deadline = deadline
+        self.seen_ids: Set[str] = set()
+        self.artists: Set[str] = set()
+        self.queries = 0
+        self.waves = 0
+        self.stop_reason: Optional[str] = None
+        self._wave_new_tracks = 0
+
+    @property
+    def adaptive(self) -> bool:
+        return self.limit is not None
+
+    def add(self, tracks: Iterable[Any]) -> List[Any]:
+        """Registra tracks recibidos y devuelve solo los nuevos (deduplicados)."""
+        new = []
+        for track in tracks:
+            tid = track_id(track)
+            if not tid or tid in self.seen_ids:
+                continue
+            self.seen_ids.add(tid)
+            artist = track_artist(track)
+            if artist:
+                self.artists.add(artist)
+            new.append(track)
+        self._wave_new_tracks += len(new)
+        return new
+
+    def remaining(self) -> Optional[float]:
+        """Segundos hasta el deadline (None si no hay)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def diversity_met(self) -> bool:
+        if not self.adaptive:
+            return False
+        return (
+            len(self.seen_ids) >= self.limit * self.CANDIDATES_PER_TRACK
+            and len(self.artists) >= self.limit * self.ARTISTS_PER_TRACK
+        )
+
+    def end_wave(self, queries: int) -> bool:
+        """Cierra una oleada de `queries` consultas; True si hay que parar."""
+        self.waves += 1
+        self.queries += queries
+        new_tracks, self._wave_new_tracks = self._wave_new_tracks, 0
+
+        if len(self.seen_ids) >= self.target_count:
+            self.stop_reason = 'target_count'
+        elif self.expired():
+            self.stop_reason = 'deadline'
+        elif self.diversity_met():
+            self.stop_reason = 'diversity'
+        elif self.adaptive and queries and new_tracks / queries < self.MIN_NEW_TRACKS_PER_QUERY:
+            self.stop_reason = 'diminishing_returns'
+        return self.stop_reason is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tracks': len(self.seen_ids),
+            'artists': len(self.artists),
+            'queries': self.queries,
+            'waves': self.waves,
+            'stop_reason': self.stop_reason
+        }
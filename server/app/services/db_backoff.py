@@ -0,0 +1,42 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger("db_backoff")
+
+
+class DbBackoff:
+    """
+    Pausa con retroceso exponencial para un nivel persistente opcional.
+
+    Tras un error de base de datos el nivel se salta durante `initial`
+    segundos; cada fallo seguido duplica la pausa (hasta `maximum`) y un
+    acceso correcto la reinicia. Un corte momentáneo no deja el nivel
+    desactivado para el resto de la vida del worker.
+    """
+
+    def __init__(self, name: str, initial: float = 30.0, maximum: float = 600.0):
+        self.name = name
+        self.initial = initial
+        self.maximum = maximum
+        self._delay = initial
+        self._until = 0.0
+        self._lock = threading.Lock()
+        self.failures = 0
+
+    def ready(self) -> bool:
+        """True si se puede intentar la base de datos (no estamos en pausa)."""
+        return time.monotonic() >= self._until
+
+    def failed(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            delay = self._delay
+            self._until = time.monotonic() + delay
+            self._delay = min(self._delay * 2, self.maximum)
+        logger.warning(f"⚠ {self.name} sin nivel Postgres durante {delay:.0f}s: {error}")
+
+    def succeeded(self):
+        if self._delay != self.initial:
+            with self._lock:
+                self._delay = self.initial
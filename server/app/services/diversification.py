@@ -0,0 +1,184 @@
+"""
+Motor de diversificación de tracks para las recomendaciones.
+
+Trabaja sobre metadatos compactos (id, artista, álbum, popularidad, año),
+acepta tanto `Track` como dicts de Spotify y nunca modifica los tracks
+recibidos, por lo que es seguro usarlo sobre pools de candidatos compartidos
+o cacheados.
+
+La selección es una Maximal Marginal Relevance (MMR) voraz:
+
+    score = λ · relevancia - (1 - λ) · (w_artista · n_artista + w_album · n_album)
+
+donde `n_artista` / `n_album` son los tracks ya elegidos del mismo artista /
+álbum. Como la penalización solo crece al elegir, basta una cola de prioridad
+con re-evaluación perezosa para obtener la misma selección que la MMR voraz
+ingenua en O(n log n) en lugar de O(n · k).
+
+Además se respetan las cuotas históricas del servicio:
+  - primera mitad: como máximo 1 track por artista,
+  - después: como máximo 2 por artista y 2 por álbum,
+  - si aún faltan, se completa sin cuotas (la penalización sigue repartiendo).
+"""
+import heapq
+import os
+import random
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.services.track_record import Track, release_year
+
+
+class DiversityConfig:
+    """Pesos del objetivo MMR y cuotas por artista/álbum."""
+
+    def __init__(
+        self,
+        mmr_lambda: float = 0.5,
+        artist_weight: float = 1.0,
+        album_weight: float = 0.5,
+        popularity_weight: float = 0.5,
+        year_weight: float = 0.3,
+        random_weight: float = 0.2,
+        max_per_artist: int = 2,
+        max_per_album: int = 2,
+        strict_fraction: float = 0.5
+    ):
+        self.mmr_lambda = mmr_lambda
+        self.artist_weight = artist_weight
+        self.album_weight = album_weight
+        self.popularity_weight = popularity_weight
+        self.year_weight = year_weight
+        self.random_weight = random_weight
+        self.max_per_artist = max_per_artist
+        self.max_per_album = max_per_album
+        self.strict_fraction = strict_fraction
+
+    @classmethod
+    def from_env(cls) -> "DiversityConfig":
+        return cls(mmr_lambda=float(os.getenv('SPOTIFY_MMR_LAMBDA', 0.5)))
+
+
+class TrackMeta(NamedTuple):
+    index: int
+    track_id: str
+    artist: str
+    album: str
+    popularity: float
+    year: int
+
+
+def track_meta(index: int, track: Any) -> TrackMeta:
+    """Extrae los metadatos compactos de un `Track` o de un track de Spotify (dict)."""
+    if isinstance(track, Track):
+        return TrackMeta(
+            index=index,
+            track_id=track.id,
+            artist=track.artist_id or (track.artists[0] if track.artists else 'Unknown'),
+            album=track.album_id or track.album,
+            popularity=track.popularity,
+            year=track.year,
+        )
+    artists = track.get('artists') or [{}]
+    first_artist = artists[0] or {}
+    album = track.get('album') or {}
+    return TrackMeta(
+        index=index,
+        track_id=track.get('id') or f"#{index}",
+        artist=first_artist.get('id') or first_artist.get('name', 'Unknown'),
+        album=album.get('id') or album.get('name', 'Unknown'),
+        popularity=track.get('popularity', 50),
+        year=release_year(album.get('release_date', '')),
+    )
+
+
+def _relevance(meta: TrackMeta, config: DiversityConfig, rng: random.Random) -> float:
+    """Relevancia en [0, 1]: popularidad + año de lanzamiento + un poco de azar."""
+    year_score = min(max((meta.year - 1950) / 75, 0.0), 1.0)  # Normalizar años 1950-2025
+    return (
+        config.popularity_weight * meta.popularity / 100
+        + config.year_weight * year_score
+        + config.random_weight * rng.random()
+    )
+
+
+def diversify(
+    tracks: List[Any],
+    limit: int,
+    config: Optional[DiversityConfig] = None,
+    rng: Optional[random.Random] = None
+) -> List[Any]:
+    """
+    Selecciona hasta `limit` tracks diversificados (sin mutar la entrada).
+
+    Devuelve los mismos objetos recibidos, ordenados por relevancia con una
+    ligera mezcla aleatoria para no ser demasiado predecible.
+    """
+    if len(tracks) <= limit:
+        return list(tracks)
+
+    config = config or DiversityConfig()
+    rng = rng or random
+
+    # Metadatos compactos, deduplicados por ID
+    metas: List[TrackMeta] = []
+    seen_ids = set()
+    for i, track in enumerate(tracks):
+        meta = track_meta(i, track)
+        if meta.track_id in seen_ids:
+            continue
+        seen_ids.add(meta.track_id)
+        metas.append(meta)
+
+    relevance = {m.index: _relevance(m, config, rng) for m in metas}
+    lam = config.mmr_lambda
+    artist_count: Dict[str, int] = defaultdict(int)
+    album_count: Dict[str, int] = defaultdict(int)
+
+    def mmr(meta: TrackMeta) -> float:
+        penalty = (config.artist_weight * artist_count[meta.artist]
+                   + config.album_weight * album_count[meta.album])
+        return lam * relevance[meta.index] - (1 - lam) * penalty
+
+    # Heap de (-score, orden, meta, conteos con los que se calculó el score)
+    heap = [(-mmr(m), i, m, (0, 0)) for i, m in enumerate(metas)]
+    heapq.heapify(heap)
+
+    strict_target = int(limit * config.strict_fraction)
+    phases = [
+        (strict_target, 1, None),
+        (limit, config.max_per_artist, config.max_per_album),
+        (limit, None, None),
+    ]
+
+    selected: List[TrackMeta] = []
+    for target, artist_cap, album_cap in phases:
+        deferred = []
+        while heap and len(selected) < target:
+            neg_score, order, meta, counts = heapq.heappop(heap)
+            current = (artist_count[meta.artist], album_count[meta.album])
+
+            if (artist_cap is not None and current[0] >= artist_cap) or \
+               (album_cap is not None and current[1] >= album_cap):
+                deferred.append((neg_score, order, meta, counts))
+                continue
+
+            if current != counts:
+                # Score desactualizado: re-evaluar y volver a encolar
+                heapq.heappush(heap, (-mmr(meta), order, meta, current))
+                continue
+
+            selected.append(meta)
+            artist_count[meta.artist] += 1
+            album_count[meta.album] += 1
+
+        for item in deferred:
+            heapq.heappush(heap, item)
+
+    # Ordenar por relevancia y mezclar un poco
+    selected.sort(key=lambda m: relevance[m.index], reverse=True)
+    for _ in range(len(selected) // 3):
+        i, j = rng.sample(range(len(selected)), 2)
+        selected[i], selected[j] = selected[j], selected[i]
+
+    return [tracks[m.index] for m in selected[:limit]]
@@ -0,0 +1,322 @@
+import io
+import os
+import abc
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("emotion_backends")
+
+NO_FACE_ERROR = 'No se detectó ningún rostro en la imagen'
+
+
+class EmotionBackendUnavailableError(RuntimeError):
+    """El detector configurado no puede atender la petición (p. ej. modo `local` sin modelos)."""
+
+
+class EmotionBackend(abc.ABC):
+    """
+    Detector de emociones. Todas las implementaciones devuelven la forma de
+    `RekognitionService.detect_faces_and_emotions`: `success`,
+    `faces_detected`, `dominant_emotion` {type, confidence}, `all_emotions`
+    (tipo -> porcentaje, con los tipos de Rekognition) y `face_details`.
+    """
+
+    name = 'base'
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def detect_faces_and_emotions(self, image_bytes: bytes) -> Dict[str, Any]:
+        ...
+
+
+class RekognitionBackend(EmotionBackend):
+    """AWS Rekognition (`detect_faces`): una llamada de red por análisis."""
+
+    name = 'rekognition'
+
+    def __init__(self, service=None):
+        self._service = service
+
+    @property
+    def service(self):
+        if self._service is None:
+            from app.services.rekognition_service import rekognition_service
+            return rekognition_service
+        return self._service
+
+    def detect_faces_and_emotions(self, image_bytes: bytes) -> Dict[str, Any]:
+        return self.service.detect_faces_and_emotions(image_bytes)
+
+
+class OnnxEmotionBackend(EmotionBackend):
+    """
+    Inferencia local en CPU con ONNX Runtime (dependencia opcional `onnxruntime`).
+
+    Dos modelos, configurados por ruta:
+      - detector de rostros UltraFace (`version-RFB-320.onnx`): entrada RGB
+        1x3x240x320 normalizada (x - 127) / 128, salidas `scores` [1, N, 2] y
+        `boxes` [1, N, 4] en coordenadas relativas;
+      - clasificador FER+ (`emotion-ferplus-8.onnx`): entrada en gris 1x1x64x64
+        (0-255), 8 logits.
+
+    Las clases de FER+ se traducen a los tipos de Rekognition (neutral -> CALM,
+    desprecio se suma a DISGUSTED). No hay `face_details`: los atributos de
+    edad, gafas, etc. solo los da Rekognition.
+    """
+
+    name = 'onnx'
+
+    FERPLUS_TYPES = ['CALM', 'HAPPY', 'SURPRISED', 'SAD', 'ANGRY', 'DISGUSTED', 'FEAR', 'DISGUSTED']
+    DETECTOR_SIZE = (320, 240)
+    CLASSIFIER_SIZE = 64
+
+    def __init__(
+        self,
+        face_model_path: Optional[str] = None,
+        emotion_model_path: Optional[str] = None,
+        face_threshold: float = 0.7,
+        threads: int = 1
+    ):
+        self.face_model_path = face_model_path
+        self.emotion_model_path = emotion_model_path
+        self.face_threshold = face_threshold
+        self.threads = threads
+        self._detector = None
+        self._classifier = None
+        self._available: Optional[bool] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "OnnxEmotionBackend":
+        return cls(
+            face_model_path=os.getenv('EMOTION_ONNX_FACE_MODEL'),
+            emotion_model_path=os.getenv('EMOTION_ONNX_EMOTION_MODEL'),
+            face_threshold=float(os.getenv('EMOTION_ONNX_FACE_THRESHOLD', 0.7)),
+            threads=int(os.getenv('EMOTION_ONNX_THREADS', 1))
+        )
+
+    @property
+    def available(self) -> bool:
+        # Se consulta en cada análisis: los modelos y onnxruntime se comprueban una sola vez
+        if self._available is None:
+            self._available = self._check_available()
+        return self._available
+
+    def _check_available(self) -> bool:
+        if not (self.face_model_path and self.emotion_model_path):
+            return False
+        if not (os.path.exists(self.face_model_path) and os.path.exists(self.emotion_model_path)):
+            return False
+        try:
+            import onnxruntime  # noqa: F401  dependencia opcional
+        except ImportError:
+            return False
+        return True
+
+    def _sessions(self):
+        if self._detector is None or self._classifier is None:
+            with self._lock:
+                if self._detector is None or self._classifier is None:
+                    import onnxruntime as ort
+                    options = ort.SessionOptions()
+                    options.intra_op_num_threads = self.threads
+                    providers = ['CPUExecutionProvider']
+                    self._detector = ort.InferenceSession(self.face_model_path, options, providers=providers)
+                    self._classifier = ort.InferenceSession(self.emotion_model_path, options, providers=providers)
+                    logger.info("✅ Modelos ONNX de emociones cargados")
+        return self._detector, self._classifier
+
+    def detect_faces_and_emotions(self, image_bytes: bytes) -> Dict[str, Any]:
+        from PIL import Image, ImageOps
+
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as img:
+                img = ImageOps.exif_transpose(img).convert('RGB')
+        except Exception as e:
+            return {'success': False, 'error': 'Formato de imagen inválido. Por favor usa JPG, PNG o WEBP.', 'details': str(e)}
+
+        detector, classifier = self._sessions()
+        faces = self._detect_faces(detector, img)
+        if not faces:
+            return {'success': False, 'error': NO_FACE_ERROR, 'faces_detected': 0}
+
+        # Como Rekognition: las emociones son las del rostro más claro
+        _, box = faces[0]
+        face = img.crop(box).convert('L').resize((self.CLASSIFIER_SIZE, self.CLASSIFIER_SIZE), Image.BILINEAR)
+        tensor = np.asarray(face, dtype=np.float32)[None, None, :, :]
+        logits = classifier.run(None, {classifier.get_inputs()[0].name: tensor})[0].reshape(-1)
+
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+        emotions: Dict[str, float] = {}
+        for emotion_type, p in zip(self.FERPLUS_TYPES, probabilities):
+            emotions[emotion_type] = emotions.get(emotion_type, 0.0) + float(p) * 100
+        emotions = {k: round(v, 2) for k, v in emotions.items()}
+        dominant = max(emotions.items(), key=lambda item: item[1])
+
+        return {
+            'success': True,
+            'faces_detected': len(faces),
+            'dominant_emotion': {'type': dominant[0], 'confidence': dominant[1]},
+            'all_emotions': emotions,
+            'face_details': None
+        }
+
+    def _detect_faces(self, detector, img) -> List[Tuple[float, Tuple[int, int, int, int]]]:
+        """Rostros (confianza, caja en píxeles) por confianza descendente, tras NMS."""
+        width, height = self.DETECTOR_SIZE
+        resized = np.asarray(img.resize((width, height)), dtype=np.float32)
+        tensor = ((resized - 127.0) / 128.0).transpose(2, 0, 1)[None, :, :, :]
+        scores, boxes = detector.run(None, {detector.get_inputs()[0].name: tensor})[:2]
+
+        confidences = scores[0, :, 1]
+        keep = np.where(confidences > self.face_threshold)[0]
+        order = keep[np.argsort(-confidences[keep])]
+        selected: List[int] = []
+        for i in order:
+            if all(self._iou(boxes[0, i], boxes[0, j]) < 0.3 for j in selected):
+                selected.append(i)
+
+        faces = []
+        for i in selected:
+            x1, y1, x2, y2 = np.clip(boxes[0, i], 0.0, 1.0)
+            box = (int(x1 * img.width), int(y1 * img.height), int(x2 * img.width), int(y2 * img.height))
+            if box[2] > box[0] and box[3] > box[1]:
+                faces.append((float(confidences[i]), box))
+        return faces
+
+    @staticmethod
+    def _iou(a, b) -> float:
+        x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+        x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+        inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+        union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+        return float(inter / union) if union > 0 else 0.0
+
+
+class EmotionRouter(EmotionBackend):
+    """
+    Elige el detector según `mode`:
+
+      - `rekognition`: solo AWS (comportamiento por defecto);
+      - `local`: solo el backend local (sin él, `EmotionBackendUnavailableError`);
+      - `local_first`: primero el local y, si no está disponible, falla o no
+        encuentra un rostro, Rekognition;
+      - `shadow`: responde Rekognition y el local se ejecuta en segundo plano
+        para medir latencia y coincidencia de la emoción dominante antes de
+        activarlo.
+
+    El resultado lleva `backend` con el nombre del detector que lo produjo.
+    """
+
+    name = 'router'
+    MODES = ('rekognition', 'local', 'local_first', 'shadow')
+
+    def __init__(self, remote: EmotionBackend, local: Optional[EmotionBackend] = None, mode: str = 'rekognition'):
+        if mode not in self.MODES:
+            logger.warning(f"⚠ EMOTION_BACKEND desconocido '{mode}', se usa 'rekognition'")
+            mode = 'rekognition'
+        self.remote = remote
+        self.local = local
+        self.mode = mode
+        self._shadow_executor: Optional[ThreadPoolExecutor] = None
+        self._shadow_slot = threading.Semaphore(1)
+        self._lock = threading.Lock()
+        self.counters = {'local': 0, 'remote': 0, 'fallbacks': 0, 'shadow_runs': 0, 'shadow_agree': 0, 'shadow_skipped': 0}
+        self._latency = {'local': 0.0, 'remote': 0.0, 'shadow': 0.0}
+
+    @classmethod
+    def from_env(cls) -> "EmotionRouter":
+        return cls(
+            remote=RekognitionBackend(),
+            local=OnnxEmotionBackend.from_env(),
+            mode=os.getenv('EMOTION_BACKEND', 'rekognition').lower()
+        )
+
+    def _count(self, key: str, elapsed: Optional[float] = None, latency_key: Optional[str] = None):
+        with self._lock:
+            self.counters[key] += 1
+            if elapsed is not None:
+                self._latency[latency_key or key] += elapsed
+
+    def _run(self, backend: EmotionBackend, key: str, image_bytes: bytes) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = backend.detect_faces_and_emotions(image_bytes)
+        self._count(key, time.perf_counter() - start)
+        result = dict(result or {'success': False, 'error': 'Sin resultado'})
+        result['backend'] = backend.name
+        return result
+
+    def detect_faces_and_emotions(self, image_bytes: bytes) -> Dict[str, Any]:
+        local_ready = self.local is not None and self.local.available
+
+        if self.mode == 'local':
+            if not local_ready:
+                raise EmotionBackendUnavailableError('El detector local de emociones no está disponible')
+            return self._run(self.local, 'local', image_bytes)
+
+        if self.mode == 'local_first' and local_ready:
+            try:
+                result = self._run(self.local, 'local', image_bytes)
+                if result.get('success'):
+                    return result
+                logger.info(f"↪️  Detector local sin resultado ({result.get('error')}), se usa Rekognition")
+            except Exception as e:
+                logger.warning(f"⚠ Detector local falló, se usa Rekognition: {e}")
+            self._count('fallbacks')
+
+        result = self._run(self.remote, 'remote', image_bytes)
+        if self.mode == 'shadow' and local_ready:
+            self._shadow(bytes(image_bytes), result)
+        return result
+
+    def _shadow(self, image_bytes: bytes, remote_result: Dict[str, Any]):
+        # Como mucho una inferencia en sombra a la vez: nunca compite con el tráfico real
+        if not self._shadow_slot.acquire(blocking=False):
+            self._count('shadow_skipped')
+            return
+        with self._lock:
+            if self._shadow_executor is None:
+                self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emotion-shadow")
+        future = self._shadow_executor.submit(self._compare, image_bytes, remote_result)
+        future.add_done_callback(lambda _: self._shadow_slot.release())
+
+    def _compare(self, image_bytes: bytes, remote_result: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            local_result = self.local.detect_faces_and_emotions(image_bytes)
+        except Exception as e:
+            logger.warning(f"⚠ Detector local (sombra) falló: {e}")
+            return
+        self._count('shadow_runs', time.perf_counter() - start, 'shadow')
+        local_type = ((local_result or {}).get('dominant_emotion') or {}).get('type')
+        remote_type = (remote_result.get('dominant_emotion') or {}).get('type')
+        if local_type == remote_type:
+            self._count('shadow_agree')
+        logger.info(f"👥 Sombra: Rekognition={remote_type} local={local_type}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            latency = dict(self._latency)
+        return {
+            'mode': self.mode,
+            'local_available': bool(self.local is not None and self.local.available),
+            **counters,
+            'avg_local_ms': round(latency['local'] / counters['local'] * 1000, 2) if counters['local'] else 0.0,
+            'avg_remote_ms': round(latency['remote'] / counters['remote'] * 1000, 2) if counters['remote'] else 0.0,
+            'avg_shadow_ms': round(latency['shadow'] / counters['shadow_runs'] * 1000, 2) if counters['shadow_runs'] else 0.0,
+            'shadow_agreement': round(counters['shadow_agree'] / counters['shadow_runs'], 3) if counters['shadow_runs'] else None
+        }
+
+
+# Instancia global (usada por EmotionController; EMOTION_BACKEND elige el modo)
+emotion_router = EmotionRouter.from_env()
@@ -0,0 +1,168 @@
+import io
+import os
+import copy
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("emotion_result_cache")
+
+
+class Fingerprint(NamedTuple):
+    """Claves de una imagen: hash exacto del contenido y hash perceptual (si se pudo decodificar)."""
+    sha256: str
+    phash: Optional[int]
+    scope: Optional[str]
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Matriz de la DCT-II ortonormal de tamaño n."""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    m[0] /= np.sqrt(2)
+    return m
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def perceptual_hash(image_bytes: bytes) -> Optional[int]:
+    """
+    pHash de 64 bits: DCT de la imagen en gris a 32x32, bloque 8x8 de bajas
+    frecuencias y umbral en la mediana. Sobrevive a recompresión, cambios de
+    tamaño y pequeños ajustes de color. None si la imagen no se decodifica.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img.draft('L', (64, 64))  # JPEG: decodifica ya reducido
+            img = ImageOps.exif_transpose(img).convert('L').resize((32, 32), Image.LANCZOS)
+            pixels = np.asarray(img, dtype=np.float64)
+    except Exception:
+        return None
+
+    dct = _DCT_32 @ pixels @ _DCT_32.T
+    block = dct[:8, :8].flatten()
+    bits = block > np.median(block[1:])
+    return int(''.join('1' if b else '0' for b in bits), 2)
+
+
+class EmotionResultCache:
+    """
+    Caché de resultados de Rekognition para fotos repetidas.
+
+    Los usuarios vuelven a subir el mismo selfie o reintentan tras un error de
+    red, y cada subida es una llamada de pago a `detect_faces`. Se busca:
+
+      1. por hash exacto (SHA-256) del contenido, entre todos los usuarios;
+      2. por hash perceptual, solo entre las fotos del mismo usuario y con una
+         distancia de Hamming <= `phash_threshold` (0 lo desactiva).
+
+    Solo se guarda el resultado derivado (emociones, detalles del rostro) y los
+    hashes, nunca la imagen. Entradas con TTL y expulsión LRU.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, phash_threshold: int = 4, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.phash_threshold = phash_threshold
+        self.enabled = enabled
+        # sha256 -> (expira_en, phash, scope, resultado)
+        self._entries: "OrderedDict[str, Tuple[float, Optional[int], Optional[str], Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "EmotionResultCache":
+        return cls(
+            max_entries=int(os.getenv('EMOTION_CACHE_MAX_ENTRIES', 1024)),
+            ttl=float(os.getenv('EMOTION_CACHE_TTL', 3600)),
+            phash_threshold=int(os.getenv('EMOTION_CACHE_PHASH_THRESHOLD', 4)),
+            enabled=os.getenv('EMOTION_CACHE', 'true').lower() in ('1', 'true', 'yes')
+        )
+
+    def lookup(self, image_bytes: bytes, scope: Optional[str] = None) -> Tuple[Optional[Dict], Optional[Fingerprint]]:
+        """
+        Devuelve (resultado en caché o None, huella de la imagen para `store`).
+
+        El hash exacto se comprueba antes de decodificar la imagen: un reintento
+        con los mismos bytes no paga el hash perceptual.
+        """
+        if not self.enabled:
+            return None, None
+        sha = hashlib.sha256(image_bytes).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(sha)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(sha)
+                self.exact_hits += 1
+                logger.info("♻️  Análisis servido desde caché (hash exacto)")
+                return copy.deepcopy(entry[3]), Fingerprint(sha, entry[1], scope)
+
+        phash = perceptual_hash(image_bytes) if self.phash_threshold > 0 else None
+        fingerprint = Fingerprint(sha, phash, scope)
+        if phash is not None and scope is not None:
+            with self._lock:
+                match = self._closest(phash, scope, now)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.perceptual_hits += 1
+                    logger.info("♻️  Análisis servido desde caché (hash perceptual)")
+                    return copy.deepcopy(self._entries[match][3]), fingerprint
+        with self._lock:
+            self.misses += 1
+        return None, fingerprint
+
+    def _closest(self, phash: int, scope: str, now: float) -> Optional[str]:
+        best, best_distance = None, self.phash_threshold + 1
+        for sha, (expires_at, other, other_scope, _) in self._entries.items():
+            if other is None or other_scope != scope or expires_at <= now:
+                continue
+            distance = bin(phash ^ other).count('1')
+            if distance < best_distance:
+                best, best_distance = sha, distance
+        return best
+
+    def store(self, fingerprint: Optional[Fingerprint], result: Dict[str, Any]):
+        """Guarda un resultado correcto; los errores de Rekognition no se cachean."""
+        if not self.enabled or fingerprint is None or not result or not result.get('success'):
+            return
+        with self._lock:
+            self._entries[fingerprint.sha256] = (
+                time.time() + self.ttl, fingerprint.phash, fingerprint.scope, copy.deepcopy(result)
+            )
+            self._entries.move_to_end(fingerprint.sha256)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'exact_hits': self.exact_hits,
+                'perceptual_hits': self.perceptual_hits,
+                'misses': self.misses
+            }
+
+
+# Instancia global (usada por EmotionController delante de Rekognition)
+emotion_result_cache = EmotionResultCache.from_env()
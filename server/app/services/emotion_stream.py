@@ -0,0 +1,217 @@
+import io
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("emotion_stream")
+
+
+class FrameGate:
+    """
+    Decide qué fotogramas de la cámara se analizan.
+
+    Un fotograma pasa si ha transcurrido al menos `min_interval` desde el
+    último analizado y, además, la imagen ha cambiado (diferencia media
+    absoluta de una miniatura en gris de 32x32 >= `diff_threshold`, en 0-255)
+    o han pasado `max_interval` segundos (muestra de control aunque la escena
+    esté quieta). Los fotogramas casi idénticos no llegan al detector.
+    """
+
+    THUMBNAIL = 32
+
+    def __init__(self, min_interval: float = 0.5, max_interval: float = 5.0, diff_threshold: float = 8.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.diff_threshold = diff_threshold
+        self._last_at: Optional[float] = None
+        self._last_thumbnail: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_env(cls) -> "FrameGate":
+        return cls(
+            min_interval=float(os.getenv('EMOTION_STREAM_MIN_INTERVAL_MS', 500)) / 1000,
+            max_interval=float(os.getenv('EMOTION_STREAM_MAX_INTERVAL_MS', 5000)) / 1000,
+            diff_threshold=float(os.getenv('EMOTION_STREAM_DIFF_THRESHOLD', 8.0))
+        )
+
+    def _thumbnail(self, frame: bytes) -> Optional[np.ndarray]:
+        try:
+            from PIL import Image
+        except ImportError:
+            return None
+        try:
+            with Image.open(io.BytesIO(frame)) as img:
+                img.draft('L', (self.THUMBNAIL * 2, self.THUMBNAIL * 2))  # JPEG: decodifica ya reducido
+                small = img.convert('L').resize((self.THUMBNAIL, self.THUMBNAIL))
+                return np.asarray(small, dtype=np.float32)
+        except Exception:
+            return None
+
+    def check(self, frame: bytes, now: Optional[float] = None) -> Tuple[bool, str]:
+        """Devuelve (analizar, motivo). El fotograma aceptado pasa a ser la referencia."""
+        now = time.monotonic() if now is None else now
+        if self._last_at is not None and now - self._last_at < self.min_interval:
+            return False, 'interval'
+
+        thumbnail = self._thumbnail(frame)
+        if thumbnail is None:
+            return False, 'invalid'
+
+        if self._last_thumbnail is None:
+            reason = 'first'
+        elif now - self._last_at >= self.max_interval:
+            reason = 'heartbeat'
+        elif float(np.abs(thumbnail - self._last_thumbnail).mean()) >= self.diff_threshold:
+            reason = 'changed'
+        else:
+            return False, 'unchanged'
+
+        self._last_at = now
+        self._last_thumbnail = thumbnail
+        return True, reason
+
+
+class EmotionSmoother:
+    """Media móvil exponencial del vector de emociones (`alpha` = peso del fotograma nuevo)."""
+
+    def __init__(self, alpha: float = 0.4):
+        self.alpha = min(max(alpha, 0.0), 1.0)
+        self.vector: Dict[str, float] = {}
+
+    def update(self, emotions: Dict[str, float]) -> Dict[str, float]:
+        if not self.vector:
+            self.vector = {k: float(v) for k, v in emotions.items()}
+        else:
+            keys = set(self.vector) | set(emotions)
+            self.vector = {
+                k: (1 - self.alpha) * self.vector.get(k, 0.0) + self.alpha * float(emotions.get(k, 0.0))
+                for k in keys
+            }
+        return self.vector
+
+    def dominant(self) -> Optional[Tuple[str, float]]:
+        if not self.vector:
+            return None
+        return max(self.vector.items(), key=lambda item: item[1])
+
+
+class EmotionStreamSession:
+    """
+    Estado de una sesión de cámara: filtra fotogramas con `FrameGate`, analiza
+    los aceptados con `detect` (el backend de emociones), suaviza el vector y
+    solo produce una actualización cuando cambia la emoción dominante suavizada.
+
+    Al terminar, `summary()` resume la sesión (media de las puntuaciones de los
+    fotogramas analizados, línea temporal de cambios y contadores) para
+    guardarla como un único análisis en el historial.
+    """
+
+    MAX_TIMELINE = 100
+
+    def __init__(
+        self,
+        detect: Callable[[bytes], Dict[str, Any]],
+        gate: Optional[FrameGate] = None,
+        smoother: Optional[EmotionSmoother] = None,
+        max_frame_bytes: int = 1024 * 1024
+    ):
+        self._detect = detect
+        self.gate = gate or FrameGate()
+        self.smoother = smoother or EmotionSmoother()
+        self.max_frame_bytes = max_frame_bytes
+        self.started_at = time.monotonic()
+        self.counters = {'received': 0, 'analyzed': 0, 'skipped': 0, 'no_face': 0, 'errors': 0}
+        self.timeline: List[Dict[str, Any]] = []
+        self._totals: Dict[str, float] = {}
+        self._dominant: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def drop(self, admitted: bool = False):
+        """
+        Fotograma descartado sin analizarlo: con un análisis en curso o, ya
+        admitido por `admit` (`admitted=True`, recibido ya contado), porque el
+        detector no tiene hueco.
+        """
+        if not admitted:
+            self._count('received')
+        self._count('skipped')
+
+    def process(self, frame: bytes) -> Optional[Dict[str, Any]]:
+        """Procesa un fotograma; devuelve la actualización a enviar al cliente o None."""
+        if not self.admit(frame):
+            return None
+        return self.analyze(frame)
+
+    def admit(self, frame: bytes) -> bool:
+        """Tamaño y `FrameGate` (decodificar y comparar: solo CPU); True si hay que analizarlo."""
+        self._count('received')
+        if len(frame) > self.max_frame_bytes:
+            self._count('skipped')
+            return False
+        accepted, _ = self.gate.check(frame)
+        if not accepted:
+            self._count('skipped')
+            return False
+        return True
+
+    def analyze(self, frame: bytes) -> Optional[Dict[str, Any]]:
+        """Analiza un fotograma ya admitido con el detector; devuelve la actualización o None."""
+        try:
+            result = self._detect(frame) or {}
+        except Exception as e:
+            logger.warning(f"⚠ Error analizando fotograma: {e}")
+            self._count('errors')
+            return None
+        if not result.get('success'):
+            self._count('no_face')
+            return None
+
+        self._count('analyzed')
+        raw = result.get('all_emotions') or {}
+        # El resumen promedia las puntuaciones de cada fotograma; el suavizado solo decide qué se envía
+        for k, v in raw.items():
+            self._totals[k] = self._totals.get(k, 0.0) + float(v)
+        vector = self.smoother.update(raw)
+
+        emotion, confidence = self.smoother.dominant()
+        if emotion == self._dominant:
+            return None
+        self._dominant = emotion
+        elapsed = round(time.monotonic() - self.started_at, 2)
+        if len(self.timeline) < self.MAX_TIMELINE:
+            self.timeline.append({'t': elapsed, 'emotion': emotion, 'confidence': round(confidence, 2)})
+        return {
+            'type': 'emotion',
+            'dominant_emotion': {'type': emotion, 'confidence': round(confidence, 2)},
+            'all_emotions': {k: round(v, 2) for k, v in vector.items()},
+            'frame': self.counters['received'],
+            't': elapsed
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """Resumen de la sesión, o None si no se analizó ningún fotograma con rostro."""
+        analyzed = self.counters['analyzed']
+        if not analyzed:
+            return None
+        average = {k: round(v / analyzed, 2) for k, v in self._totals.items()}
+        emotion, confidence = max(average.items(), key=lambda item: item[1])
+        return {
+            'dominant_emotion': emotion,
+            'confidence': confidence,
+            'all_emotions': average,
+            'duration_s': round(time.monotonic() - self.started_at, 2),
+            'frames': self.stats(),
+            'timeline': list(self.timeline)
+        }
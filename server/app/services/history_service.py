@@ -50,6 +50,46 @@ class HistoryService:
                 detail="Error al guardar el análisis"
             )
     
+    @staticmethod
+    def create_emotion_analyses(
+        user_id: str,
+        analyses: List[EmotionAnalysisCreate],
+        db: Session
+    ) -> List[Any]:
+        """
+        Crea varios análisis en una sola transacción (importación de galería).
+        Devuelve los IDs en el mismo orden; si falla, no se guarda ninguno.
+        """
+        if not analyses:
+            return []
+        try:
+            new_analyses = [
+                EmotionAnalysis(
+                    user_id=user_id,
+                    dominant_emotion=data.dominant_emotion,
+                    confidence=data.confidence,
+                    emotion_details=data.emotion_details,
+                    photo_metadata=data.photo_metadata
+                )
+                for data in analyses
+            ]
+            
+            db.add_all(new_analyses)
+            db.flush()  # Asigna los IDs antes del commit (que expira los objetos)
+            ids = [analysis.id for analysis in new_analyses]
+            db.commit()
+            
+            logger.info(f"{len(ids)} análisis creados en lote para usuario {user_id}")
+            return ids
+            
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error al crear análisis en lote: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error al guardar los análisis"
+            )
+    
     @staticmethod
     def get_user_analyses(
         user_id: str,
@@ -0,0 +1,113 @@
+import io
+import os
+import time
+import logging
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger("image_preprocessing")
+
+
+class ImagePreprocessor:
+    """
+    Reduce las fotos antes de enviarlas a Rekognition.
+
+    Las fotos de móvil pesan 3-5 MB, pero para detectar la emoción de una cara
+    bastan unos cientos de píxeles de lado. La imagen se decodifica, se orienta
+    según su EXIF, se reduce a `max_dimension` píxeles en su lado mayor y se
+    recodifica como JPEG con calidad `quality`.
+
+    No se hace nada si la imagen ya es pequeña (dimensiones y peso), y nunca se
+    devuelve un resultado más pesado que el original. Si Pillow no está
+    instalado o la imagen no se puede decodificar, se envían los bytes tal cual.
+    """
+
+    # EXIF: orientación distinta de 1 obliga a rotar aunque la imagen sea pequeña
+    EXIF_ORIENTATION_TAG = 0x0112
+
+    def __init__(
+        self,
+        max_dimension: int = 1280,
+        quality: int = 85,
+        skip_bytes: int = 300 * 1024,
+        enabled: bool = True
+    ):
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.skip_bytes = skip_bytes
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls) -> "ImagePreprocessor":
+        return cls(
+            max_dimension=int(os.getenv('IMAGE_MAX_DIMENSION', 1280)),
+            quality=int(os.getenv('IMAGE_JPEG_QUALITY', 85)),
+            skip_bytes=int(os.getenv('IMAGE_PREPROCESS_SKIP_BYTES', 300 * 1024)),
+            enabled=os.getenv('IMAGE_PREPROCESS', 'true').lower() in ('1', 'true', 'yes')
+        )
+
+    def process(self, image_bytes: bytes) -> Tuple[bytes, Dict[str, Any]]:
+        """Devuelve (bytes a enviar, metadatos del preprocesado)."""
+        start = time.perf_counter()
+        info: Dict[str, Any] = {'original_bytes': len(image_bytes), 'bytes': len(image_bytes), 'processed': False}
+        if not self.enabled:
+            return image_bytes, info
+
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            logger.warning("⚠ Pillow no instalado: las imágenes se envían sin reducir")
+            return image_bytes, info
+
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as img:
+                info['original_size'] = list(img.size)
+                oriented = img.getexif().get(self.EXIF_ORIENTATION_TAG, 1) not in (1, None)
+                if (
+                    max(img.size) <= self.max_dimension
+                    and len(image_bytes) <= self.skip_bytes
+                    and not oriented
+                ):
+                    return image_bytes, info
+
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail((self.max_dimension, self.max_dimension), Image.LANCZOS)
+                img = self._to_rgb(img, Image)
+
+                out = io.BytesIO()
+                img.save(out, format='JPEG', quality=self.quality, optimize=True)
+                processed = out.getvalue()
+                size = list(img.size)
+        except Exception as e:
+            logger.warning(f"⚠ No se pudo preprocesar la imagen: {e}")
+            return image_bytes, info
+
+        if len(processed) >= len(image_bytes) and not oriented:
+            return image_bytes, info
+
+        info.update({
+            'bytes': len(processed),
+            'size': size,
+            'processed': True,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+        })
+        logger.info(
+            f"🖼️  Imagen reducida {info['original_size']} -> {size}: "
+            f"{len(image_bytes) // 1024} KB -> {len(processed) // 1024} KB"
+        )
+        return processed, info
+
+    @staticmethod
+    def _to_rgb(img, Image):
+        """JPEG no admite transparencia: se compone sobre fondo blanco."""
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            rgba = img.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.split()[-1])
+            return background
+        if img.mode != 'RGB':
+            return img.convert('RGB')
+        return img
+
+
+# Instancia global (usada por EmotionController antes de llamar a Rekognition)
+image_preprocessor = ImagePreprocessor.from_env()
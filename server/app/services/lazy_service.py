@@ -0,0 +1,109 @@
+"""
+Construcción perezosa de las instancias globales de servicios.
+
+Los módulos de servicios exponen un `LazyService` en lugar de instanciar el
+servicio al importarse: la instancia real se crea (una sola vez, de forma
+segura entre hilos) en el primer acceso a uno de sus atributos. Así importar
+un controlador no abre conexiones ni falla si un proveedor externo está caído.
+
+El calentamiento (construir y comprobar conectividad) se hace de forma
+opcional en el arranque con `warm_up_services()`, y su resultado queda
+disponible en `services_health()` para el endpoint /health/services.
+"""
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger("lazy_service")
+
+# Servicios registrados, por nombre
+_registry: Dict[str, "LazyService"] = {}
+
+
+class LazyService:
+    """Proxy que construye el servicio en el primer uso y delega en él."""
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        check: Optional[Callable[[Any], Any]] = None
+    ):
+        object.__setattr__(self, '_lazy_name', name)
+        object.__setattr__(self, '_lazy_factory', factory)
+        object.__setattr__(self, '_lazy_check', check)
+        object.__setattr__(self, '_lazy_instance', None)
+        object.__setattr__(self, '_lazy_lock', threading.Lock())
+        object.__setattr__(self, '_lazy_health', {'status': 'pending'})
+        _registry[name] = self
+
+    @property
+    def initialized(self) -> bool:
+        return self._lazy_instance is not None
+
+    def get(self) -> Any:
+        """Devuelve la instancia real, creándola si todavía no existe."""
+        instance = self._lazy_instance
+        if instance is not None:
+            return instance
+        with self._lazy_lock:
+            if self._lazy_instance is None:
+                object.__setattr__(self, '_lazy_instance', self._lazy_factory())
+                logger.info(f"✓ Servicio '{self._lazy_name}' inicializado")
+            return self._lazy_instance
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Construye el servicio y comprueba su conectividad (bloqueante)."""
+        start = time.time()
+        try:
+            instance = self.get()
+            if self._lazy_check is not None:
+                self._lazy_check(instance)
+            health = {'status': 'ok'}
+        except Exception as e:
+            logger.warning(f"⚠ Servicio '{self._lazy_name}' degradado: {e}")
+            health = {
+                'status': 'error' if self._lazy_instance is None else 'degraded',
+                'error': str(e)
+            }
+        health['latency_ms'] = round((time.time() - start) * 1000, 1)
+        health['checked_at'] = time.time()
+        object.__setattr__(self, '_lazy_health', health)
+        return health
+
+    @property
+    def health(self) -> Dict[str, Any]:
+        return dict(self._lazy_health)
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.get(), item)
+
+    def __setattr__(self, key: str, value: Any):
+        setattr(self.get(), key, value)
+
+    def __repr__(self) -> str:
+        state = 'inicializado' if self.initialized else 'pendiente'
+        return f"<LazyService {self._lazy_name} ({state})>"
+
+
+async def warm_up_services(names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Calienta los servicios registrados en paralelo sin bloquear el event loop.
+
+    Los fallos no se propagan: quedan registrados en `services_health()`.
+    """
+    selected = [_registry[n] for n in (names or list(_registry)) if n in _registry]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(service.warm_up) for service in selected)
+    )
+    report = {service._lazy_name: health for service, health in zip(selected, results)}
+    ok = sum(1 for h in report.values() if h['status'] == 'ok')
+    logger.info(f"🔥 Warm-up de servicios: {ok}/{len(report)} OK")
+    return report
+
+
+def services_health() -> Dict[str, Dict[str, Any]]:
+    """Último estado conocido de cada servicio registrado."""
+    return {name: service.health for name, service in _registry.items()}
@@ -0,0 +1,159 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("recommendation_prefetch")
+
+
+class RecommendationPrefetcher:
+    """
+    Prefetch especulativo de recomendaciones tras un análisis de emociones.
+
+    Después de `/api/emotions/analyze` el cliente casi siempre pide
+    `/api/music/recommendations/{emoción dominante}`. Al guardar el análisis se
+    lanzan esas recomendaciones en segundo plano y el resultado queda en una
+    caché corta por usuario (una entrada por usuario: la del último análisis).
+    El endpoint de música la consulta primero; si el prefetch sigue en curso,
+    espera a ese trabajo en lugar de repetirlo.
+
+    Las entradas son de un solo uso: una segunda petición vuelve al camino
+    normal y obtiene una selección diversificada nueva.
+
+    La espera a un prefetch en curso es corta: si no termina a tiempo, el
+    camino normal se une al mismo cálculo del pool de candidatos, así que
+    esperar más aquí no ahorra trabajo y solo retrasa la respuesta.
+    """
+
+    # Con plazo de la petición, fracción que se puede esperar al prefetch
+    DEADLINE_SHARE = 0.5
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[str, int], Dict[str, Any]]] = None,
+        ttl: float = 120,
+        limit: int = 20,
+        max_users: int = 1000,
+        max_workers: int = 2,
+        wait_timeout: float = 2.0
+    ):
+        self._loader = loader
+        self.ttl = ttl
+        self.limit = limit
+        self.max_users = max_users
+        self.wait_timeout = wait_timeout
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # user_id -> (emoción, límite, creado_en, futuro)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "RecommendationPrefetcher":
+        return cls(
+            ttl=float(os.getenv('RECOMMENDATIONS_PREFETCH_TTL', 120)),
+            limit=int(os.getenv('RECOMMENDATIONS_PREFETCH_LIMIT', 20)),
+            max_users=int(os.getenv('RECOMMENDATIONS_PREFETCH_MAX_USERS', 1000)),
+            wait_timeout=float(os.getenv('RECOMMENDATIONS_PREFETCH_WAIT_MS', 2000)) / 1000
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return os.getenv('RECOMMENDATIONS_PREFETCH', 'true').lower() in ('1', 'true', 'yes')
+
+    def _load(self, emotion: str, limit: int) -> Dict[str, Any]:
+        if self._loader is None:
+            from app.services.spotify_service import spotify_service
+            return spotify_service.get_recommendations(emotion, limit)
+        return self._loader(emotion, limit)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers,
+                        thread_name_prefix="recommendation-prefetch"
+                    )
+        return self._executor
+
+    def schedule(self, user_id: str, emotion: str, limit: Optional[int] = None) -> Optional[Future]:
+        """Lanza en segundo plano las recomendaciones de `emotion` para el usuario."""
+        if not self.enabled or not user_id:
+            return None
+        emotion = emotion.upper()
+        limit = limit or self.limit
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] == emotion and entry[1] >= limit and not self._expired(entry):
+                return entry[3]
+
+        future = self._get_executor().submit(self._load, emotion, limit)
+        with self._lock:
+            self._entries[user_id] = (emotion, limit, time.time(), future)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        logger.info(f"🔮 Prefetch de recomendaciones '{emotion}' para el usuario {user_id}")
+        return future
+
+    def take(self, user_id: str, emotion: str, limit: int, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve (y consume) las recomendaciones precalculadas, o None.
+
+        Solo sirve si coinciden usuario y emoción, no ha vencido el TTL y el
+        prefetch pidió al menos `limit` tracks. Si aún está en curso se espera
+        como mucho `wait_timeout` segundos y, si la petición tiene un plazo
+        `deadline` (segundos), no más de `DEADLINE_SHARE` de él: el resto queda
+        para el camino normal.
+        """
+        emotion = emotion.upper()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if not entry or entry[0] != emotion or entry[1] < limit or self._expired(entry):
+                self.misses += 1
+                return None
+            del self._entries[user_id]
+
+        try:
+            result = entry[3].result(timeout=self._wait_for(deadline))
+        except FutureTimeoutError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"⚠ Prefetch de '{emotion}' falló: {e}")
+            self.misses += 1
+            return None
+
+        if not result or not result.get('success'):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        result = dict(result)
+        result['tracks'] = result.get('tracks', [])[:limit]
+        result['total'] = len(result['tracks'])
+        return result
+
+    def _wait_for(self, deadline: Optional[float]) -> float:
+        if deadline is None:
+            return self.wait_timeout
+        return min(self.wait_timeout, deadline * self.DEADLINE_SHARE)
+
+    def _expired(self, entry: tuple) -> bool:
+        return time.time() - entry[2] >= self.ttl
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Instancia global (compartida por EmotionController y MusicController)
+recommendation_prefetcher = RecommendationPrefetcher.from_env()
@@ -5,6 +5,8 @@ from dotenv import load_dotenv
 from typing import Dict, List, Optional
 import logging
 
+from app.services.lazy_service import LazyService
+
 load_dotenv()
 
 # Configurar logging
@@ -149,5 +151,5 @@ class RekognitionService:
         
         return {'valid': True}
 
-# Instancia global del servicio
-rekognition_service = RekognitionService()
\ No newline at end of file
+# Instancia global del servicio (se construye en el primer uso)
+rekognition_service = LazyService('rekognition', RekognitionService)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List
+
+logger = logging.getLogger("single_flight")
+
+
+class SingleFlight:
+    """
+    Coalescencia de llamadas idénticas concurrentes (patrón single-flight).
+
+    Mientras una llamada para `key` está en curso, las demás llamadas con la
+    misma clave esperan su resultado en lugar de repetir el trabajo. Si la
+    llamada falla, todos los que esperaban reciben la misma excepción. Los
+    resultados no se guardan: al terminar, la siguiente llamada vuelve a
+    ejecutar `fn`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        future, leader = self._join(key)
+        if not leader:
+            logger.debug(f"🔗 Uniéndose a llamada en curso para {key!r}")
+            return future.result()
+        self._run(key, future, fn)
+        return future.result()
+
+    def start(self, key: Hashable, fn: Callable[[], Any], name: str = "single-flight") -> Future:
+        """
+        Como `do`, pero sin bloquear: devuelve el Future de la llamada en curso.
+
+        Si no hay ninguna, `fn` se lanza en un hilo propio. Quien solo quiera
+        esperar un tiempo acotado usa `future.result(timeout=...)`; la llamada
+        sigue en curso para los demás aunque ese plazo venza.
+        """
+        future, leader = self._join(key)
+        if leader:
+            threading.Thread(target=self._run, args=(key, future, fn), name=name, daemon=True).start()
+        return future
+
+    def do_many(
+        self,
+        keys: List[Hashable],
+        fn: Callable[[List[Hashable]], Dict[Hashable, Any]]
+    ) -> Dict[Hashable, Any]:
+        """
+        Variante de `do` para varias claves resueltas por una sola ejecución.
+
+        Las claves sin llamada en curso se reclaman y se resuelven juntas con
+        `fn(claves_reclamadas)`, que devuelve un dict clave -> resultado; las
+        que ya estaban en curso esperan a esa llamada. Devuelve los resultados
+        de todas las claves.
+        """
+        owned, futures = self._join_many(keys)
+        if owned:
+            self._run_many(owned, fn)
+        return {key: future.result() for key, future in futures.items()}
+
+    def start_many(
+        self,
+        keys: List[Hashable],
+        fn: Callable[[List[Hashable]], Dict[Hashable, Any]],
+        name: str = "single-flight"
+    ) -> Dict[Hashable, Future]:
+        """Como `do_many`, pero sin bloquear: devuelve el Future de cada clave."""
+        owned, futures = self._join_many(keys)
+        if owned:
+            threading.Thread(target=self._run_many, args=(owned, fn), name=name, daemon=True).start()
+        return futures
+
+    def _join_many(self, keys: List[Hashable]):
+        owned: Dict[Hashable, Future] = {}
+        futures: Dict[Hashable, Future] = {}
+        for key in dict.fromkeys(keys):
+            future, leader = self._join(key)
+            futures[key] = future
+            if leader:
+                owned[key] = future
+        return owned, futures
+
+    def _run_many(self, owned: Dict[Hashable, Future], fn: Callable[[List[Hashable]], Dict[Hashable, Any]]):
+        try:
+            results = fn(list(owned))
+        except BaseException as e:
+            for key, future in owned.items():
+                self._settle(key, future, error=e)
+            return
+        for key, future in owned.items():
+            if key in results:
+                self._settle(key, future, result=results[key])
+            else:
+                self._settle(key, future, error=KeyError(key))
+
+    def _join(self, key: Hashable):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.executed += 1
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[[], Any]):
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+        else:
+            self._settle(key, future, result=result)
+
+    def _settle(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None):
+        # La clave deja de estar en curso antes de que los que esperan reciban el resultado
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'shared': self.shared
+            }
@@ -10,6 +10,9 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app.models.user import User
+from app.services.spotify_rate_limiter import spotify_rate_limiter
+from app.services.spotify_http import spotify_http
+from app.services.lazy_service import LazyService
 from app.utils.security import create_access_token
 from dotenv import load_dotenv
 
@@ -98,7 +101,7 @@ class SpotifyAuthService:
         }
 
         try:
-            response = requests.post(self.SPOTIFY_TOKEN_URL, data=data, timeout=10)
+            response = spotify_rate_limiter.call(spotify_http.post, self.SPOTIFY_TOKEN_URL, data=data, timeout=10)
             response.raise_for_status()
             token_data = response.json()
 
@@ -130,7 +133,7 @@ class SpotifyAuthService:
         }
 
         try:
-            response = requests.post(self.SPOTIFY_TOKEN_URL, data=data, timeout=10)
+            response = spotify_rate_limiter.call(spotify_http.post, self.SPOTIFY_TOKEN_URL, data=data, timeout=10)
             response.raise_for_status()
             token_data = response.json()
 
@@ -157,7 +160,8 @@ class SpotifyAuthService:
         headers = {"Authorization": f"Bearer {access_token}"}
 
         try:
-            response = requests.get(
+            response = spotify_rate_limiter.call(
+                spotify_http.get,
                 f"{self.SPOTIFY_API_URL}/me",
                 headers=headers,
                 timeout=10
@@ -402,5 +406,5 @@ class SpotifyAuthService:
         return create_access_token(token_data)
 
 
-# Instancia global
-spotify_auth_service = SpotifyAuthService()
+# Instancia global (se construye en el primer uso)
+spotify_auth_service = LazyService('spotify_auth', SpotifyAuthService)
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.services.track_record import track_json_default, track_json_hook
+
+logger = logging.getLogger("spotify_cache")
+
+
+class SpotifyResponseCache:
+    """
+    Caché de respuestas de Spotify con TTL por endpoint y expulsión LRU.
+
+    Las claves son (endpoint, query, market, limit). El nivel en memoria está
+    acotado a `max_entries`; opcionalmente se respalda en un archivo SQLite
+    para que un reinicio del servidor no empiece en frío.
+
+    La memoria y SQLite tienen cerrojos distintos: un acierto en memoria nunca
+    espera a una lectura o escritura en disco.
+    """
+
+    # TTL en segundos por endpoint (el espacio de consultas es pequeño y estable)
+    DEFAULT_TTLS = {
+        'search_tracks': 6 * 3600,
+        'search_playlists': 12 * 3600,
+        'playlist_items': 6 * 3600,
+        'artist_top_tracks': 24 * 3600,
+    }
+    FALLBACK_TTL = 3600
+    DEFAULT_MAX_ENTRIES = 2048
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttls: Optional[Dict[str, int]] = None,
+        db_path: Optional[str] = None
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._open_db(db_path)
+
+    @classmethod
+    def from_env(cls) -> "SpotifyResponseCache":
+        """Crea la caché a partir de SPOTIFY_CACHE_MAX_ENTRIES y SPOTIFY_CACHE_DB."""
+        return cls(
+            max_entries=int(os.getenv('SPOTIFY_CACHE_MAX_ENTRIES', cls.DEFAULT_MAX_ENTRIES)),
+            db_path=os.getenv('SPOTIFY_CACHE_DB') or None
+        )
+
+    def _open_db(self, db_path: str):
+        """Abre (o crea) el nivel persistente; si falla, se sigue solo en memoria."""
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS spotify_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM spotify_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+            logger.info(f"✓ Caché de Spotify persistente en {db_path}")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠ No se pudo abrir la caché SQLite ({db_path}): {e}")
+            self._db = None
+
+    @staticmethod
+    def make_key(endpoint: str, query: str, market: Optional[str] = None, limit: Optional[int] = None) -> str:
+        return json.dumps([endpoint, query, market, limit], ensure_ascii=False)
+
+    def ttl_for(self, endpoint: str) -> int:
+        return self.ttls.get(endpoint, self.FALLBACK_TTL)
+
+    def get(self, endpoint: str, query: str, market: Optional[str] = None, limit: Optional[int] = None) -> Optional[Any]:
+        """Devuelve el valor vigente o None si no está en caché."""
+        key = self.make_key(endpoint, query, market, limit)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        row = self._read_db(key, now) if self._db is not None else None
+        with self._lock:
+            if row is not None:
+                expires_at, value = row
+                self._store(key, expires_at, value)
+                self.hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def set(self, endpoint: str, query: str, market: Optional[str], limit: Optional[int], value: Any):
+        """Guarda un valor con el TTL de su endpoint."""
+        key = self.make_key(endpoint, query, market, limit)
+        expires_at = time.time() + self.ttl_for(endpoint)
+
+        with self._lock:
+            self._store(key, expires_at, value)
+        if self._db is not None:
+            self._write_db(key, expires_at, value)
+
+    def get_or_fetch(
+        self,
+        endpoint: str,
+        query: str,
+        market: Optional[str],
+        limit: Optional[int],
+        fetch: Callable[[], Any]
+    ) -> Any:
+        """
+        Devuelve el valor en caché o lo obtiene con `fetch` y lo guarda.
+
+        Si `fetch` lanza una excepción no se guarda nada (los errores no se cachean).
+        """
+        value = self.get(endpoint, query, market, limit)
+        if value is not None:
+            return value
+        value = fetch()
+        self.set(endpoint, query, market, limit, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            try:
+                with self._db_lock:
+                    self._db.execute("DELETE FROM spotify_cache")
+                    self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠ Error limpiando caché SQLite: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'persistent': self._db is not None
+        }
+
+    # Se llama con self._lock tomado
+
+    def _store(self, key: str, expires_at: float, value: Any):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # Acceso a SQLite: solo con self._db_lock (la conexión se comparte entre hilos)
+
+    def _read_db(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM spotify_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"Error leyendo caché SQLite: {e}")
+            return None
+        if row is None or row[1] <= now:
+            return None
+        try:
+            return row[1], json.loads(row[0], object_hook=track_json_hook)
+        except ValueError:
+            return None
+
+    def _write_db(self, key: str, expires_at: float, value: Any):
+        try:
+            payload = json.dumps(value, default=track_json_default)
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO spotify_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                self._db.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.debug(f"Error escribiendo caché SQLite: {e}")
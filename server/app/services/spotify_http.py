@@ -0,0 +1,113 @@
+import os
+import logging
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("spotify_http")
+
+
+class SpotifyHttpClient:
+    """
+    Cliente HTTP compartido para la Web API y el servicio de cuentas de Spotify.
+
+    Una sola `requests.Session` con pools de conexiones keep-alive por host
+    (api.spotify.com, accounts.spotify.com): las llamadas consecutivas, como
+    los lotes de 100 tracks al crear una playlist, reutilizan la conexión TLS
+    en lugar de abrir una nueva. Los pools de urllib3 son seguros entre hilos.
+
+    Reintentos:
+      - errores de conexión (la petición no llegó a enviarse): cualquier método;
+      - lecturas fallidas y 5xx: solo métodos idempotentes (GET, PUT, DELETE...).
+    Los 429 no se reintentan aquí: los gestiona el rate limiter compartido.
+    """
+
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        pool_block: bool = False,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SpotifyHttpClient":
+        return cls(
+            pool_connections=int(os.getenv('SPOTIFY_HTTP_POOL_CONNECTIONS', 4)),
+            pool_maxsize=int(os.getenv('SPOTIFY_HTTP_POOL_MAXSIZE', 16)),
+            pool_block=os.getenv('SPOTIFY_HTTP_POOL_BLOCK', 'false').lower() in ('1', 'true', 'yes'),
+            max_retries=int(os.getenv('SPOTIFY_HTTP_MAX_RETRIES', 3))
+        )
+
+    def build_retry(self) -> Retry:
+        return Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            allowed_methods=self.IDEMPOTENT_METHODS,
+            status_forcelist=self.RETRY_STATUSES,
+            respect_retry_after_header=False,
+            raise_on_status=False,
+            backoff_factor=self.backoff_factor
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        """Sesión compartida, creada bajo demanda."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    # pool_maxsize es el tope de conexiones abiertas por host;
+                    # con pool_block las peticiones esperan en lugar de abrir más
+                    adapter = HTTPAdapter(
+                        pool_connections=self.pool_connections,
+                        pool_maxsize=self.pool_maxsize,
+                        pool_block=self.pool_block,
+                        max_retries=self.build_retry()
+                    )
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    logger.info(
+                        f"🔌 Sesión HTTP de Spotify creada (pool {self.pool_maxsize} conexiones/host, "
+                        f"{self.max_retries} reintentos idempotentes)"
+                    )
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+# Instancia global (compartida por SpotifyUserService y SpotifyAuthService)
+spotify_http = SpotifyHttpClient.from_env()
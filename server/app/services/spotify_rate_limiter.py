@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("spotify_rate_limiter")
+
+
+class RateLimitTimeoutError(requests.exceptions.RequestException):
+    """No hay token del bucket dentro del plazo: la llamada se abandona en lugar de esperar."""
+
+
+class _MemoryState:
+    """Estado del bucket compartido entre los hilos del proceso."""
+
+    def __init__(self, initial: Dict[str, float]):
+        self._state = dict(initial)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, float]]:
+        with self._lock:
+            yield self._state
+
+
+class _FileState:
+    """
+    Estado del bucket en un archivo local con `flock`, compartido entre workers.
+
+    Si el archivo no se puede usar (otro sistema operativo, permisos), se
+    recurre al estado en memoria del proceso.
+    """
+
+    def __init__(self, path: str, initial: Dict[str, float]):
+        self.path = path
+        self._initial = dict(initial)
+        self._fallback = _MemoryState(initial)
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, float]]:
+        try:
+            import fcntl
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        except (ImportError, OSError) as e:
+            logger.warning(f"⚠ Rate limiter sin archivo compartido ({self.path}): {e}")
+            with self._fallback.transaction() as state:
+                yield state
+            return
+
+        with self._thread_lock:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.read(fd, 4096)
+                try:
+                    state = {**self._initial, **json.loads(raw)} if raw else dict(self._initial)
+                except ValueError:
+                    state = dict(self._initial)
+                yield state
+                data = json.dumps(state).encode()
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, data)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+class SpotifyRateLimiter:
+    """
+    Token bucket compartido para todas las llamadas salientes a Spotify.
+
+    - `rate` tokens por segundo con ráfagas de hasta `burst`.
+    - Un 429 bloquea a todos los llamadores durante el `Retry-After` recibido
+      (acotado a `max_retry_after`, o un backoff exponencial si no viene la
+      cabecera) y reduce el ritmo a la mitad; cada respuesta correcta lo
+      recupera poco a poco (AIMD).
+    - `call` espera un token como mucho `max_wait` segundos; si no lo
+      consigue, lanza `RateLimitTimeoutError` en lugar de bloquear al llamador.
+    - Con `state_file` el bucket se comparte entre workers del mismo host.
+    """
+
+    DEFAULT_RATE = 10.0
+    DEFAULT_BURST = 20
+    DEFAULT_MAX_RETRIES = 3
+    MIN_RATE = 0.5
+    MAX_WAIT_SECONDS = 60.0
+    DEFAULT_MAX_WAIT = 30.0
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        state_file: Optional[str] = None,
+        max_retry_after: float = MAX_WAIT_SECONDS,
+        max_wait: Optional[float] = DEFAULT_MAX_WAIT,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.time
+    ):
+        self.max_rate = float(rate)
+        self.burst = float(burst)
+        self.max_retries = max_retries
+        self.max_retry_after = float(max_retry_after)
+        self.max_wait = max_wait
+        self._sleep = sleep
+        self._clock = clock
+        initial = {
+            'tokens': self.burst,
+            'updated': clock(),
+            'rate': self.max_rate,
+            'blocked_until': 0.0
+        }
+        self._state = _FileState(state_file, initial) if state_file else _MemoryState(initial)
+
+    @classmethod
+    def from_env(cls) -> "SpotifyRateLimiter":
+        return cls(
+            rate=float(os.getenv('SPOTIFY_RATE_LIMIT', cls.DEFAULT_RATE)),
+            burst=int(os.getenv('SPOTIFY_RATE_BURST', cls.DEFAULT_BURST)),
+            max_retries=int(os.getenv('SPOTIFY_RATE_MAX_RETRIES', cls.DEFAULT_MAX_RETRIES)),
+            state_file=os.getenv('SPOTIFY_RATE_LIMIT_FILE') or None,
+            max_retry_after=float(os.getenv('SPOTIFY_RATE_MAX_RETRY_AFTER', cls.MAX_WAIT_SECONDS)),
+            max_wait=float(os.getenv('SPOTIFY_RATE_MAX_WAIT', cls.DEFAULT_MAX_WAIT)) or None
+        )
+
+    # ============ BUCKET ============
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Bloquea hasta obtener un token (o hasta que termine un bloqueo por 429).
+
+        Con `timeout`, lanza `RateLimitTimeoutError` si el token no llegaría a
+        tiempo, sin esperar a que venza el plazo.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._state.transaction() as state:
+                now = self._clock()
+                elapsed = max(0.0, now - state['updated'])
+                state['tokens'] = min(self.burst, state['tokens'] + elapsed * state['rate'])
+                state['updated'] = now
+
+                if state['blocked_until'] > now:
+                    wait = state['blocked_until'] - now
+                elif state['tokens'] >= 1:
+                    state['tokens'] -= 1
+                    return
+                else:
+                    wait = (1 - state['tokens']) / state['rate']
+
+            if deadline is not None and now + wait > deadline:
+                raise RateLimitTimeoutError(f"Sin token de Spotify en {timeout:.1f}s (espera estimada {wait:.1f}s)")
+            self._sleep(min(wait, self.MAX_WAIT_SECONDS))
+
+    def penalize(self, retry_after: float):
+        """Registra un 429: bloquea a todos (como mucho `max_retry_after`) y reduce el ritmo a la mitad."""
+        if retry_after > self.max_retry_after:
+            logger.warning(f"⚠ Retry-After de {retry_after:.0f}s acotado a {self.max_retry_after:.0f}s")
+            retry_after = self.max_retry_after
+        with self._state.transaction() as state:
+            now = self._clock()
+            state['blocked_until'] = max(state['blocked_until'], now + retry_after)
+            state['rate'] = max(self.MIN_RATE, state['rate'] / 2)
+            state['tokens'] = min(state['tokens'], 0.0)
+        logger.warning(f"⏳ Spotify 429: pausa de {retry_after:.1f}s para todas las llamadas")
+
+    def reward(self):
+        """Recupera el ritmo tras una respuesta correcta (incremento aditivo)."""
+        with self._state.transaction() as state:
+            if state['rate'] < self.max_rate:
+                state['rate'] = min(self.max_rate, state['rate'] + self.max_rate * 0.05)
+
+    @property
+    def current_rate(self) -> float:
+        with self._state.transaction() as state:
+            return state['rate']
+
+    # ============ LLAMADAS ============
+
+    @staticmethod
+    def _retry_after_from(headers: Any) -> Optional[float]:
+        if not headers:
+            return None
+        value = None
+        try:
+            value = headers.get('Retry-After') or headers.get('retry-after')
+        except AttributeError:
+            return None
+        try:
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.MAX_WAIT_SECONDS, (2 ** attempt) * (1 + random.random() * 0.25))
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Ejecuta `fn` (llamada de spotipy o de `requests`) respetando el bucket.
+
+        Reintenta los 429 hasta `max_retries` veces: tanto `SpotifyException`
+        con `http_status == 429` como respuestas de `requests` con ese status.
+        """
+        attempt = 0
+        while True:
+            self.acquire(self.max_wait)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if getattr(e, 'http_status', None) != 429 or attempt >= self.max_retries:
+                    raise
+                retry_after = self._retry_after_from(getattr(e, 'headers', None))
+            else:
+                if getattr(result, 'status_code', None) != 429:
+                    self.reward()
+                    return result
+                if attempt >= self.max_retries:
+                    return result  # el último 429 se devuelve sin recuperar el ritmo
+                retry_after = self._retry_after_from(getattr(result, 'headers', None))
+
+            self.penalize(retry_after if retry_after is not None else self._backoff(attempt))
+            attempt += 1
+
+
+def build_spotify_session() -> requests.Session:
+    """
+    Sesión HTTP para spotipy que solo reintenta errores de conexión.
+
+    Los 429 no se reintentan a ciegas dentro de urllib3: llegan como
+    `SpotifyException` (con su cabecera Retry-After) al rate limiter.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        connect=3,
+        read=False,
+        status=0,
+        status_forcelist=(),
+        respect_retry_after_header=False,
+        backoff_factor=0.3
+    )
+    adapter = HTTPAdapter(max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Instancia global (compartida por SpotifyService, SpotifyUserService y SpotifyAuthService)
+spotify_rate_limiter = SpotifyRateLimiter.from_env()
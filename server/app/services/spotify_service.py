@@ -2,14 +2,29 @@ import os
 import random
 import logging
 import time
-from typing import Dict, List, Optional, Any, Set
-from collections import defaultdict
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Any, Set
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 from spotipy.exceptions import SpotifyException
 from dotenv import load_dotenv
 
+from app.services.spotify_cache import SpotifyResponseCache
+from app.services.track_features_store import TrackFeaturesStore
+from app.services.artist_index import ArtistIndex
+from app.services.audio_features_vectors import compile_filters, features_to_array, feature_means
+from app.services.diversification import DiversityConfig, diversify
+from app.services.track_record import Track, ingest_tracks, track_id
+from app.services.collection_budget import CollectionBudget
+from app.services.spotify_rate_limiter import spotify_rate_limiter, build_spotify_session
+from app.services.spotify_token_store import SharedTokenCache, spotify_token_store
+from app.services.lazy_service import LazyService
+from app.services.single_flight import SingleFlight
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
@@ -77,29 +92,84 @@ class SpotifyService:
 
     DEFAULT_MARKETS = ['US', 'GB', 'ES', 'MX', 'AR', 'CO', 'BR', 'FR', 'DE']
 
-    def __init__(self, markets: Optional[List[str]] = None):
+    # Máximo de llamadas simultáneas a Spotify durante la recolección
+    MAX_CONCURRENCY = 8
+    _executor_lock = threading.Lock()
+
+    # Pools de candidatos pre-calentados por emoción (limit máximo 100 x 15)
+    POOL_TARGET_COUNT = 1500
+    POOL_LIMIT = 100  # mayor `limit` admitido por la API: el pool debe poder servirlo
+    POOL_TTL_SECONDS = 1800
+    # Tope de una construcción de pool: una búsqueda lenta no la retiene más
+    POOL_BUILD_TIMEOUT_SECONDS = 20
+
+    # Máximo de IDs por llamada a audio_features que admite Spotify
+    AUDIO_FEATURES_BATCH_SIZE = 100
+
+    def __init__(self, markets: Optional[List[str]] = None, max_concurrency: Optional[int] = None):
         client_id = os.getenv('SPOTIFY_CLIENT_ID')
         client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
         if not client_id or not client_secret:
             raise ValueError("SPOTIFY_CLIENT_ID / SPOTIFY_CLIENT_SECRET no definidos")
 
-        # Client Credentials (sin audio_features pero más simple)
+        # Client Credentials (sin audio_features pero más simple). El token se
+        # comparte entre workers y se renueva antes de vencer
+        self.token_cache = SharedTokenCache(spotify_token_store, client_id=client_id)
         self.auth_manager = SpotifyClientCredentials(
             client_id=client_id, 
-            client_secret=client_secret
+            client_secret=client_secret,
+            cache_handler=self.token_cache
         )
+        self.token_cache.bind(self.auth_manager)
         
+        # Los 429 no se reintentan dentro de spotipy: los gestiona el rate limiter compartido
+        self.rate_limiter = spotify_rate_limiter
         self.sp = spotipy.Spotify(
             auth_manager=self.auth_manager, 
             requests_timeout=15, 
-            retries=3
+            requests_session=build_spotify_session()
         )
         self.markets = markets or self.DEFAULT_MARKETS
         self._audio_features_available = False  # Marcado como False para Client Credentials
-        
-        # Test de conexión
+
+        # Pool acotado para lanzar las búsquedas en paralelo
+        self.max_concurrency = max(1, int(
+            max_concurrency or os.getenv('SPOTIFY_MAX_CONCURRENCY', self.MAX_CONCURRENCY)
+        ))
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Caché de respuestas (memoria + SQLite opcional)
+        self.cache = SpotifyResponseCache.from_env()
+
+        # Pools de candidatos: clave -> (construido_en, candidatos)
+        self.pool_ttl = float(os.getenv('SPOTIFY_POOL_TTL', self.POOL_TTL_SECONDS))
+        self.pool_build_timeout = float(os.getenv('SPOTIFY_POOL_BUILD_TIMEOUT', self.POOL_BUILD_TIMEOUT_SECONDS))
+        self._pools: Dict[tuple, tuple] = {}
+        self._pools_lock = threading.Lock()
+        self._refreshing: Set[tuple] = set()
+        self._refresher_stop = threading.Event()
+        self._refresher_thread: Optional[threading.Thread] = None
+
+        # Construcciones de pool en curso, compartidas entre peticiones idénticas
+        self._pool_flights = SingleFlight()
+        # Candidatos recibidos por cada construcción en curso (resultados parciales);
+        # la condición avisa a quien sigue una construcción de cada lote nuevo
+        self._pool_progress: Dict[tuple, List[Track]] = {}
+        self._pool_progress_changed = threading.Condition(self._pools_lock)
+
+        # Audio features compartidas por filtrado (paso 2) y análisis (paso 5)
+        self.features_store = TrackFeaturesStore.from_env()
+
+        # Objetivo MMR de la diversificación
+        self.diversity_config = DiversityConfig.from_env()
+
+        # Índice persistente nombre de artista -> ID (estrategia 3 sin búsquedas)
+        self.artist_index = ArtistIndex.from_env()
+
+    def check_connection(self):
+        """Test de conexión con Spotify (lo ejecuta el warm-up del arranque)."""
         try:
-            self.sp.search(q='test', type='track', limit=1)
+            self._call(self.sp.search, q='test', type='track', limit=1)
             logger.info("✓ SpotifyService conectado correctamente")
             logger.info("ℹ️  Usando Client Credentials (sin audio features)")
             logger.info("💡 Diversificación basada en artistas, álbumes y géneros")
@@ -111,7 +181,7 @@ class SpotifyService:
         """Verifica si audio_features está disponible con las credenciales actuales."""
         try:
             # Intentar con un track ID de prueba conocido (Blinding Lights - The Weeknd)
-            test_result = self.sp.audio_features(['0VjIjW4GlUZAMYd2vXMi3b'])
+            test_result = self._call(self.sp.audio_features, ['0VjIjW4GlUZAMYd2vXMi3b'])
             if test_result and test_result[0]:
                 self._audio_features_available = True
                 logger.info("✓ Audio features disponible")
@@ -135,12 +205,19 @@ class SpotifyService:
         emotion: str,
         limit: int = 20,
         preferred_genres: Optional[List[str]] = None,
-        markets: Optional[List[str]] = None
+        markets: Optional[List[str]] = None,
+        deadline_ms: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Obtiene recomendaciones diversificadas para una emoción.
+
+        Con `deadline_ms`, si el pool de la emoción no está listo se espera a
+        su construcción como mucho ese tiempo; al vencer se diversifica con los
+        candidatos que hayan llegado y la respuesta lleva `partial: True`. La
+        construcción sigue en segundo plano para las siguientes peticiones.
         """
         start = time.time()
+        deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms else None
         emotion = emotion.upper()
         
         if emotion not in self.EMOTION_DESCRIPTORS:
@@ -154,18 +231,370 @@ class SpotifyService:
         logger.info(f"🎵 Buscando {limit} canciones para '{emotion}'")
         logger.info(f"Géneros: {genres_to_use[:5]}...")
 
-        # 1) RECOLECCIÓN MASIVA Y DIVERSIFICADA
-        candidates = self._collect_diverse_candidates(
-            emotion=emotion,
-            genres=genres_to_use,
-            descriptors=descriptors,
-            markets=markets_to_use,
-            target_count=limit * 15  # Recolectar 15x más para diversificar
-        )
+        # 1) CANDIDATOS DESDE EL POOL PRE-CALENTADO DE LA EMOCIÓN
+        partial = False
+        if deadline is None:
+            candidates = self._get_candidate_pool(
+                emotion=emotion,
+                genres=genres_to_use,
+                descriptors=descriptors,
+                markets=markets_to_use
+            )
+        else:
+            candidates, partial = self._get_candidate_pool_until(
+                emotion, genres_to_use, descriptors, markets_to_use, deadline
+            )
+
+        logger.info(f"📊 {len(candidates)} candidatos únicos en el pool{' (parcial)' if partial else ''}")
+
+        # 2-4) FILTRADO, DIVERSIFICACIÓN Y PROCESADO
+        processed = self._select_tracks(candidates, filters, limit)
+
+        # 5) ANÁLISIS DE CARACTERÍSTICAS
+        avg_features = self._analyze_track_features([t['id'] for t in processed])
+
+        elapsed = time.time() - start
+        logger.info(f"✓ Completado en {elapsed:.2f}s")
+
+        return {
+            'success': True,
+            'emotion': emotion,
+            'tracks': processed,
+            'total': len(processed),
+            'genres_used': genres_to_use[:5],
+            'music_params': self._format_music_params(avg_features),
+            'partial': partial
+        }
+
+    def stream_recommendations(
+        self,
+        emotion: str,
+        limit: int = 20,
+        preferred_genres: Optional[List[str]] = None,
+        markets: Optional[List[str]] = None,
+        deadline_ms: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Variante en streaming de `get_recommendations`.
+
+        Genera frames `tracks` (cada uno reemplaza la selección anterior) a
+        medida que llegan candidatos, y termina con un frame `summary` con los
+        `music_params`. Si el pool de la emoción ya está caliente se emite un
+        único frame `tracks`; si no, el stream sigue la construcción compartida
+        del pool (la misma que esperan `get_recommendations` y los demás
+        streams de la clave) y refina la selección con su progreso.
+
+        Con `deadline_ms`, al vencer se cierra el stream con los candidatos
+        recibidos hasta entonces y el `summary` lleva `partial: True`; la
+        construcción sigue en segundo plano.
+        """
+        start = time.time()
+        deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+        emotion = emotion.upper()
+
+        if emotion not in self.EMOTION_DESCRIPTORS:
+            raise ValueError(f"Emoción desconocida: {emotion}")
+
+        descriptors = self.EMOTION_DESCRIPTORS[emotion]
+        filters = self.EMOTION_FEATURE_FILTERS.get(emotion, {})
+        markets_to_use = markets or self.markets
+        genres_to_use = preferred_genres or descriptors.get('genres', [])
+        key = self._pool_key(emotion, genres_to_use, markets_to_use)
+
+        with self._pools_lock:
+            entry = self._pools.get(key)
+
+        processed: List[Dict] = []
+        stage = 0
+        partial = False
+        if entry is not None:
+            candidates = self._get_candidate_pool(emotion, genres_to_use, descriptors, markets_to_use)
+            processed = self._select_tracks(candidates, filters, limit)
+            yield self._tracks_frame(stage, processed, len(candidates), final=True)
+        else:
+            build = self._start_pool_build(key, descriptors)
+            emitted_at = 0
+            for candidates in self._follow_pool_build(key, build, deadline):
+                # Refinar solo cuando los candidatos al menos se duplican
+                if len(candidates) >= max(1, emitted_at * 2):
+                    processed = self._select_tracks(candidates, filters, limit)
+                    yield self._tracks_frame(stage, processed, len(candidates), final=False)
+                    emitted_at = len(candidates)
+                    stage += 1
+
+            candidates, partial = self._wait_pool_build(key, build, deadline)
+            if emitted_at != len(candidates):
+                processed = self._select_tracks(candidates, filters, limit)
+            yield self._tracks_frame(stage, processed, len(candidates), final=True)
+
+        avg_features = self._analyze_track_features([t['id'] for t in processed])
+        logger.info(f"✓ Streaming completado en {time.time() - start:.2f}s")
+
+        yield {
+            'event': 'summary',
+            'success': True,
+            'emotion': emotion,
+            'total': len(processed),
+            'genres_used': genres_to_use[:5],
+            'music_params': self._format_music_params(avg_features),
+            'playlist_description': create_playlist_description(emotion),
+            'partial': partial
+        }
+
+    @staticmethod
+    def _tracks_frame(stage: int, tracks: List[Dict], candidates: int, final: bool) -> Dict[str, Any]:
+        return {
+            'event': 'tracks',
+            'stage': stage,
+            'final': final,
+            'tracks': tracks,
+            'total': len(tracks),
+            'candidates': candidates
+        }
+
+    def get_batch_recommendations(
+        self,
+        emotions: List[tuple],
+        limit: int = 20,
+        blend: bool = False,
+        markets: Optional[List[str]] = None,
+        deadline_ms: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Recomendaciones para varias emociones ponderadas en una sola llamada.
+
+        `emotions` es una lista de (emoción, peso). Los pools fríos se
+        recolectan juntos: las consultas que comparten las emociones (géneros
+        como 'indie' o 'alternative', playlists, artistas semilla) se lanzan una
+        sola vez. Sin `blend` se devuelve una selección de `limit` tracks por
+        emoción; con `blend`, una única lista de `limit` tracks repartida según
+        los pesos.
+
+        Con `deadline_ms`, los pools que no estén listos a tiempo se sirven con
+        los candidatos recibidos y la respuesta lleva `partial: True`.
+        """
+        start = time.time()
+        deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+        weights: Dict[str, float] = {}
+        for emotion, weight in emotions:
+            emotion = emotion.upper()
+            if emotion not in self.EMOTION_DESCRIPTORS:
+                raise ValueError(f"Emoción desconocida: {emotion}")
+            weights[emotion] = weights.get(emotion, 0.0) + max(float(weight), 0.0)
+        if not weights:
+            raise ValueError("Se requiere al menos una emoción")
+        total_weight = sum(weights.values())
+        if total_weight > 0:
+            weights = {e: w / total_weight for e, w in weights.items()}
+        else:
+            weights = {e: 1.0 / len(weights) for e in weights}
+
+        markets_to_use = markets or self.markets
+        pools, partial = self._get_candidate_pools(list(weights), markets_to_use, deadline)
+
+        if blend:
+            quotas = self._allocate_quotas(weights, limit)
+            selections: Dict[str, List[Dict]] = {}
+            taken: Set[str] = set()
+            for emotion in sorted(weights, key=weights.get, reverse=True):
+                candidates = [t for t in pools[emotion] if track_id(t) not in taken]
+                filters = self.EMOTION_FEATURE_FILTERS.get(emotion, {})
+                selections[emotion] = self._select_tracks(candidates, filters, quotas[emotion])
+                taken.update(t['id'] for t in selections[emotion])
+            tracks = self._interleave(selections, weights)
+            results = [self._emotion_result(e, weights[e], selections[e]) for e in weights]
+        else:
+            results = []
+            for emotion, weight in weights.items():
+                filters = self.EMOTION_FEATURE_FILTERS.get(emotion, {})
+                results.append(self._emotion_result(emotion, weight, self._select_tracks(pools[emotion], filters, limit)))
+            tracks = None
+
+        logger.info(f"✓ Batch de {len(weights)} emociones completado en {time.time() - start:.2f}s")
+        response = {
+            'success': True,
+            'blended': blend,
+            'emotions': [{'emotion': e, 'weight': round(w, 4)} for e, w in weights.items()],
+            'results': results,
+            'partial': partial
+        }
+        if tracks is not None:
+            avg_features = self._analyze_track_features([t['id'] for t in tracks])
+            response.update({
+                'tracks': tracks,
+                'total': len(tracks),
+                'music_params': self._format_music_params(avg_features)
+            })
+        return response
+
+    def _emotion_result(self, emotion: str, weight: float, tracks: List[Dict]) -> Dict[str, Any]:
+        avg_features = self._analyze_track_features([t['id'] for t in tracks])
+        return {
+            'emotion': emotion,
+            'weight': round(weight, 4),
+            'tracks': tracks,
+            'total': len(tracks),
+            'genres_used': self.EMOTION_DESCRIPTORS[emotion].get('genres', [])[:5],
+            'music_params': self._format_music_params(avg_features),
+            'playlist_description': create_playlist_description(emotion)
+        }
+
+    @staticmethod
+    def _allocate_quotas(weights: Dict[str, float], limit: int) -> Dict[str, int]:
+        """Reparte `limit` tracks entre emociones según sus pesos (mayor resto)."""
+        raw = {e: w * limit for e, w in weights.items()}
+        quotas = {e: int(v) for e, v in raw.items()}
+        leftover = limit - sum(quotas.values())
+        for emotion in sorted(raw, key=lambda e: raw[e] - quotas[e], reverse=True)[:leftover]:
+            quotas[emotion] += 1
+        return quotas
+
+    @staticmethod
+    def _interleave(selections: Dict[str, List[Dict]], weights: Dict[str, float]) -> List[Dict]:
+        """Mezcla las selecciones por emoción respetando la proporción de pesos en cada tramo."""
+        served = {e: 0 for e in selections}
+        blended = []
+        while any(served[e] < len(selections[e]) for e in selections):
+            # La emoción más atrasada respecto a su peso aporta el siguiente track
+            pending = [e for e in selections if served[e] < len(selections[e])]
+            emotion = min(pending, key=lambda e: (served[e] + 0.5) / weights[e])
+            blended.append(selections[emotion][served[emotion]])
+            served[emotion] += 1
+        return blended
+
+    def _get_candidate_pools(
+        self,
+        emotions: List[str],
+        markets: List[str],
+        deadline: Optional[float] = None
+    ) -> tuple:
+        """
+        Pools de varias emociones con sus géneros por defecto.
+
+        Los pools calientes se usan tal cual. Los fríos se construyen a través
+        de las mismas construcciones compartidas que `get_recommendations`: si
+        otra petición ya construye una clave se espera a ella, y las claves
+        que quedan se recolectan juntas con `_build_shared_pools`.
+
+        Devuelve (pools, parcial). Con `deadline` no se espera más allá de ese
+        instante: los pools aún en construcción se sirven con los candidatos
+        recibidos hasta entonces.
+        """
+        pools: Dict[str, List[Track]] = {}
+        cold: Dict[tuple, str] = {}
+        for emotion in emotions:
+            descriptors = self.EMOTION_DESCRIPTORS[emotion]
+            key = self._pool_key(emotion, descriptors.get('genres', []), markets)
+            with self._pools_lock:
+                warm = key in self._pools
+            if warm:
+                pools[emotion] = self._get_candidate_pool(emotion, descriptors.get('genres', []), descriptors, markets)
+            else:
+                cold[key] = emotion
+
+        partial = False
+        if cold and deadline is None:
+            built = self._pool_flights.do_many(list(cold), lambda keys: self._build_shared_pools(keys, markets))
+            for key, candidates in built.items():
+                pools[cold[key]] = candidates
+        elif cold:
+            builds = self._pool_flights.start_many(
+                list(cold), lambda keys: self._build_shared_pools(keys, markets), name="spotify-pool-batch"
+            )
+            for key, build in builds.items():
+                pools[cold[key]], cut = self._wait_pool_build(key, build, deadline)
+                partial = partial or cut
+        return pools, partial
+
+    def _build_shared_pools(self, keys: List[tuple], markets: List[str]) -> Dict[tuple, List[Track]]:
+        """Recolecta y publica los pools de `keys` (reclamadas por esta petición)."""
+        if len(keys) == 1:
+            key = keys[0]
+            return {key: self._collect_pool(key, self.EMOTION_DESCRIPTORS[key[0]])}
 
-        logger.info(f"📊 Recolectados {len(candidates)} candidatos únicos")
+        keys_by_emotion = {key[0]: key for key in keys}
+        with self._tracking_progress(keys) as add_batch:
+            collected = self._collect_shared_candidates(
+                list(keys_by_emotion), markets,
+                deadline=self._pool_build_deadline(),
+                on_batch=lambda emotion, batch: add_batch(keys_by_emotion[emotion], batch)
+            )
+        return {key: self._publish_pool(key, collected[key[0]]) for key in keys}
 
-        # 2) FILTRADO SUAVE (solo si audio_features está disponible)
+    def _collect_shared_candidates(
+        self,
+        emotions: List[str],
+        markets: List[str],
+        deadline: Optional[float] = None,
+        on_batch: Optional[Callable[[str, List[Track]], Any]] = None
+    ) -> Dict[str, List[Track]]:
+        """
+        Recolecta los candidatos de varias emociones con una sola tanda de consultas.
+
+        Los trabajos planificados por cada emoción se deduplican por (tipo,
+        consulta): una búsqueda como 'best indie' o los top tracks de un artista
+        compartido se piden una vez y su resultado se reparte entre las
+        emociones que la planificaron.
+
+        Con `deadline` (instante de `time.monotonic()`) las consultas
+        pendientes se abandonan al vencer. `on_batch(emoción, tracks)` recibe
+        los tracks nuevos de cada emoción a medida que llegan.
+        """
+        plans = {
+            emotion: self._plan_collection_jobs(
+                emotion,
+                self.EMOTION_DESCRIPTORS[emotion].get('genres', []),
+                self.EMOTION_DESCRIPTORS[emotion],
+                markets
+            )
+            for emotion in emotions
+        }
+        shared: Dict[tuple, tuple] = {}
+        planned_by: Dict[tuple, Dict[str, None]] = {}
+        for emotion, jobs in plans.items():
+            for job in jobs:
+                shared.setdefault(job[:2], job)
+                planned_by.setdefault(job[:2], {})[emotion] = None
+        jobs = list(shared.values())
+        positions = {job[:2]: pos for pos, job in enumerate(jobs)}
+
+        budget = CollectionBudget(deadline=deadline)
+        results: Dict[int, List[Track]] = {}
+        arrived: Dict[str, Set[str]] = {emotion: set() for emotion in emotions}
+        for pos, tracks in self._run_wave(jobs, budget):
+            results.setdefault(pos, []).extend(tracks)
+            if on_batch:
+                for emotion in planned_by[jobs[pos][:2]]:
+                    batch = []
+                    for track in tracks:
+                        tid = track_id(track)
+                        if tid and tid not in arrived[emotion]:
+                            arrived[emotion].add(tid)
+                            batch.append(track)
+                    if batch:
+                        on_batch(emotion, batch)
+
+        planned = sum(len(p) for p in plans.values())
+        logger.info(f"🔗 Recolección compartida de {len(emotions)} emociones: {len(jobs)}/{planned} consultas")
+
+        collected = {}
+        for emotion, plan in plans.items():
+            candidates = []
+            seen_ids = set()
+            for job in plan:
+                if len(candidates) >= self.POOL_TARGET_COUNT:
+                    break
+                for track in results.get(positions[job[:2]], []):
+                    tid = track_id(track)
+                    if tid and tid not in seen_ids:
+                        candidates.append(track)
+                        seen_ids.add(tid)
+            collected[emotion] = candidates
+        return collected
+
+    def _select_tracks(self, candidates: List[Track], filters: Dict, limit: int) -> List[Dict]:
+        """Filtra (si hay audio features), diversifica y procesa los candidatos."""
+        # FILTRADO SUAVE (solo si audio_features está disponible)
         if self._audio_features_available and len(candidates) > limit * 3:
             filtered = self._filter_tracks_by_features(candidates, filters)
             logger.info(f"✓ {len(filtered)} pasaron filtros de audio")
@@ -176,7 +605,7 @@ class SpotifyService:
             filtered = candidates
             logger.info(f"⏭️  Omitiendo filtros (pocos candidatos)")
 
-        # 3) DIVERSIFICACIÓN INTELIGENTE
+        # DIVERSIFICACIÓN INTELIGENTE
         final_tracks = self._diversify_tracks(
             filtered if filtered else candidates,
             limit=limit
@@ -184,104 +613,442 @@ class SpotifyService:
 
         logger.info(f"🎯 Seleccionadas {len(final_tracks)} canciones diversificadas")
 
-        # 4) PROCESAR Y ENRIQUECER
+        # PROCESAR Y ENRIQUECER
         processed = []
         for track in final_tracks:
             proc = self._process_track(track)
             if proc:
                 processed.append(proc)
+        return processed
 
-        # 5) ANÁLISIS DE CARACTERÍSTICAS
-        avg_features = self._analyze_track_features([t['id'] for t in processed])
-
-        elapsed = time.time() - start
-        logger.info(f"✓ Completado en {elapsed:.2f}s")
-
+    @staticmethod
+    def _format_music_params(avg_features: Dict[str, Any]) -> Dict[str, str]:
         return {
-            'success': True,
-            'emotion': emotion,
-            'tracks': processed,
-            'total': len(processed),
-            'genres_used': genres_to_use[:5],
-            'music_params': {
-                'valence': f"{avg_features.get('valence', 0.5):.2f}",
-                'energy': f"{avg_features.get('energy', 0.5):.2f}",
-                'tempo': f"{int(avg_features.get('tempo', 100))} BPM",
-                'mode': avg_features.get('mode_text', 'Mixto')
-            }
+            'valence': f"{avg_features.get('valence', 0.5):.2f}",
+            'energy': f"{avg_features.get('energy', 0.5):.2f}",
+            'tempo': f"{int(avg_features.get('tempo', 100))} BPM",
+            'mode': avg_features.get('mode_text', 'Mixto')
         }
 
+    # ============ POOLS DE CANDIDATOS ============
+
+    @staticmethod
+    def _pool_key(emotion: str, genres: List[str], markets: List[str]) -> tuple:
+        return (emotion, tuple(genres), tuple(markets))
+
+    def _get_candidate_pool(
+        self,
+        emotion: str,
+        genres: List[str],
+        descriptors: Dict,
+        markets: List[str]
+    ) -> List[Track]:
+        """
+        Devuelve el pool de candidatos de la emoción (stale-while-revalidate).
+
+        - Pool vigente: se devuelve tal cual.
+        - Pool vencido: se devuelve el pool viejo y se refresca en segundo plano.
+        - Sin pool: se construye en línea (solo la primera vez).
+        """
+        key = self._pool_key(emotion, genres, markets)
+        with self._pools_lock:
+            entry = self._pools.get(key)
+
+        if entry is None:
+            return self._build_pool(key, descriptors)
+
+        built_at, candidates = entry
+        if time.time() - built_at >= self.pool_ttl:
+            self._schedule_pool_refresh(key, descriptors)
+        return candidates
+
+    def _get_candidate_pool_until(
+        self,
+        emotion: str,
+        genres: List[str],
+        descriptors: Dict,
+        markets: List[str],
+        deadline: float
+    ) -> tuple:
+        """
+        Como `_get_candidate_pool`, pero sin esperar más allá de `deadline`.
+
+        Devuelve (candidatos, parcial). Si el pool no está listo a tiempo, se
+        devuelven los candidatos que la construcción en curso lleva recibidos.
+        """
+        key = self._pool_key(emotion, genres, markets)
+        with self._pools_lock:
+            entry = self._pools.get(key)
+        if entry is not None:
+            return self._get_candidate_pool(emotion, genres, descriptors, markets), False
+        return self._wait_pool_build(key, self._start_pool_build(key, descriptors), deadline)
+
+    def _wait_pool_build(self, key: tuple, build: Future, deadline: Optional[float]) -> tuple:
+        """
+        Espera la construcción `build` del pool `key` como mucho hasta `deadline`.
+
+        Devuelve (candidatos, parcial): al vencer, los candidatos que la
+        construcción lleva recibidos; ella sigue en curso para los demás.
+        """
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return build.result(timeout=timeout), False
+        except FutureTimeoutError:
+            with self._pools_lock:
+                candidates = list(self._pool_progress.get(key, ()))
+            logger.warning(f"⏱️  Deadline vencido esperando el pool de '{key[0]}': {len(candidates)} candidatos parciales")
+            return candidates, True
+
+    def _build_pool(self, key: tuple, descriptors: Dict) -> List[Track]:
+        """
+        Recolecta los candidatos de un pool y lo publica.
+
+        Las peticiones concurrentes con la misma clave (emoción, géneros,
+        mercados) comparten una única recolección en curso; cada una aplica
+        después su propia diversificación aleatoria sobre el resultado.
+        """
+        return self._pool_flights.do(key, lambda: self._collect_pool(key, descriptors))
+
+    def _start_pool_build(self, key: tuple, descriptors: Dict) -> Future:
+        """Como `_build_pool`, sin bloquear: devuelve el Future de la construcción compartida."""
+        return self._pool_flights.start(
+            key, lambda: self._collect_pool(key, descriptors), name=f"spotify-pool-{key[0]}"
+        )
+
+    def _follow_pool_build(self, key: tuple, build: Future, deadline: Optional[float] = None) -> Iterator[List[Track]]:
+        """
+        Genera los candidatos acumulados por la construcción en curso de `key`
+        cada vez que llega un lote nuevo, hasta que `build` termina o vence
+        `deadline`.
+
+        El progreso de `key` se retira al acabar la recolección, antes de que
+        `build` termine: sin entrada no hay nada nuevo que enviar y se espera
+        a `build` (su callback despierta a este hilo).
+        """
+        build.add_done_callback(lambda _: self._notify_pool_progress())
+        seen = 0
+        while True:
+            with self._pool_progress_changed:
+                progress = self._pool_progress.get(key)
+                while not build.done() and (progress is None or len(progress) <= seen):
+                    timeout = None if deadline is None else deadline - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        return
+                    self._pool_progress_changed.wait(timeout)
+                    progress = self._pool_progress.get(key)
+                if build.done() or (deadline is not None and time.monotonic() >= deadline):
+                    return
+                candidates = list(progress)
+            seen = len(candidates)
+            yield candidates
+
+    def _notify_pool_progress(self):
+        with self._pool_progress_changed:
+            self._pool_progress_changed.notify_all()
+
+    def _collect_pool(self, key: tuple, descriptors: Dict) -> List[Track]:
+        emotion, genres, markets = key
+        with self._tracking_progress([key]) as add_batch:
+            candidates = self._collect_diverse_candidates(
+                emotion=emotion,
+                genres=list(genres),
+                descriptors=descriptors,
+                markets=list(markets),
+                target_count=self.POOL_TARGET_COUNT,
+                limit=self.POOL_LIMIT,
+                deadline=self._pool_build_deadline(),
+                on_batch=lambda batch: add_batch(key, batch)
+            )
+        return self._publish_pool(key, candidates)
+
+    def _pool_build_deadline(self) -> Optional[float]:
+        """Instante en que se abandona una construcción de pool (`pool_build_timeout`)."""
+        timeout = self.pool_build_timeout
+        return time.monotonic() + timeout if timeout else None
+
+    @contextmanager
+    def _tracking_progress(self, keys: List[tuple]) -> Iterator[Callable[[tuple, List[Track]], None]]:
+        """
+        Expone en `_pool_progress` los candidatos que reciben las construcciones
+        de `keys` mientras dura el bloque; devuelve la función que añade un lote.
+        """
+        with self._pool_progress_changed:
+            for key in keys:
+                self._pool_progress[key] = []
+
+        def add_batch(key: tuple, batch: List[Track]):
+            with self._pool_progress_changed:
+                self._pool_progress[key].extend(batch)
+                self._pool_progress_changed.notify_all()
+
+        try:
+            yield add_batch
+        finally:
+            with self._pool_progress_changed:
+                for key in keys:
+                    self._pool_progress.pop(key, None)
+                self._pool_progress_changed.notify_all()
+
+    def _publish_pool(self, key: tuple, candidates: List[Track]) -> List[Track]:
+        """Publica los candidatos como pool; uno vacío (Spotify caído) no reemplaza a uno bueno."""
+        with self._pools_lock:
+            if candidates or key not in self._pools:
+                self._pools[key] = (time.time(), candidates)
+            else:
+                candidates = self._pools[key][1]
+        logger.info(f"♻️  Pool de '{key[0]}' listo con {len(candidates)} candidatos")
+        return candidates
+
+    def _schedule_pool_refresh(self, key: tuple, descriptors: Dict):
+        """Refresca un pool en un hilo aparte, sin duplicar refrescos en curso."""
+        with self._pools_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._build_pool(key, descriptors)
+            except Exception as e:
+                logger.warning(f"⚠ Error refrescando pool de '{key[0]}': {e}")
+            finally:
+                with self._pools_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"spotify-pool-{key[0]}", daemon=True).start()
+
+    def prewarm_pools(self):
+        """Construye (o reconstruye) el pool por defecto de cada emoción."""
+        self.seed_artist_index()
+        for emotion, descriptors in self.EMOTION_DESCRIPTORS.items():
+            key = self._pool_key(emotion, descriptors.get('genres', []), self.markets)
+            try:
+                self._build_pool(key, descriptors)
+            except Exception as e:
+                logger.warning(f"⚠ Error pre-calentando pool de '{emotion}': {e}")
+
+    def start_pool_refresher(self, interval: Optional[float] = None):
+        """
+        Inicia el planificador que mantiene los pools calientes.
+
+        Pre-calienta todas las emociones y luego las reconstruye cada `interval`
+        segundos (por defecto, el TTL del pool), de forma que el tráfico hacia
+        Spotify no depende del tráfico de usuarios.
+        """
+        if self._refresher_thread and self._refresher_thread.is_alive():
+            return
+        interval = interval or self.pool_ttl
+        self._refresher_stop.clear()
+
+        def loop():
+            while not self._refresher_stop.is_set():
+                self.prewarm_pools()
+                self._refresher_stop.wait(interval)
+
+        self._refresher_thread = threading.Thread(target=loop, name="spotify-pool-refresher", daemon=True)
+        self._refresher_thread.start()
+        logger.info(f"♻️  Refresco de pools cada {interval:.0f}s")
+
+    def stop_pool_refresher(self):
+        self._refresher_stop.set()
+
     def _collect_diverse_candidates(
         self,
         emotion: str,
         genres: List[str],
         descriptors: Dict,
         markets: List[str],
-        target_count: int = 300
-    ) -> List[Dict]:
+        target_count: int = 300,
+        limit: Optional[int] = None,
+        deadline: Optional[float] = None,
+        on_batch: Optional[Callable[[List[Track]], Any]] = None
+    ) -> List[Track]:
         """
         Recolecta candidatos de múltiples fuentes con diversificación.
+
+        Las tres estrategias (género+mood, playlists y artistas semilla) se
+        lanzan en paralelo sobre un pool acotado (`max_concurrency`). Los
+        resultados se combinan después en el orden original de las
+        estrategias, de modo que la deduplicación por `seen_ids` y el corte por
+        `target_count` se comportan igual que en la versión secuencial.
+
+        Con `limit`, la recolección es adaptativa: las consultas se lanzan en
+        oleadas (intercalando estrategias) y se deja de lanzar en cuanto hay
+        diversidad suficiente para `limit` tracks (ver `CollectionBudget`).
+
+        Con `deadline` (instante de `time.monotonic()`) las tareas pendientes
+        se cancelan al vencer y se devuelve lo recolectado hasta entonces.
+        `on_batch` recibe cada lote de tracks nuevos a medida que llega.
         """
+        jobs = self._plan_collection_jobs(emotion, genres, descriptors, markets)
+        budget = CollectionBudget(limit, target_count, deadline)
+        results: Dict[int, List[Track]] = {}
+
+        for wave in self._plan_waves(jobs, budget):
+            for pos, tracks in self._run_wave([jobs[i] for i in wave], budget):
+                results.setdefault(wave[pos], []).extend(tracks)
+                batch = budget.add(tracks)
+                if batch and on_batch:
+                    on_batch(batch)
+            if budget.end_wave(len(wave)):
+                break
+
+        # Combinar en el orden original de las estrategias
         candidates = []
         seen_ids = set()
-        
+        for i in range(len(jobs)):
+            if len(candidates) >= target_count:
+                break
+            for track in results.get(i, []):
+                tid = track_id(track)
+                if tid and tid not in seen_ids:
+                    candidates.append(track)
+                    seen_ids.add(tid)
+
+        if budget.adaptive or budget.stop_reason == 'deadline':
+            stats = budget.stats()
+            logger.info(
+                f"📉 Recolección de '{emotion}': {stats['queries']}/{len(jobs)} consultas, "
+                f"{stats['tracks']} tracks, {stats['artists']} artistas ({stats['stop_reason'] or 'sin consultas'})"
+            )
+        return candidates
+
+    def _plan_collection_jobs(
+        self,
+        emotion: str,
+        genres: List[str],
+        descriptors: Dict,
+        markets: List[str]
+    ) -> List[tuple]:
+        """
+        Planifica las consultas de las tres estrategias, en su orden original.
+
+        Cada trabajo es (tipo, consulta, mercado) con tipo 'search',
+        'playlist' o 'artist'.
+        """
         moods = descriptors.get('moods', [])
         artists = descriptors.get('artists', [])
-        
+        jobs = []
+
         # ESTRATEGIA 1: Búsqueda por género + mood
         for genre in random.sample(genres, min(len(genres), 6)):
             for mood in random.sample(moods, min(len(moods), 4)):
-                if len(candidates) >= target_count:
-                    break
-                    
                 market = random.choice(markets)
-                query = f"{genre} {mood}"
-                
-                # Búsqueda de tracks
-                tracks = self._safe_search_tracks(query, limit=50, market=market)
-                for track in tracks:
-                    if track.get('id') and track['id'] not in seen_ids:
-                        candidates.append(track)
-                        seen_ids.add(track['id'])
-                
-                time.sleep(0.05)
+                jobs.append(('search', f"{genre} {mood}", market))
 
         # ESTRATEGIA 2: Playlists curadas
         playlist_queries = [f"{emotion.lower()} vibes"]
         playlist_queries.extend([f"best {genre}" for genre in genres[:3]])
-        
-        for query in playlist_queries[:5]:
-            if len(candidates) >= target_count:
-                break
-                
-            market = random.choice(markets)
-            pl_tracks = self._get_playlist_tracks(query, market=market, limit=30)
-            
-            for track in pl_tracks:
-                if track.get('id') and track['id'] not in seen_ids:
-                    candidates.append(track)
-                    seen_ids.add(track['id'])
-            
-            time.sleep(0.05)
+        jobs.extend(('playlist', query, random.choice(markets)) for query in playlist_queries[:5])
 
         # ESTRATEGIA 3: Por artistas semilla
-        for artist_name in artists[:4]:
-            if len(candidates) >= target_count:
-                break
-                
-            artist_tracks = self._get_artist_top_tracks(artist_name)
-            for track in artist_tracks:
-                if track.get('id') and track['id'] not in seen_ids:
-                    candidates.append(track)
-                    seen_ids.add(track['id'])
+        jobs.extend(('artist', artist_name, 'US') for artist_name in artists[:4])
+        return jobs
 
-        return candidates
+    def _plan_waves(self, jobs: List[tuple], budget: CollectionBudget) -> List[List[int]]:
+        """
+        Agrupa los índices de los trabajos en oleadas.
 
-    def _safe_search_tracks(self, query: str, limit: int = 50, market: str = 'US') -> List[Dict]:
+        Sin presupuesto adaptativo todo va en una sola oleada. Con él, las
+        oleadas son de `max_concurrency` trabajos e intercalan estrategias para
+        que cada una mezcle fuentes.
+        """
+        if not budget.adaptive:
+            return [list(range(len(jobs)))]
+
+        by_kind: Dict[str, List[int]] = {}
+        for i, job in enumerate(jobs):
+            by_kind.setdefault(job[0], []).append(i)
+        queues = list(by_kind.values())
+        order = []
+        while any(queues):
+            for queue in queues:
+                if queue:
+                    order.append(queue.pop(0))
+
+        size = self.max_concurrency
+        return [order[i:i + size] for i in range(0, len(order), size)]
+
+    def _run_wave(self, jobs: List[tuple], budget: Optional[CollectionBudget] = None) -> Iterator[tuple]:
+        """
+        Ejecuta una oleada de trabajos en paralelo.
+
+        Genera (posición del trabajo, tracks) a medida que terminan. Cada
+        playlist encontrada dispara sus items en cuanto llega su búsqueda. Si
+        vence el deadline del presupuesto, las tareas pendientes se cancelan
+        (las que ya están en vuelo terminan en segundo plano y sus respuestas
+        quedan en la caché).
+        """
+        executor = self._get_executor()
+        owners: Dict[Future, int] = {}
+        item_futures: Set[Future] = set()
+        for pos, (kind, query, market) in enumerate(jobs):
+            if kind == 'search':
+                fut = executor.submit(self._safe_search_tracks, query, 50, market)
+            elif kind == 'playlist':
+                fut = executor.submit(self._search_playlists, query, market)
+            else:
+                fut = executor.submit(self._get_artist_top_tracks, query, market)
+            owners[fut] = pos
+
+        pending = set(owners)
+        while pending:
+            timeout = budget.remaining() if budget else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                for fut in pending:
+                    fut.cancel()
+                logger.warning(f"⏱️  Deadline de recolección vencido: {len(pending)} tareas abandonadas")
+                return
+            for fut in done:
+                pos = owners.pop(fut)
+                result = self._future_result(fut)
+                if jobs[pos][0] == 'playlist' and fut not in item_futures:
+                    for playlist_id in result:
+                        items_future = executor.submit(self._get_playlist_items, playlist_id, jobs[pos][2], 30)
+                        owners[items_future] = pos
+                        item_futures.add(items_future)
+                        pending.add(items_future)
+                    continue
+                yield pos, result
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Devuelve el pool de la instancia, creándolo si aún no existe."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix="spotify-fetch"
+                )
+            return self._executor
+
+    @staticmethod
+    def _future_result(future: Future) -> List:
+        """Resultado de una tarea de recolección; una tarea fallida cuenta como vacía."""
+        try:
+            return future.result() or []
+        except Exception as e:
+            logger.warning(f"Tarea de recolección falló: {e}")
+            return []
+
+    def _call(self, fn, *args, **kwargs):
+        """Ejecuta una llamada de spotipy a través del rate limiter compartido."""
+        return self.rate_limiter.call(fn, *args, **kwargs)
+
+    def _cached(self, endpoint: str, query: str, market: Optional[str], limit: Optional[int], fetch):
+        """Resuelve `fetch` a través de la caché de respuestas (`cache = None` la desactiva)."""
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_or_fetch(endpoint, query, market, limit, fetch)
+
+    def _safe_search_tracks(self, query: str, limit: int = 50, market: str = 'US') -> List[Track]:
         """Búsqueda de tracks con manejo robusto de errores."""
+        def fetch():
+            result = self._call(self.sp.search, q=query, type='track', limit=limit, market=market)
+            return ingest_tracks(result.get('tracks', {}).get('items', []))
+
         try:
-            result = self.sp.search(q=query, type='track', limit=limit, market=market)
-            return result.get('tracks', {}).get('items', [])
+            return self._cached('search_tracks', query, market, limit, fetch)
         except SpotifyException as e:
             logger.warning(f"Search error [{e.http_status}]: {query}")
             return []
@@ -289,53 +1056,89 @@ class SpotifyService:
             logger.error(f"Unexpected search error: {e}")
             return []
 
-    def _get_playlist_tracks(self, query: str, market: str = 'US', limit: int = 30) -> List[Dict]:
-        """Obtiene tracks de playlists con la query."""
-        tracks = []
-        try:
-            # Buscar playlists
-            result = self.sp.search(q=query, type='playlist', limit=3, market=market)
+    def _search_playlists(self, query: str, market: str = 'US') -> List[str]:
+        """Busca playlists con la query y devuelve sus IDs."""
+        def fetch():
+            result = self._call(self.sp.search, q=query, type='playlist', limit=3, market=market)
             playlists = result.get('playlists', {}).get('items', [])
-            
-            for playlist in playlists:
-                try:
-                    items = self.sp.playlist_items(
-                        playlist['id'], 
-                        limit=limit, 
-                        market=market
-                    )
-                    for item in items.get('items', []):
-                        track = item.get('track')
-                        if track and track.get('id'):
-                            tracks.append(track)
-                except Exception as e:
-                    logger.debug(f"Error obteniendo playlist items: {e}")
-                    
+            return [p['id'] for p in playlists if p and p.get('id')]
+
+        try:
+            return self._cached('search_playlists', query, market, 3, fetch)
         except Exception as e:
             logger.warning(f"Error buscando playlists: {e}")
-            
-        return tracks
+            return []
+
+    def _get_playlist_items(self, playlist_id: str, market: str = 'US', limit: int = 30) -> List[Track]:
+        """Obtiene los tracks válidos de una playlist."""
+        def fetch():
+            items = self._call(
+                self.sp.playlist_items,
+                playlist_id,
+                limit=limit,
+                market=market
+            )
+            return ingest_tracks(item.get('track') for item in items.get('items', []) if item)
 
-    def _get_artist_top_tracks(self, artist_name: str, market: str = 'US') -> List[Dict]:
-        """Obtiene top tracks de un artista."""
         try:
-            # Buscar artista
-            result = self.sp.search(q=f"artist:{artist_name}", type='artist', limit=1)
-            artists = result.get('artists', {}).get('items', [])
-            
-            if not artists:
+            return self._cached('playlist_items', playlist_id, market, limit, fetch)
+        except Exception as e:
+            logger.debug(f"Error obteniendo playlist items: {e}")
+            return []
+
+    def seed_artist_index(self) -> int:
+        """Resuelve por adelantado los IDs de todos los artistas semilla de los descriptores."""
+        names = [
+            name
+            for descriptors in self.EMOTION_DESCRIPTORS.values()
+            for name in descriptors.get('artists', [])
+        ]
+        resolved = self.artist_index.seed(names, self._search_artist_id)
+        logger.info(f"🎤 Índice de artistas: {resolved}/{len(set(names))} artistas semilla resueltos")
+        return resolved
+
+    def _search_artist_id(self, artist_name: str) -> Optional[str]:
+        """Busca el ID de Spotify de un artista por nombre."""
+        result = self._call(self.sp.search, q=f"artist:{artist_name}", type='artist', limit=1)
+        artists = result.get('artists', {}).get('items', [])
+        return artists[0]['id'] if artists else None
+
+    def _get_artist_top_tracks(self, artist_name: str, market: str = 'US') -> List[Track]:
+        """Obtiene top tracks de un artista (ID desde el índice, tracks cacheados por artista y país)."""
+        try:
+            artist_id = self.artist_index.resolve(artist_name, self._search_artist_id)
+            if not artist_id:
                 return []
-            
-            artist_id = artists[0]['id']
-            
-            # Obtener top tracks
-            tops = self.sp.artist_top_tracks(artist_id, country=market)
-            return tops.get('tracks', [])
-            
+
+            def fetch():
+                tops = self._call(self.sp.artist_top_tracks, artist_id, country=market)
+                return ingest_tracks(tops.get('tracks', []))
+
+            return self._cached('artist_top_tracks', artist_id, market, None, fetch)
         except Exception as e:
             logger.debug(f"Error obteniendo tracks de artista {artist_name}: {e}")
             return []
 
+    def _get_audio_features(self, track_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Devuelve las audio features de los tracks, consultando primero el almacén.
+
+        Solo los IDs que faltan se piden a Spotify, en batches completos de 100.
+        Las excepciones de Spotify se propagan para que el llamador decida.
+        """
+        store = self.features_store
+        found = store.get_many(track_ids)
+        missing = [tid for tid in dict.fromkeys(track_ids) if tid not in found]
+
+        batch_size = self.AUDIO_FEATURES_BATCH_SIZE
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i:i + batch_size]
+            features_list = [f for f in (self._call(self.sp.audio_features, batch) or []) if f and f.get('id')]
+            store.put_many(features_list)
+            found.update((f['id'], f) for f in features_list)
+
+        return found
+
     def _filter_tracks_by_features(self, tracks: List[Dict], filters: Dict) -> List[Dict]:
         """Filtra tracks por audio features con criterios más permisivos."""
         if not tracks or not filters:
@@ -345,51 +1148,28 @@ class SpotifyService:
         if self._audio_features_available is False:
             return tracks
 
-        track_ids = [t['id'] for t in tracks if t.get('id')]
-        id_to_track = {t['id']: t for t in tracks if t.get('id')}
-        
-        filtered = []
-        
-        # Procesar en batches PEQUEÑOS (50 en lugar de 100) con delays
-        batch_size = 50
-        for i in range(0, len(track_ids), batch_size):
-            batch = track_ids[i:i+batch_size]
-            
-            try:
-                features_list = self.sp.audio_features(batch)
-                
-                for features in features_list:
-                    if not features or not features.get('id'):
-                        continue
-                    
-                    track_id = features['id']
-                    track = id_to_track.get(track_id)
-                    
-                    if not track:
-                        continue
-                    
-                    # Aplicar filtros
-                    if self._passes_filters(features, filters):
-                        track_copy = track.copy()
-                        track_copy['_features'] = features
-                        filtered.append(track_copy)
-                
-                # Delay entre batches para evitar rate limits
-                if i + batch_size < len(track_ids):
-                    time.sleep(0.2)
-                        
-            except SpotifyException as e:
-                if e.http_status == 403:
-                    # Marcar como no disponible y retornar tracks sin filtrar
-                    self._audio_features_available = False
-                    logger.warning(f"⚠ Audio features 403 - deshabilitando filtros")
-                    return tracks
-                else:
-                    logger.warning(f"Audio features error [{e.http_status}]")
-                    return tracks
-            except Exception as e:
-                logger.error(f"Unexpected audio features error: {e}")
-                return tracks
+        track_ids = [tid for tid in map(track_id, tracks) if tid]
+
+        try:
+            features_by_id = self._get_audio_features(track_ids)
+        except SpotifyException as e:
+            if e.http_status == 403:
+                # Marcar como no disponible y retornar tracks sin filtrar
+                self._audio_features_available = False
+                logger.warning(f"⚠ Audio features 403 - deshabilitando filtros")
+            else:
+                logger.warning(f"Audio features error [{e.http_status}]")
+            return tracks
+        except Exception as e:
+            logger.error(f"Unexpected audio features error: {e}")
+            return tracks
+
+        # Aplicar filtros en bloque (las features quedan en el almacén para el análisis posterior)
+        with_features = [t for t in tracks if track_id(t) in features_by_id]
+        mask = compile_filters(filters)(
+            features_to_array(features_by_id[track_id(t)] for t in with_features)
+        )
+        filtered = [t for t, keep in zip(with_features, mask) if keep]
         
         # Si se filtraron demasiadas, relajar criterios
         if len(filtered) < len(tracks) * 0.3:
@@ -399,138 +1179,21 @@ class SpotifyService:
         return filtered
 
     def _passes_filters(self, features: Dict, filters: Dict) -> bool:
-        """Verifica si un track pasa los filtros."""
-        val = features.get('valence', 0.5)
-        eng = features.get('energy', 0.5)
-        dnc = features.get('danceability', 0.5)
-        ac = features.get('acousticness', 0.5)
-        tempo = features.get('tempo', 120)
-        
-        # Aplicar cada filtro con un margen de tolerancia
-        TOLERANCE = 0.05
-        
-        if 'min_valence' in filters:
-            if val < filters['min_valence'] - TOLERANCE:
-                return False
-                
-        if 'max_valence' in filters:
-            if val > filters['max_valence'] + TOLERANCE:
-                return False
-                
-        if 'min_energy' in filters:
-            if eng < filters['min_energy'] - TOLERANCE:
-                return False
-                
-        if 'max_energy' in filters:
-            if eng > filters['max_energy'] + TOLERANCE:
-                return False
-                
-        if 'min_danceability' in filters:
-            if dnc < filters['min_danceability'] - TOLERANCE:
-                return False
-                
-        if 'max_acousticness' in filters:
-            if ac > filters['max_acousticness'] + TOLERANCE:
-                return False
-                
-        if 'min_acousticness' in filters:
-            if ac < filters['min_acousticness'] - TOLERANCE:
-                return False
-                
-        if 'tempo_range' in filters:
-            lo, hi = filters['tempo_range']
-            if not (lo - 10 <= tempo <= hi + 10):
-                return False
-                
-        if 'max_tempo' in filters:
-            if tempo > filters['max_tempo'] + 10:
-                return False
-        
-        return True
+        """Verifica si un track pasa los filtros (con un margen de tolerancia)."""
+        return bool(compile_filters(filters)(features_to_array([features]))[0])
 
     def _diversify_tracks(self, tracks: List[Dict], limit: int) -> List[Dict]:
         """
         Diversifica tracks INTELIGENTEMENTE sin audio_features.
-        Criterios: artistas, álbumes, popularidad, año de lanzamiento.
+        Criterios: artistas, álbumes, popularidad, año de lanzamiento (MMR).
+        No modifica los tracks, así que es seguro sobre pools compartidos.
         """
-        if len(tracks) <= limit:
-            return tracks
+        return diversify(tracks, limit, config=self.diversity_config)
 
-        # Análisis de metadata
-        artist_count = defaultdict(int)
-        album_count = defaultdict(int)
-        genre_presence = defaultdict(list)
-        
-        # Extraer año de lanzamiento si está disponible
-        for track in tracks:
-            release_date = track.get('album', {}).get('release_date', '')
-            if release_date:
-                year = release_date.split('-')[0] if '-' in release_date else release_date
-                track['_year'] = int(year) if year.isdigit() else 2020
-            else:
-                track['_year'] = 2020
-        
-        selected = []
-        remaining = tracks.copy()
-        random.shuffle(remaining)
-        
-        # FASE 1: Diversidad estricta (máximo 1 por artista)
-        for track in remaining:
-            if len(selected) >= limit // 2:  # Primera mitad
-                break
-                
-            artist_name = track.get('artists', [{}])[0].get('name', 'Unknown')
-            album_name = track.get('album', {}).get('name', 'Unknown')
-            
-            if artist_count[artist_name] == 0:
-                selected.append(track)
-                artist_count[artist_name] += 1
-                album_count[album_name] += 1
-        
-        # FASE 2: Completar con diversidad relajada (máximo 2 por artista)
-        for track in remaining:
-            if len(selected) >= limit:
-                break
-            
-            if track in selected:
-                continue
-                
-            artist_name = track.get('artists', [{}])[0].get('name', 'Unknown')
-            album_name = track.get('album', {}).get('name', 'Unknown')
-            
-            if artist_count[artist_name] < 2 and album_count[album_name] < 2:
-                selected.append(track)
-                artist_count[artist_name] += 1
-                album_count[album_name] += 1
-        
-        # FASE 3: Si aún faltan, agregar lo que sea
-        for track in remaining:
-            if len(selected) >= limit:
-                break
-            if track not in selected:
-                selected.append(track)
-        
-        # Ordenar por: 50% popularidad + 30% año + 20% aleatorio
-        def score_track(t):
-            popularity = t.get('popularity', 50)
-            year = t.get('_year', 2020)
-            year_score = (year - 1950) / 75 * 100  # Normalizar años 1950-2025 a 0-100
-            random_factor = random.randint(0, 100)
-            
-            return (popularity * 0.5) + (year_score * 0.3) + (random_factor * 0.2)
-        
-        selected.sort(key=score_track, reverse=True)
-        
-        # Mezclar un poco para no ser demasiado predecible
-        # Intercambiar posiciones aleatorias
-        for _ in range(len(selected) // 3):
-            i, j = random.sample(range(len(selected)), 2)
-            selected[i], selected[j] = selected[j], selected[i]
-        
-        return selected[:limit]
-
-    def _process_track(self, track: Dict) -> Optional[Dict]:
-        """Transforma track al formato del schema."""
+    def _process_track(self, track: Any) -> Optional[Dict]:
+        """Transforma track (`Track` o dict de Spotify) al formato del schema."""
+        if isinstance(track, Track):
+            return track.to_response()
         if not track or not track.get('id'):
             return None
         
@@ -566,36 +1229,28 @@ class SpotifyService:
         if not track_ids or self._audio_features_available is False:
             return default_features
 
-        all_features = []
-        
-        # Batches pequeños de 50 con delays
-        batch_size = 50
-        for i in range(0, len(track_ids), batch_size):
-            batch = track_ids[i:i+batch_size]
-            try:
-                features = self.sp.audio_features(batch)
-                if features:
-                    all_features.extend([f for f in features if f])
-                
-                # Delay entre batches
-                if i + batch_size < len(track_ids):
-                    time.sleep(0.2)
-                    
-            except SpotifyException as e:
-                if e.http_status == 403:
-                    self._audio_features_available = False
-                    return default_features
-                logger.debug(f"Error en audio features analysis: {e}")
-            except Exception as e:
-                logger.debug(f"Error en audio features analysis: {e}")
+        try:
+            features_by_id = self._get_audio_features(track_ids)
+        except SpotifyException as e:
+            if e.http_status == 403:
+                self._audio_features_available = False
+                return default_features
+            logger.debug(f"Error en audio features analysis: {e}")
+            features_by_id = self.features_store.get_many(track_ids)
+        except Exception as e:
+            logger.debug(f"Error en audio features analysis: {e}")
+            features_by_id = self.features_store.get_many(track_ids)
+
+        all_features = [features_by_id[tid] for tid in track_ids if tid in features_by_id]
 
         if not all_features:
             return default_features
 
-        avg_valence = sum(f.get('valence', 0.5) for f in all_features) / len(all_features)
-        avg_energy = sum(f.get('energy', 0.5) for f in all_features) / len(all_features)
-        avg_tempo = sum(f.get('tempo', 120) for f in all_features) / len(all_features)
-        mode_avg = sum(f.get('mode', 0) for f in all_features) / len(all_features)
+        means = feature_means(features_to_array(all_features))
+        avg_valence = means['valence']
+        avg_energy = means['energy']
+        avg_tempo = means['tempo']
+        mode_avg = means['mode']
 
         if mode_avg > 0.6:
             mode_text = "Mayor (alegre)"
@@ -627,6 +1282,11 @@ def create_playlist_description(emotion: str) -> str:
     return descriptions.get(emotion, 'Música personalizada según tu emoción 🎵')
 
 
-# Instancia global
-spotify_service = SpotifyService()
-spotify_service.create_playlist_description = create_playlist_description
\ No newline at end of file
+def _build_spotify_service() -> SpotifyService:
+    service = SpotifyService()
+    service.create_playlist_description = create_playlist_description
+    return service
+
+
+# Instancia global (se construye en el primer uso; la conexión se prueba en el warm-up)
+spotify_service = LazyService('spotify', _build_spotify_service, check=lambda s: s.check_connection())
\ No newline at end of file
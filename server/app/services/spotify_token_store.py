@@ -0,0 +1,314 @@
+import os
+import json
+import time
+import hashlib
+import random
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+try:
+    from spotipy.cache_handler import CacheHandler
+except ImportError:  # spotipy sustituido por un doble en los tests
+    CacheHandler = object
+
+logger = logging.getLogger("spotify_token_store")
+
+# Por defecto, en un directorio privado del usuario (no en /tmp, legible o suplantable por otros)
+DEFAULT_TOKEN_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'anima', 'spotify-token.json')
+
+
+def client_scope(client_id: str) -> str:
+    """Sufijo estable por client_id: cada credencial de aplicación tiene su propio token."""
+    return hashlib.sha256(client_id.encode('utf-8')).hexdigest()[:16]
+
+
+class MemoryTokenStore:
+    """Token en memoria: compartido solo entre los hilos del proceso."""
+
+    def __init__(self):
+        self._token: Optional[Dict] = None
+        self._lock = threading.RLock()
+        self._clients: Dict[str, "MemoryTokenStore"] = {}
+
+    def for_client(self, client_id: str) -> "MemoryTokenStore":
+        with self._lock:
+            return self._clients.setdefault(client_scope(client_id), MemoryTokenStore())
+
+    def get(self) -> Optional[Dict]:
+        return self._token
+
+    def set(self, token: Dict):
+        self._token = dict(token)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        with self._lock:
+            yield
+
+
+class FileTokenStore:
+    """
+    Token en un archivo JSON local, compartido por los workers del mismo host.
+
+    El directorio se crea con permisos 0700 y el archivo con 0600: contiene un
+    bearer token. Las escrituras son atómicas (archivo temporal + `os.replace`)
+    y la renovación se serializa con `flock` sobre `<path>.lock`. Si el archivo
+    no se puede usar (otro sistema operativo, permisos), se recurre a memoria.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fallback = MemoryTokenStore()
+        self._thread_lock = threading.Lock()
+        self._ensure_private_dir()
+
+    def _ensure_private_dir(self):
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+                os.chmod(directory, 0o700)
+        except OSError as e:
+            logger.warning(f"⚠ No se pudo crear el directorio del token ({directory}): {e}")
+
+    def for_client(self, client_id: str) -> "FileTokenStore":
+        root, ext = os.path.splitext(self.path)
+        return FileTokenStore(f"{root}-{client_scope(client_id)}{ext or '.json'}")
+
+    def get(self) -> Optional[Dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return self._fallback.get()
+        except (OSError, ValueError) as e:
+            logger.debug(f"Token compartido ilegible ({self.path}): {e}")
+            return self._fallback.get()
+
+    def set(self, token: Dict):
+        self._fallback.set(token)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.', prefix='.spotify-token-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(token, f)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"⚠ No se pudo guardar el token compartido ({self.path}): {e}")
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        with self._thread_lock:
+            try:
+                import fcntl
+                fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+            except (ImportError, OSError) as e:
+                logger.warning(f"⚠ Renovación del token sin bloqueo entre workers: {e}")
+                yield
+                return
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+class RedisTokenStore:
+    """
+    Token en Redis (o un servidor compatible, p. ej. por socket local), para
+    workers repartidos en varios hosts. Requiere el paquete `redis`.
+    """
+
+    LOCK_TIMEOUT_SECONDS = 30
+
+    def __init__(self, url: Optional[str] = None, key: str = 'anima:spotify:app_token', client=None):
+        if client is None:
+            import redis  # dependencia opcional
+            client = redis.Redis.from_url(url)
+        self.key = key
+        self._client = client
+
+    def for_client(self, client_id: str) -> "RedisTokenStore":
+        return RedisTokenStore(key=f"{self.key}:{client_scope(client_id)}", client=self._client)
+
+    def get(self) -> Optional[Dict]:
+        raw = self._client.get(self.key)
+        return json.loads(raw) if raw else None
+
+    def set(self, token: Dict):
+        ttl = int(token.get('expires_at', 0) - time.time())
+        self._client.set(self.key, json.dumps(token), ex=max(ttl, 1))
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        with self._client.lock(
+            self.key + ':lock',
+            timeout=self.LOCK_TIMEOUT_SECONDS,
+            blocking_timeout=self.LOCK_TIMEOUT_SECONDS
+        ):
+            yield
+
+
+def token_store_from_env():
+    """Construye el almacén indicado en SPOTIFY_TOKEN_STORE (memory, file o redis)."""
+    kind = os.getenv('SPOTIFY_TOKEN_STORE', 'file').lower()
+    if kind == 'redis':
+        url = os.getenv('SPOTIFY_TOKEN_REDIS_URL', 'redis://localhost:6379/0')
+        try:
+            return RedisTokenStore(url)
+        except Exception as e:
+            logger.warning(f"⚠ Token de Spotify sin Redis ({url}): {e}; se usa archivo local")
+            kind = 'file'
+    if kind == 'file':
+        return FileTokenStore(os.getenv('SPOTIFY_TOKEN_FILE') or DEFAULT_TOKEN_FILE)
+    return MemoryTokenStore()
+
+
+class SharedTokenCache(CacheHandler):
+    """
+    CacheHandler de spotipy respaldado por un almacén compartido entre workers.
+
+    - Token vigente: se devuelve sin tocar la red.
+    - Token que vence en menos de `refresh_margin` segundos: se devuelve el
+      actual y se renueva en segundo plano (renovación proactiva).
+    - Sin token o vencido: se renueva en línea.
+
+    La renovación toma el bloqueo del almacén y vuelve a leer el token: si otro
+    worker ya lo renovó, se usa ese y no se pide uno nuevo a Spotify.
+
+    El token se guarda bajo el client_id de la credencial (`for_client`): dos
+    aplicaciones distintas sobre el mismo almacén nunca comparten token.
+    """
+
+    REFRESH_MARGIN_SECONDS = 300
+    # spotipy considera vencido un token al que le queda menos de un minuto
+    EXPIRY_MARGIN_SECONDS = 60
+    # Métodos de SpotifyClientCredentials con los que se pide un token nuevo
+    AUTH_METHODS = ('_request_access_token', '_add_custom_values_to_token_info')
+
+    def __init__(self, store=None, refresh_margin: Optional[float] = None, client_id: Optional[str] = None):
+        self._base_store = store if store is not None else token_store_from_env()
+        self.store = self._base_store
+        if client_id:
+            self._scope(client_id)
+        self.refresh_margin = float(
+            refresh_margin if refresh_margin is not None
+            else os.getenv('SPOTIFY_TOKEN_REFRESH_MARGIN', self.REFRESH_MARGIN_SECONDS)
+        )
+        self._fetch: Optional[Callable[[], Dict]] = None
+        self._refreshing = threading.Lock()
+        self._refresher_stop = threading.Event()
+        self._refresher_thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+
+    def _scope(self, client_id: str):
+        if hasattr(self._base_store, 'for_client'):
+            self.store = self._base_store.for_client(client_id)
+
+    def bind(self, auth_manager) -> "SharedTokenCache":
+        """
+        Usa `auth_manager` (SpotifyClientCredentials) para pedir tokens nuevos, con su client_id.
+
+        Se apoya en métodos privados de spotipy: si faltan (otra versión), se
+        avisa y la caché queda como una caché normal, sin renovación compartida.
+        """
+        client_id = getattr(auth_manager, 'client_id', None)
+        if client_id:
+            self._scope(client_id)
+        missing = [name for name in self.AUTH_METHODS if not callable(getattr(auth_manager, name, None))]
+        if missing:
+            logger.warning(
+                f"⚠ Renovación compartida del token de Spotify desactivada: "
+                f"{type(auth_manager).__name__} no tiene {', '.join(missing)}"
+            )
+            return self
+
+        def fetch() -> Dict:
+            token = auth_manager._request_access_token()
+            return auth_manager._add_custom_values_to_token_info(token)
+
+        self._fetch = fetch
+        return self
+
+    @staticmethod
+    def _expires_in(token: Optional[Dict]) -> float:
+        if not token:
+            return 0.0
+        return token.get('expires_at', 0) - time.time()
+
+    # ============ INTERFAZ DE SPOTIPY ============
+
+    def get_cached_token(self) -> Optional[Dict]:
+        token = self.store.get()
+        expires_in = self._expires_in(token)
+        if self._fetch is None or expires_in > self.refresh_margin:
+            return token
+        if expires_in > self.EXPIRY_MARGIN_SECONDS:
+            self._refresh_in_background()
+            return token
+        return self.refresh()
+
+    def save_token_to_cache(self, token_info: Dict):
+        self.store.set(token_info)
+
+    # ============ RENOVACIÓN ============
+
+    def refresh(self, force: bool = False) -> Optional[Dict]:
+        """Renueva el token bajo el bloqueo del almacén, salvo que otro worker ya lo hiciera."""
+        if self._fetch is None:
+            return self.store.get()
+        with self.store.lock():
+            token = self.store.get()
+            if not force and self._expires_in(token) > self.refresh_margin:
+                return token
+            try:
+                token = self._fetch()
+            except Exception as e:
+                logger.warning(f"⚠ No se pudo renovar el token de Spotify: {e}")
+                return token
+            self.store.set(token)
+            self.refreshes += 1
+        logger.info(f"🔑 Token de aplicación de Spotify renovado (vence en {int(self._expires_in(token))}s)")
+        return token
+
+    def _refresh_in_background(self):
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="spotify-token-refresh", daemon=True).start()
+
+    def start_refresher(self):
+        """
+        Mantiene el token renovado antes de que entre en el margen de renovación,
+        para que ninguna petición tenga que esperar a accounts.spotify.com.
+        """
+        if self._fetch is None or (self._refresher_thread and self._refresher_thread.is_alive()):
+            return
+        self._refresher_stop.clear()
+
+        def loop():
+            while not self._refresher_stop.is_set():
+                self.refresh()
+                # Despertar ya dentro del margen, con jitter para que los workers no coincidan
+                wait = self._expires_in(self.store.get()) - self.refresh_margin + random.uniform(1, 15)
+                self._refresher_stop.wait(max(wait, 5.0))
+
+        self._refresher_thread = threading.Thread(target=loop, name="spotify-token-refresher", daemon=True)
+        self._refresher_thread.start()
+
+    def stop_refresher(self):
+        self._refresher_stop.set()
+
+
+# Almacén global del proceso; cada SharedTokenCache usa la parte de su client_id
+spotify_token_store = token_store_from_env()
@@ -7,6 +7,9 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app.models.user import User
+from app.services.spotify_rate_limiter import spotify_rate_limiter
+from app.services.spotify_http import spotify_http
+from app.services.lazy_service import LazyService
 from app.services.spotify_auth_service import spotify_auth_service
 
 logging.basicConfig(level=logging.INFO)
@@ -87,7 +90,8 @@ class SpotifyUserService:
         headers = {"Authorization": f"Bearer {access_token}"}
 
         try:
-            response = requests.get(
+            response = spotify_rate_limiter.call(
+                spotify_http.get,
                 f"{self.SPOTIFY_API_URL}/me",
                 headers=headers,
                 timeout=10
@@ -139,7 +143,8 @@ class SpotifyUserService:
                 "public": public
             }
 
-            create_response = requests.post(
+            create_response = spotify_rate_limiter.call(
+                spotify_http.post,
                 f"{self.SPOTIFY_API_URL}/users/{user.spotify_id}/playlists",
                 json=create_payload,
                 headers=headers,
@@ -167,7 +172,8 @@ class SpotifyUserService:
 
                     add_payload = {"uris": batch}
 
-                    add_response = requests.post(
+                    add_response = spotify_rate_limiter.call(
+                        spotify_http.post,
                         f"{self.SPOTIFY_API_URL}/playlists/{playlist_id}/tracks",
                         json=add_payload,
                         headers=headers,
@@ -249,7 +255,8 @@ class SpotifyUserService:
 
                 payload = {"uris": batch}
 
-                response = requests.post(
+                response = spotify_rate_limiter.call(
+                    spotify_http.post,
                     f"{self.SPOTIFY_API_URL}/playlists/{playlist_id}/tracks",
                     json=payload,
                     headers=headers,
@@ -289,7 +296,8 @@ class SpotifyUserService:
         headers = {"Authorization": f"Bearer {access_token}"}
 
         try:
-            response = requests.get(
+            response = spotify_rate_limiter.call(
+                spotify_http.get,
                 f"{self.SPOTIFY_API_URL}/me/playlists",
                 headers=headers,
                 params={"limit": limit},
@@ -346,7 +354,8 @@ class SpotifyUserService:
         headers = {"Authorization": f"Bearer {access_token}"}
 
         try:
-            response = requests.get(
+            response = spotify_rate_limiter.call(
+                spotify_http.get,
                 f"{self.SPOTIFY_API_URL}/playlists/{playlist_id}",
                 headers=headers,
                 timeout=10
@@ -362,5 +371,5 @@ class SpotifyUserService:
             return False
 
 
-# Instancia global
-spotify_user_service = SpotifyUserService()
+# Instancia global (se construye en el primer uso)
+spotify_user_service = LazyService('spotify_user', SpotifyUserService)
@@ -0,0 +1,146 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.services.db_backoff import DbBackoff
+
+logger = logging.getLogger("track_features_store")
+
+
+class TrackFeaturesStore:
+    """
+    Almacén de audio features por track: LRU en memoria + tabla en Postgres.
+
+    Las features de un track son inmutables, así que no expiran. El nivel
+    persistente es opcional: si la base de datos no responde se salta durante
+    una pausa creciente (`DbBackoff`) y mientras tanto el almacén funciona
+    solo en memoria.
+    """
+
+    DEFAULT_MAX_ENTRIES = 50000
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        session_factory: Optional[Callable] = None,
+        persist: bool = True
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._session_factory = session_factory
+        self._persist = persist
+        self._db_backoff = DbBackoff("Audio features")
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "TrackFeaturesStore":
+        return cls(
+            max_entries=int(os.getenv('TRACK_FEATURES_CACHE_SIZE', cls.DEFAULT_MAX_ENTRIES)),
+            persist=os.getenv('TRACK_FEATURES_PERSIST', 'true').lower() in ('1', 'true', 'yes')
+        )
+
+    def get_many(self, track_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Devuelve las features conocidas (memoria y luego Postgres) de los IDs dados."""
+        found: Dict[str, Dict] = {}
+        missing: List[str] = []
+        requested = list(dict.fromkeys(track_ids))
+
+        with self._lock:
+            for track_id in requested:
+                features = self._entries.get(track_id)
+                if features is not None:
+                    self._entries.move_to_end(track_id)
+                    found[track_id] = features
+                else:
+                    missing.append(track_id)
+
+        if missing:
+            from_db = self._load_from_db(missing)
+            if from_db:
+                self._remember(from_db.values())
+                found.update(from_db)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(requested) - len(found)
+        return found
+
+    def put_many(self, features_list: Iterable[Dict]):
+        """Guarda features recién obtenidas de Spotify en ambos niveles."""
+        valid = [f for f in features_list if f and f.get('id')]
+        if not valid:
+            return
+        self._remember(valid)
+        self._save_to_db(valid)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, features_list: Iterable[Dict]):
+        with self._lock:
+            for features in features_list:
+                self._entries[features['id']] = features
+                self._entries.move_to_end(features['id'])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ============ NIVEL POSTGRES ============
+
+    def _open_session(self):
+        if not self._persist or not self._db_backoff.ready():
+            return None
+        if self._session_factory is None:
+            from app.config.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _load_from_db(self, track_ids: List[str]) -> Dict[str, Dict]:
+        try:
+            db = self._open_session()
+        except Exception as e:
+            self._db_backoff.failed(e)
+            return {}
+        if db is None:
+            return {}
+
+        try:
+            from app.models.track_audio_features import TrackAudioFeatures
+            rows = db.query(TrackAudioFeatures).filter(
+                TrackAudioFeatures.track_id.in_(track_ids)
+            ).all()
+            self._db_backoff.succeeded()
+            return {row.track_id: row.features for row in rows}
+        except Exception as e:
+            db.rollback()
+            self._db_backoff.failed(e)
+            return {}
+        finally:
+            db.close()
+
+    def _save_to_db(self, features_list: List[Dict]):
+        try:
+            db = self._open_session()
+        except Exception as e:
+            self._db_backoff.failed(e)
+            return
+        if db is None:
+            return
+
+        try:
+            from sqlalchemy.dialects.postgresql import insert
+            from app.models.track_audio_features import TrackAudioFeatures
+            stmt = insert(TrackAudioFeatures).values([
+                {'track_id': f['id'], 'features': f} for f in features_list
+            ]).on_conflict_do_nothing(index_elements=['track_id'])
+            db.execute(stmt)
+            db.commit()
+            self._db_backoff.succeeded()
+        except Exception as e:
+            db.rollback()
+            self._db_backoff.failed(e)
+        finally:
+            db.close()
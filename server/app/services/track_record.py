@@ -0,0 +1,145 @@
+"""
+Registro compacto de un track de Spotify.
+
+Las respuestas de búsqueda traen por cada track `available_markets`, el
+objeto de álbum completo y todas las resoluciones de imagen. Los candidatos
+solo necesitan los campos de `TrackResponse` y los que usa la
+diversificación, así que el JSON se reduce una sola vez al ingerirlo y los
+pools, la caché y la selección trabajan sobre `Track`.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_YEAR = 2020
+
+
+def release_year(release_date: Optional[str]) -> int:
+    if not release_date:
+        return DEFAULT_YEAR
+    year = release_date.split('-')[0]
+    return int(year) if year.isdigit() else DEFAULT_YEAR
+
+
+class Track:
+    """Track con solo los campos de `TrackResponse` y de la diversificación."""
+
+    __slots__ = (
+        'id', 'name', 'artists', 'artist_id', 'album', 'album_id', 'album_image',
+        'year', 'preview_url', 'external_url', 'duration_ms', 'popularity'
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str = 'Unknown',
+        artists: Tuple[str, ...] = (),
+        artist_id: Optional[str] = None,
+        album: str = 'Unknown Album',
+        album_id: Optional[str] = None,
+        album_image: Optional[str] = None,
+        year: int = DEFAULT_YEAR,
+        preview_url: Optional[str] = None,
+        external_url: str = '',
+        duration_ms: int = 0,
+        popularity: int = 0
+    ):
+        self.id = id
+        self.name = name
+        self.artists = tuple(artists)
+        self.artist_id = artist_id
+        self.album = album
+        self.album_id = album_id
+        self.album_image = album_image
+        self.year = year
+        self.preview_url = preview_url
+        self.external_url = external_url
+        self.duration_ms = duration_ms
+        self.popularity = popularity
+
+    @classmethod
+    def from_spotify(cls, item: Optional[Dict]) -> Optional["Track"]:
+        """Construye el registro desde el JSON de Spotify; None si no es un track válido."""
+        if not item or not item.get('id'):
+            return None
+        artists = [a for a in (item.get('artists') or []) if a]
+        album = item.get('album') or {}
+        images = album.get('images') or []
+        return cls(
+            id=item['id'],
+            name=item.get('name', 'Unknown'),
+            artists=tuple(a.get('name', 'Unknown') for a in artists),
+            artist_id=artists[0].get('id') if artists else None,
+            album=album.get('name', 'Unknown Album'),
+            album_id=album.get('id'),
+            album_image=images[0].get('url') if images else None,
+            year=release_year(album.get('release_date')),
+            preview_url=item.get('preview_url'),
+            external_url=(item.get('external_urls') or {}).get('spotify', ''),
+            duration_ms=item.get('duration_ms', 0),
+            popularity=item.get('popularity', 0)
+        )
+
+    def to_response(self) -> Dict[str, Any]:
+        """Formato de `TrackResponse`."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'artists': list(self.artists),
+            'album': self.album,
+            'album_image': self.album_image,
+            'preview_url': self.preview_url,
+            'external_url': self.external_url,
+            'duration_ms': self.duration_ms,
+            'popularity': self.popularity
+        }
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Track):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __repr__(self) -> str:
+        return f"<Track(id='{self.id}', name='{self.name}')>"
+
+
+def track_id(track: Any) -> Optional[str]:
+    """ID de un `Track` o de un dict de Spotify."""
+    if isinstance(track, Track):
+        return track.id
+    return track.get('id') if track else None
+
+
+def track_artist(track: Any) -> Optional[str]:
+    """Clave del artista principal (ID o, si falta, nombre) de un `Track` o dict."""
+    if isinstance(track, Track):
+        return track.artist_id or (track.artists[0] if track.artists else None)
+    artists = (track or {}).get('artists') or [{}]
+    first = artists[0] or {}
+    return first.get('id') or first.get('name')
+
+
+def ingest_tracks(items: Any) -> list:
+    """Convierte una lista de JSON de Spotify en `Track`, descartando los inválidos."""
+    tracks = []
+    for item in items or []:
+        track = Track.from_spotify(item)
+        if track is not None:
+            tracks.append(track)
+    return tracks
+
+
+# Serialización para la caché persistente: {"__track__": [valores en orden de __slots__]}
+
+def track_json_default(obj: Any) -> Any:
+    if isinstance(obj, Track):
+        return {'__track__': [getattr(obj, f) for f in Track.__slots__]}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def track_json_hook(obj: Dict) -> Any:
+    values = obj.get('__track__')
+    if values is not None and len(obj) == 1:
+        return Track(*values)
+    return obj
@@ -0,0 +1,54 @@
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger("upload_reader")
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadRejectedError(ValueError):
+    """La subida se rechazó antes de leerla entera."""
+
+
+class UploadTooLargeError(UploadRejectedError):
+    """La subida supera el tamaño máximo permitido."""
+
+
+async def read_upload(
+    file,
+    max_bytes: int,
+    check_head: Optional[Callable[[bytes], Optional[str]]] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> bytearray:
+    """
+    Lee un `UploadFile` por bloques con un tope de tamaño.
+
+    - Si el cliente declaró el tamaño (`file.size`) y supera el tope, se
+      rechaza sin leer nada.
+    - `check_head` recibe el primer bloque (p. ej. para comprobar los magic
+      bytes) y devuelve un mensaje de error o None; basura se rechaza tras leer
+      un solo bloque.
+    - Al pasar de `max_bytes` se deja de leer.
+
+    Los bloques se copian en un único `bytearray` que se devuelve tal cual
+    (sin el `b''.join` final): Pillow, hashlib y boto3 lo aceptan como bytes.
+    """
+    declared = getattr(file, 'size', None)
+    if declared is not None and declared > max_bytes:
+        raise UploadTooLargeError(f"La subida ({declared} bytes) supera el máximo de {max_bytes} bytes")
+
+    buffer = bytearray()
+    first = True
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        if first:
+            first = False
+            error = check_head(chunk) if check_head else None
+            if error:
+                raise UploadRejectedError(error)
+        if len(buffer) + len(chunk) > max_bytes:
+            raise UploadTooLargeError(f"La subida supera el máximo de {max_bytes} bytes")
+        buffer += chunk
+    return buffer
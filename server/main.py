@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.routes import auth_routes, contact_routes
 from app.routes import emotion_routes, music_routes, history_routes, spotify_routes
 import os
+import asyncio
 from dotenv import load_dotenv
 from app.config.database import Base, engine
 import logging
@@ -173,6 +174,37 @@ def on_startup():
     except Exception as e:
         logger.exception("❌ Error creando tablas en el arranque: %s", e)
 
+# Warm-up de servicios externos en segundo plano (el arranque no espera a Spotify/AWS)
+@app.on_event("startup")
+async def warm_up_external_services():
+    if os.getenv("SERVICES_WARMUP", "true").lower() not in ("1", "true", "yes"):
+        return
+    from app.services.lazy_service import warm_up_services
+    app.state.warm_up_task = asyncio.create_task(warm_up_services())
+    logger.info("🔥 Warm-up de servicios lanzado; estado en /health/services")
+
+# Pre-calentar pools de recomendaciones y refrescarlos en segundo plano
+@app.on_event("startup")
+def start_spotify_pools():
+    if os.getenv("SPOTIFY_POOL_PREWARM", "true").lower() not in ("1", "true", "yes"):
+        return
+    try:
+        from app.services.spotify_service import spotify_service
+        spotify_service.start_pool_refresher()
+    except Exception as e:
+        logger.warning(f"⚠ No se pudo iniciar el refresco de pools de Spotify: {e}")
+
+# Mantener el token de aplicación de Spotify renovado antes de que venza
+@app.on_event("startup")
+def start_spotify_token_refresher():
+    if os.getenv("SPOTIFY_TOKEN_PROACTIVE_REFRESH", "true").lower() not in ("1", "true", "yes"):
+        return
+    try:
+        from app.services.spotify_service import spotify_service
+        spotify_service.token_cache.start_refresher()
+    except Exception as e:
+        logger.warning(f"⚠ No se pudo iniciar la renovación del token de Spotify: {e}")
+
 # Health DB endpoint
 @app.get("/health/db")
 def health_db():
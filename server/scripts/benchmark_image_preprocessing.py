@@ -0,0 +1,84 @@
+"""
+Benchmark del preprocesado de imágenes antes de Rekognition.
+
+Para cada imagen compara el envío original con el preprocesado: bytes
+subidos, tiempo de preprocesado y, si hay credenciales de AWS, latencia de
+`detect_faces` y diferencia en la emoción dominante y su confianza.
+
+Uso (desde server/):
+    python scripts/benchmark_image_preprocessing.py fotos/*.jpg
+    python scripts/benchmark_image_preprocessing.py --offline --max-dimension 960 fotos/*.jpg
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.image_preprocessing import ImagePreprocessor  # noqa: E402
+
+
+def detect(service, image_bytes):
+    start = time.perf_counter()
+    result = service.detect_faces_and_emotions(image_bytes)
+    elapsed = (time.perf_counter() - start) * 1000
+    dominant = result.get('dominant_emotion') or {}
+    return elapsed, dominant.get('type'), dominant.get('confidence'), result.get('all_emotions') or {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='+', help="Imágenes a analizar")
+    parser.add_argument('--max-dimension', type=int, default=int(os.getenv('IMAGE_MAX_DIMENSION', 1280)))
+    parser.add_argument('--quality', type=int, default=int(os.getenv('IMAGE_JPEG_QUALITY', 85)))
+    parser.add_argument('--offline', action='store_true', help="No llamar a Rekognition (solo bytes y tiempos)")
+    args = parser.parse_args()
+
+    preprocessor = ImagePreprocessor(max_dimension=args.max_dimension, quality=args.quality)
+    service = None
+    if not args.offline:
+        from app.services.rekognition_service import RekognitionService
+        service = RekognitionService()
+
+    totals = {'original': 0, 'sent': 0, 'aws_original': 0.0, 'aws_sent': 0.0, 'max_delta': 0.0, 'changed': 0}
+    print(f"{'imagen':30} {'KB orig':>8} {'KB env':>8} {'prep ms':>8}", end='')
+    print('' if args.offline else f" {'aws orig':>9} {'aws env':>8} {'emoción':>10} {'Δ conf':>7} {'Δ máx':>6}")
+
+    for path in args.images:
+        with open(path, 'rb') as f:
+            original = f.read()
+        start = time.perf_counter()
+        sent, info = preprocessor.process(original)
+        prep_ms = (time.perf_counter() - start) * 1000
+        totals['original'] += len(original)
+        totals['sent'] += len(sent)
+        line = f"{os.path.basename(path)[:30]:30} {len(original) / 1024:8.0f} {len(sent) / 1024:8.0f} {prep_ms:8.1f}"
+
+        if service is not None:
+            aws_orig, emo_orig, conf_orig, all_orig = detect(service, original)
+            aws_sent, emo_sent, conf_sent, all_sent = detect(service, sent)
+            totals['aws_original'] += aws_orig
+            totals['aws_sent'] += aws_sent
+            delta = (conf_sent or 0) - (conf_orig or 0)
+            # Mayor cambio de confianza entre todas las emociones
+            max_delta = max((abs(all_sent.get(k, 0) - v) for k, v in all_orig.items()), default=0.0)
+            totals['max_delta'] = max(totals['max_delta'], max_delta)
+            if emo_orig != emo_sent:
+                totals['changed'] += 1
+            emotion = emo_sent if emo_orig == emo_sent else f"{emo_orig}->{emo_sent}"
+            line += f" {aws_orig:9.0f} {aws_sent:8.0f} {str(emotion):>10} {delta:+7.2f} {max_delta:6.2f}"
+        print(line)
+
+    n = len(args.images)
+    print()
+    print(f"Bytes subidos: {totals['original'] / 1024:.0f} KB -> {totals['sent'] / 1024:.0f} KB "
+          f"({100 * (1 - totals['sent'] / max(totals['original'], 1)):.0f}% menos)")
+    if service is not None:
+        print(f"Latencia media de detect_faces: {totals['aws_original'] / n:.0f} ms -> {totals['aws_sent'] / n:.0f} ms")
+        print(f"Emoción dominante distinta en {totals['changed']}/{n} imágenes; "
+              f"mayor cambio de confianza: {totals['max_delta']:.2f} puntos")
+
+
+if __name__ == '__main__':
+    main()
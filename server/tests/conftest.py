@@ -9,6 +9,8 @@ import sys
 from urllib.parse import urlparse
 
 import importlib
+import time
+import types
 import pytest
 
 from httpx import Client as HTTPXClient
@@ -78,3 +80,51 @@ def client():
             return _SimpleResponse(404, {'detail': 'Not Found'})
 
     yield _SimpleClient()
+
+
+class FakeClientCredentials:
+    """SpotifyClientCredentials without network: enough for SharedTokenCache.bind."""
+
+    def __init__(self, client_id=None, client_secret=None, cache_handler=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.cache_handler = cache_handler
+
+    def _request_access_token(self):
+        return {'access_token': 'test-token', 'token_type': 'Bearer', 'expires_in': 3600}
+
+    def _add_custom_values_to_token_info(self, token_info):
+        return dict(token_info, expires_at=int(time.time()) + token_info['expires_in'])
+
+
+@pytest.fixture
+def spotify_service_factory(monkeypatch):
+    """Build real SpotifyService instances around a fake spotipy client.
+
+    The service goes through its normal constructor; only the network and the
+    persistent tiers are replaced: spotipy returns `sp`, the app token lives in
+    memory, Postgres/SQLite tiers are off and the rate limiter never waits.
+    Call it as `spotify_service_factory(sp, markets=[...], max_concurrency=4)`;
+    `cache=False` turns the response cache off so every query reaches `sp`.
+    """
+    from app.services.spotify_rate_limiter import SpotifyRateLimiter
+    from app.services.spotify_token_store import MemoryTokenStore
+
+    mod = importlib.import_module('app.services.spotify_service')
+    monkeypatch.setenv('SPOTIFY_CLIENT_ID', 'test-client')
+    monkeypatch.setenv('SPOTIFY_CLIENT_SECRET', 'test-secret')
+    monkeypatch.setenv('TRACK_FEATURES_PERSIST', 'false')
+    monkeypatch.setenv('SPOTIFY_ARTIST_INDEX_PERSIST', 'false')
+    monkeypatch.delenv('SPOTIFY_CACHE_DB', raising=False)
+    monkeypatch.setattr(mod, 'SpotifyClientCredentials', FakeClientCredentials)
+    monkeypatch.setattr(mod, 'spotify_token_store', MemoryTokenStore())
+    monkeypatch.setattr(mod, 'spotify_rate_limiter', SpotifyRateLimiter(rate=1e6, burst=1e6))
+
+    def make(sp, cache=True, **kwargs):
+        monkeypatch.setattr(mod, 'spotipy', types.SimpleNamespace(Spotify=lambda *a, **k: sp))
+        svc = mod.SpotifyService(**kwargs)
+        if not cache:
+            svc.cache = None
+        return svc
+
+    return make
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+
+from app.services.artist_index import ArtistIndex
+
+
+def test_resolve_searches_once_and_normalizes_names():
+    index = ArtistIndex(persist=False)
+    searches = []
+
+    def search(name):
+        searches.append(name)
+        return 'id-adele'
+
+    assert index.resolve('Adele', search) == 'id-adele'
+    assert index.resolve('  adele ', search) == 'id-adele'
+    assert searches == ['Adele']
+    assert len(index) == 1
+
+
+def test_unresolved_names_are_not_stored():
+    index = ArtistIndex(persist=False)
+    assert index.resolve('Nobody', lambda name: None) is None
+    assert len(index) == 0
+
+
+def test_seed_skips_known_and_survives_errors():
+    index = ArtistIndex(persist=False)
+    index.put('Adele', 'id-adele')
+
+    def search(name):
+        if name == 'Broken':
+            raise RuntimeError('429')
+        return f'id-{name}'
+
+    assert index.seed(['Adele', 'Coldplay', 'Broken', 'Coldplay'], search) == 2
+    assert index.get('coldplay') == 'id-Coldplay'
+
+
+def test_loads_persisted_rows_and_disables_on_db_error():
+    rows = [SimpleNamespace(name_key='adele', artist_id='id-adele')]
+
+    class FakeSession:
+        def query(self, model):
+            return SimpleNamespace(all=lambda: rows)
+
+        def execute(self, stmt):
+            raise RuntimeError('db down')
+
+        def commit(self):
+            pass
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    index = ArtistIndex(session_factory=FakeSession)
+    assert index.get('Adele') == 'id-adele'
+
+    index.put('Coldplay', 'id-coldplay')
+    assert index.get('Coldplay') == 'id-coldplay'
+    assert index._db_backoff.ready() is False
+
+
+def test_concurrent_first_use_loads_once_and_retries_after_db_error():
+    import threading
+    import time
+    loads = []
+    ok = threading.Event()
+
+    class FakeSession:
+        def query(self, model):
+            loads.append(1)
+            if not ok.is_set():
+                raise RuntimeError('db down')
+            time.sleep(0.05)
+            return SimpleNamespace(all=lambda: [SimpleNamespace(name_key='adele', artist_id='id-adele')])
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    index = ArtistIndex(session_factory=FakeSession)
+    assert index.get('Adele') is None  # la carga falla: no queda marcada como hecha
+    assert index.get('Adele') is None and len(loads) == 1  # en pausa
+
+    ok.set()
+    index._db_backoff._until = 0.0
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(index.get('Adele'))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ['id-adele'] * 8
+    assert len(loads) == 2
+
+
+def test_top_tracks_skip_artist_search_once_seeded(spotify_service_factory):
+    class FakeSpotify:
+        def __init__(self):
+            self.searches = 0
+            self.top_calls = []
+
+        def search(self, q=None, type=None, limit=10, market=None):
+            self.searches += 1
+            return {'artists': {'items': [{'id': f'id-{q}'}]}}
+
+        def artist_top_tracks(self, artist_id, country=None):
+            self.top_calls.append((artist_id, country))
+            return {'tracks': [{'id': f'top-{artist_id}'}]}
+
+    svc = spotify_service_factory(FakeSpotify())
+
+    seeded = svc.seed_artist_index()
+    searches_after_seed = svc.sp.searches
+    assert seeded == searches_after_seed > 0
+
+    artist = svc.EMOTION_DESCRIPTORS['HAPPY']['artists'][0]
+    assert [t.id for t in svc._get_artist_top_tracks(artist)] == [f'top-id-artist:{artist}']
+    assert [t.id for t in svc._get_artist_top_tracks(artist)] == [f'top-id-artist:{artist}']
+    svc._get_artist_top_tracks(artist, market='GB')
+
+    assert svc.sp.searches == searches_after_seed
+    assert svc.sp.top_calls == [(f'id-artist:{artist}', 'US'), (f'id-artist:{artist}', 'GB')]
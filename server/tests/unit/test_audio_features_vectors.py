@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.services.audio_features_vectors import (
+    compile_filters, features_to_array, feature_means, FEATURE_COLUMNS
+)
+
+# Same thresholds as SpotifyService.EMOTION_FEATURE_FILTERS (kept here so the test
+# does not need to import the service module)
+EMOTION_FEATURE_FILTERS = {
+    'HAPPY': {'min_valence': 0.45, 'min_energy': 0.40, 'tempo_range': (80, 160)},
+    'SAD':   {'max_valence': 0.60, 'max_energy': 0.65, 'tempo_range': (40, 110)},
+    'ANGRY': {'min_energy': 0.60, 'tempo_range': (90, 190)},
+    'CALM':  {'max_energy': 0.55, 'max_tempo': 120},
+    'CONFUSED': {'tempo_range': (60, 150)},
+    'CUSTOM': {'min_danceability': 0.5, 'max_acousticness': 0.4, 'min_acousticness': 0.1},
+}
+
+
+def scalar_passes(f, filters, tol=0.05):
+    """Reference: the original per-track branchy implementation."""
+    val = f.get('valence', 0.5)
+    eng = f.get('energy', 0.5)
+    dnc = f.get('danceability', 0.5)
+    ac = f.get('acousticness', 0.5)
+    tempo = f.get('tempo', 120)
+    if 'min_valence' in filters and val < filters['min_valence'] - tol:
+        return False
+    if 'max_valence' in filters and val > filters['max_valence'] + tol:
+        return False
+    if 'min_energy' in filters and eng < filters['min_energy'] - tol:
+        return False
+    if 'max_energy' in filters and eng > filters['max_energy'] + tol:
+        return False
+    if 'min_danceability' in filters and dnc < filters['min_danceability'] - tol:
+        return False
+    if 'max_acousticness' in filters and ac > filters['max_acousticness'] + tol:
+        return False
+    if 'min_acousticness' in filters and ac < filters['min_acousticness'] - tol:
+        return False
+    if 'tempo_range' in filters:
+        lo, hi = filters['tempo_range']
+        if not (lo - 10 <= tempo <= hi + 10):
+            return False
+    if 'max_tempo' in filters and tempo > filters['max_tempo'] + 10:
+        return False
+    return True
+
+
+@pytest.mark.parametrize('emotion', sorted(EMOTION_FEATURE_FILTERS))
+def test_vector_predicates_match_scalar_reference(emotion):
+    rng = random.Random(emotion)
+    features = []
+    for _ in range(500):
+        f = {
+            'valence': rng.random(),
+            'energy': rng.random(),
+            'danceability': rng.random(),
+            'acousticness': rng.random(),
+            'tempo': rng.uniform(30, 200),
+            'mode': rng.choice([0, 1]),
+        }
+        # some tracks miss fields and fall back to defaults
+        if rng.random() < 0.1:
+            f.pop('tempo')
+        features.append(f)
+
+    filters = EMOTION_FEATURE_FILTERS[emotion]
+    mask = compile_filters(filters)(features_to_array(features))
+    assert mask.tolist() == [scalar_passes(f, filters) for f in features]
+
+
+def test_empty_filters_accept_everything():
+    arr = features_to_array([{'valence': 0.1}, {'energy': 0.9}])
+    assert compile_filters({})(arr).all()
+
+
+def test_feature_means_single_reduction():
+    arr = features_to_array([
+        {'valence': 0.2, 'energy': 0.4, 'tempo': 100, 'mode': 1},
+        {'valence': 0.4, 'energy': 0.8, 'tempo': 140, 'mode': 0},
+    ])
+    means = feature_means(arr)
+    assert set(means) == set(FEATURE_COLUMNS)
+    assert means['valence'] == pytest.approx(0.3)
+    assert means['energy'] == pytest.approx(0.6)
+    assert means['tempo'] == pytest.approx(120)
+    assert means['mode'] == pytest.approx(0.5)
+
+
+def test_feature_means_empty_returns_defaults():
+    means = feature_means(features_to_array([]))
+    assert means['tempo'] == 120.0
+    assert isinstance(features_to_array([]), np.ndarray)
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.blocking_pool import BlockingPool, PoolSaturatedError, pools_stats
+
+
+def test_run_executes_off_the_event_loop():
+    pool = BlockingPool('test-offloop', max_workers=2)
+    loop_thread = threading.get_ident()
+
+    async def main():
+        return await pool.run(threading.get_ident)
+
+    assert asyncio.run(main()) != loop_thread
+    stats = pool.stats()
+    assert stats['completed'] == 1 and stats['queued'] == 0 and stats['active'] == 0
+
+
+def test_slow_call_does_not_stall_the_loop():
+    pool = BlockingPool('test-slow', max_workers=1)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await pool.run(time.sleep, 0.2)
+        task.cancel()
+        return ticks
+
+    # the loop kept ticking while the blocking call ran in the pool
+    assert asyncio.run(main()) >= 5
+
+
+def test_queue_limit_rejects_and_counts():
+    pool = BlockingPool('test-queue', max_workers=1, max_queue=2)
+    release = threading.Event()
+
+    async def main():
+        tasks = [asyncio.create_task(pool.run(release.wait, 2)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert pool.stats()['active'] == 1 and pool.stats()['queued'] == 2
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(lambda: None)
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    stats = pool.stats()
+    assert stats['rejected'] == 1
+    assert stats['completed'] == 3
+    assert stats['max_queue_depth'] >= 2
+
+
+def test_failures_propagate_and_are_counted():
+    pool = BlockingPool('test-fail', max_workers=1)
+
+    def boom():
+        raise ValueError('aws down')
+
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(boom))
+    assert pool.stats()['failed'] == 1
+    assert 'test-fail' in pools_stats()
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv('X_POOL_SIZE', '3')
+    monkeypatch.setenv('X_POOL_MAX_QUEUE', '9')
+    pool = BlockingPool.from_env('test-env', 'X')
+    assert pool.max_workers == 3 and pool.max_queue == 9
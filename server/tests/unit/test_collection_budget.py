@@ -0,0 +1,65 @@
+from app.services.collection_budget import CollectionBudget
+from app.services.track_record import Track
+
+
+def _tracks(prefix, n, artists=None):
+    artists = artists or n
+    return [Track(id=f'{prefix}{i}', artist_id=f'ar-{i % artists}') for i in range(n)]
+
+
+def test_add_dedups_and_counts_artists():
+    budget = CollectionBudget(limit=2)
+    new = budget.add(_tracks('t', 4, artists=2))
+    assert [t.id for t in new] == ['t0', 't1', 't2', 't3']
+    assert budget.add(_tracks('t', 4)) == []
+    assert budget.stats()['tracks'] == 4
+    assert budget.stats()['artists'] == 2
+
+
+def test_add_accepts_spotify_dicts():
+    budget = CollectionBudget(limit=1)
+    new = budget.add([{'id': 'a', 'artists': [{'name': 'X'}]}, {'id': 'a'}, {}])
+    assert len(new) == 1
+    assert budget.artists == {'X'}
+
+
+def test_stops_when_diversity_is_met():
+    budget = CollectionBudget(limit=2)
+    budget.add(_tracks('t', 10, artists=2))
+    assert budget.end_wave(queries=2)
+    assert budget.stop_reason == 'diversity'
+
+
+def test_diversity_needs_enough_artists():
+    budget = CollectionBudget(limit=2)
+    budget.add(_tracks('t', 10, artists=1))
+    # 10 tracks per 2 queries is a good yield, but only one artist: keep going
+    assert not budget.end_wave(queries=2)
+    assert budget.stop_reason is None
+
+
+def test_stops_on_diminishing_returns():
+    budget = CollectionBudget(limit=50)
+    budget.add(_tracks('a', 40))
+    assert not budget.end_wave(queries=4)
+    budget.add(_tracks('a', 41))  # only one new track in the whole wave
+    assert budget.end_wave(queries=4)
+    assert budget.stop_reason == 'diminishing_returns'
+    assert budget.stats()['waves'] == 2
+    assert budget.stats()['queries'] == 8
+
+
+def test_target_count_stops_even_without_limit():
+    budget = CollectionBudget(target_count=3)
+    assert not budget.adaptive
+    budget.add(_tracks('t', 2))
+    assert not budget.end_wave(queries=1)
+    budget.add(_tracks('u', 2))
+    assert budget.end_wave(queries=1)
+    assert budget.stop_reason == 'target_count'
+
+
+def test_non_adaptive_never_stops_for_low_yield():
+    budget = CollectionBudget()
+    assert not budget.end_wave(queries=10)
+    assert not budget.diversity_met()
@@ -0,0 +1,76 @@
+import copy
+import random
+import time
+
+from app.services.diversification import DiversityConfig, diversify
+
+
+def make_tracks(n_artists, per_artist, albums_per_artist=1):
+    tracks = []
+    for a in range(n_artists):
+        for j in range(per_artist):
+            tracks.append({
+                'id': f'{a}-{j}',
+                'artists': [{'name': f'Artist{a}'}],
+                'album': {'name': f'Alb{a}-{j % albums_per_artist}', 'release_date': f'{1990 + j}-01-01'},
+                'popularity': (a * 7 + j) % 100,
+            })
+    return tracks
+
+
+def artist_counts(tracks):
+    counts = {}
+    for t in tracks:
+        name = t['artists'][0]['name']
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def test_does_not_mutate_input():
+    tracks = make_tracks(10, 5)
+    before = copy.deepcopy(tracks)
+    diversify(tracks, limit=10, rng=random.Random(1))
+    assert tracks == before
+
+
+def test_strict_half_then_two_per_artist():
+    tracks = make_tracks(20, 4, albums_per_artist=2)
+    out = diversify(tracks, limit=20, rng=random.Random(2))
+    counts = artist_counts(out)
+    assert len(out) == 20
+    assert max(counts.values()) <= 2
+    # with 20 artists available, the MMR penalty spreads the picks over all of them
+    assert len(counts) == 20
+
+
+def test_fills_limit_when_quotas_cannot_be_met():
+    tracks = make_tracks(2, 10, albums_per_artist=10)
+    out = diversify(tracks, limit=8, rng=random.Random(3))
+    assert len(out) == 8
+    assert sorted(artist_counts(out).values()) == [4, 4]
+
+
+def test_deduplicates_by_id_and_returns_original_objects():
+    tracks = make_tracks(6, 3)
+    dup = dict(tracks[0])
+    out = diversify(tracks + [dup], limit=6, rng=random.Random(4))
+    ids = [t['id'] for t in out]
+    assert len(ids) == len(set(ids))
+    assert all(any(t is o for o in tracks + [dup]) for t in out)
+
+
+def test_pure_relevance_when_lambda_is_one():
+    tracks = make_tracks(1, 30, albums_per_artist=30)
+    config = DiversityConfig(mmr_lambda=1.0, random_weight=0.0, year_weight=0.0,
+                             max_per_artist=100, max_per_album=100, strict_fraction=0.0)
+    out = diversify(tracks, limit=5, config=config, rng=random.Random(5))
+    top = sorted(tracks, key=lambda t: t['popularity'], reverse=True)[:5]
+    assert {t['id'] for t in out} == {t['id'] for t in top}
+
+
+def test_scales_to_large_pools():
+    tracks = make_tracks(2000, 10, albums_per_artist=3)
+    start = time.time()
+    out = diversify(tracks, limit=100, rng=random.Random(6))
+    assert len(out) == 100
+    assert time.time() - start < 2.0
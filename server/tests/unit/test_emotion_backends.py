@@ -0,0 +1,176 @@
+import io
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.emotion_backends import (
+    EmotionBackend, EmotionBackendUnavailableError, EmotionRouter, OnnxEmotionBackend, RekognitionBackend
+)
+
+
+def ok(emotion, confidence=90.0):
+    return {
+        'success': True,
+        'faces_detected': 1,
+        'dominant_emotion': {'type': emotion, 'confidence': confidence},
+        'all_emotions': {emotion: confidence}
+    }
+
+
+class FakeBackend(EmotionBackend):
+    def __init__(self, name, result=None, error=None, available=True, delay=0.0):
+        self.name = name
+        self._result = result
+        self._error = error
+        self._available = available
+        self._delay = delay
+        self.calls = 0
+
+    @property
+    def available(self):
+        return self._available
+
+    def detect_faces_and_emotions(self, image_bytes):
+        self.calls += 1
+        time.sleep(self._delay)
+        if self._error:
+            raise self._error
+        return self._result
+
+
+def test_default_mode_only_calls_rekognition():
+    remote, local = FakeBackend('rekognition', ok('HAPPY')), FakeBackend('onnx', ok('SAD'))
+    router = EmotionRouter(remote, local)
+
+    result = router.detect_faces_and_emotions(b'img')
+
+    assert result['dominant_emotion']['type'] == 'HAPPY' and result['backend'] == 'rekognition'
+    assert local.calls == 0
+
+
+def test_local_first_serves_local_and_falls_back_on_failure():
+    remote = FakeBackend('rekognition', ok('HAPPY'))
+    router = EmotionRouter(remote, FakeBackend('onnx', ok('SAD')), mode='local_first')
+    assert router.detect_faces_and_emotions(b'img')['backend'] == 'onnx'
+    assert remote.calls == 0
+
+    for local in (FakeBackend('onnx', error=RuntimeError('onnx')),
+                  FakeBackend('onnx', {'success': False, 'error': 'No se detectó ningún rostro en la imagen'}),
+                  FakeBackend('onnx', ok('SAD'), available=False)):
+        router = EmotionRouter(remote, local, mode='local_first')
+        assert router.detect_faces_and_emotions(b'img')['backend'] == 'rekognition'
+
+
+def test_local_mode_without_models_raises_unavailable():
+    remote = FakeBackend('rekognition', ok('HAPPY'))
+    router = EmotionRouter(remote, OnnxEmotionBackend(), mode='local')
+
+    with pytest.raises(EmotionBackendUnavailableError):
+        router.detect_faces_and_emotions(b'img')
+
+    assert remote.calls == 0
+    assert router.stats()['local_available'] is False
+
+
+def test_onnx_availability_is_checked_once(monkeypatch, tmp_path):
+    for name in ('face.onnx', 'emotion.onnx'):
+        (tmp_path / name).write_bytes(b'')
+    backend = OnnxEmotionBackend(str(tmp_path / 'face.onnx'), str(tmp_path / 'emotion.onnx'))
+    checks = []
+    monkeypatch.setattr(backend, '_check_available', lambda: checks.append(1) or False)
+
+    assert backend.available is False
+    assert backend.available is False
+    assert len(checks) == 1
+
+
+def test_backends_must_implement_detection():
+    class Incomplete(EmotionBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_shadow_mode_answers_with_rekognition_and_compares_in_background():
+    local = FakeBackend('onnx', ok('HAPPY'))
+    router = EmotionRouter(FakeBackend('rekognition', ok('HAPPY')), local, mode='shadow')
+
+    result = router.detect_faces_and_emotions(b'img')
+    router._shadow_executor.shutdown(wait=True)
+
+    assert result['backend'] == 'rekognition'
+    stats = router.stats()
+    assert stats['shadow_runs'] == 1 and stats['shadow_agreement'] == 1.0
+
+
+def test_shadow_mode_skips_when_a_comparison_is_already_running():
+    local = FakeBackend('onnx', ok('SAD'), delay=0.2)
+    router = EmotionRouter(FakeBackend('rekognition', ok('HAPPY')), local, mode='shadow')
+
+    router.detect_faces_and_emotions(b'a')
+    router.detect_faces_and_emotions(b'b')
+    router._shadow_executor.shutdown(wait=True)
+
+    stats = router.stats()
+    assert stats['shadow_runs'] == 1 and stats['shadow_skipped'] == 1
+    assert stats['shadow_agreement'] == 0.0
+
+
+def test_unknown_mode_falls_back_to_rekognition():
+    assert EmotionRouter(FakeBackend('rekognition'), mode='gpu').mode == 'rekognition'
+
+
+def test_rekognition_backend_delegates_to_service():
+    service = SimpleNamespace(detect_faces_and_emotions=lambda b: ok('CALM'))
+    assert RekognitionBackend(service).detect_faces_and_emotions(b'x')['dominant_emotion']['type'] == 'CALM'
+
+
+class FakeSession:
+    def __init__(self, outputs):
+        self._outputs = outputs
+        self.inputs = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name='input')]
+
+    def run(self, names, feeds):
+        self.inputs.append(feeds['input'])
+        return self._outputs
+
+
+def test_onnx_backend_maps_ferplus_output_to_rekognition_shape():
+    scores = np.array([[[0.1, 0.95], [0.2, 0.9], [0.9, 0.1]]], dtype=np.float32)
+    boxes = np.array([[[0.2, 0.2, 0.6, 0.7], [0.22, 0.21, 0.61, 0.7], [0.0, 0.0, 0.1, 0.1]]], dtype=np.float32)
+    # neutral, happiness, surprise, sadness, anger, disgust, fear, contempt
+    logits = np.array([[1.0, 4.0, 0.5, 0.0, 0.0, 0.0, 0.0, 0.0]], dtype=np.float32)
+    backend = OnnxEmotionBackend()
+    backend._detector = FakeSession([scores, boxes])
+    backend._classifier = FakeSession([logits])
+    image = io.BytesIO()
+    Image.new('RGB', (640, 480), (120, 100, 90)).save(image, format='JPEG')
+
+    result = backend.detect_faces_and_emotions(image.getvalue())
+
+    assert result['success'] is True
+    assert result['faces_detected'] == 1  # las dos cajas solapadas son el mismo rostro
+    assert result['dominant_emotion']['type'] == 'HAPPY'
+    assert set(result['all_emotions']) == {'CALM', 'HAPPY', 'SURPRISED', 'SAD', 'ANGRY', 'DISGUSTED', 'FEAR'}
+    assert abs(sum(result['all_emotions'].values()) - 100) < 0.1
+    assert backend._detector.inputs[0].shape == (1, 3, 240, 320)
+    assert backend._classifier.inputs[0].shape == (1, 1, 64, 64)
+
+
+def test_onnx_backend_without_faces():
+    backend = OnnxEmotionBackend()
+    backend._detector = FakeSession([np.array([[[0.9, 0.1]]]), np.array([[[0.1, 0.1, 0.5, 0.5]]])])
+    backend._classifier = FakeSession([])
+    image = io.BytesIO()
+    Image.new('RGB', (64, 64)).save(image, format='PNG')
+
+    result = backend.detect_faces_and_emotions(image.getvalue())
+
+    assert result == {'success': False, 'error': 'No se detectó ningún rostro en la imagen', 'faces_detected': 0}
@@ -1,6 +1,7 @@
 import importlib
 from types import SimpleNamespace
 import asyncio
+import json
 
 import pytest
 from fastapi import HTTPException
@@ -11,15 +12,55 @@ class FakeUploadFile:
         self._data = data
         self.filename = filename
         self.content_type = content_type
+        self.reads = 0
+        self._pos = 0
 
-    async def read(self):
-        return self._data
+    async def read(self, size=-1):
+        # Igual que UploadFile: read(n) devuelve como mucho n bytes, b'' al final
+        self.reads += 1
+        end = len(self._data) if size is None or size < 0 else self._pos + size
+        chunk, self._pos = self._data[self._pos:end], min(end, len(self._data))
+        return chunk
+
+
+@pytest.fixture(autouse=True)
+def empty_result_cache():
+    # Las pruebas reutilizan los mismos bytes: sin vaciar la caché se servirían resultados de otra prueba
+    from app.services.emotion_result_cache import emotion_result_cache
+    emotion_result_cache.clear()
+    yield
+    emotion_result_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def route_to_patched_rekognition(monkeypatch):
+    # El controlador analiza a través de emotion_router: en modo 'rekognition' se delega en el
+    # rekognition_service del módulo del controlador, que cada prueba sustituye por un doble
+    from app.services import emotion_backends
+
+    class ControllerRekognition:
+        def detect_faces_and_emotions(self, image_bytes):
+            controller = importlib.import_module('app.controllers.emotion_controller')
+            return controller.rekognition_service.detect_faces_and_emotions(image_bytes)
+
+    monkeypatch.setattr(emotion_backends, 'emotion_router', emotion_backends.EmotionRouter(
+        remote=emotion_backends.RekognitionBackend(ControllerRekognition())
+    ))
 
 
 def make_db():
     return SimpleNamespace()
 
 
+def fake_prefetcher(monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(
+        'app.controllers.emotion_controller.recommendation_prefetcher',
+        SimpleNamespace(schedule=lambda user_id, emotion: scheduled.append((user_id, emotion)))
+    )
+    return scheduled
+
+
 # Why/what: tests for analyze_emotion covering validation, rekognition errors, DB save success and DB save failure
 
 def test_analyze_emotion_validation_fail(monkeypatch):
@@ -64,11 +105,14 @@ def test_analyze_emotion_success_and_db_save(monkeypatch):
     saved = SimpleNamespace(id=777)
     monkeypatch.setattr('app.controllers.emotion_controller.HistoryService', SimpleNamespace(create_emotion_analysis=lambda user_id, analysis_data, db: saved))
 
+    scheduled = fake_prefetcher(monkeypatch)
+
     res = asyncio.run(mod.EmotionController.analyze_emotion(file, 'user42', db=make_db()))
 
     assert res.success is True
     assert res.faces_detected == 1
     assert res.dominant_emotion.type == 'HAPPY'
+    assert scheduled == [('user42', 'HAPPY')]
 
 
 def test_analyze_emotion_db_save_fails_but_returns_result(monkeypatch):
@@ -90,9 +134,351 @@ def test_analyze_emotion_db_save_fails_but_returns_result(monkeypatch):
 
     monkeypatch.setattr('app.controllers.emotion_controller.HistoryService', SimpleNamespace(create_emotion_analysis=raise_save))
 
+    fake_prefetcher(monkeypatch)
+
     res = asyncio.run(mod.EmotionController.analyze_emotion(file, 'u', db=make_db()))
 
     # Should still return a successful analysis model despite DB failure
     assert res.success is True
     assert res.faces_detected == 2
 
+
+
+def test_analyze_emotion_returns_503_when_rekognition_pool_is_saturated(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    from app.services.blocking_pool import PoolSaturatedError
+
+    async def saturated(fn, *args, **kwargs):
+        raise PoolSaturatedError('full')
+
+    monkeypatch.setattr('app.controllers.emotion_controller.rekognition_service', SimpleNamespace(validate_image=lambda b: {'valid': True}, detect_faces_and_emotions=lambda b: None))
+    monkeypatch.setattr('app.controllers.emotion_controller.rekognition_pool', SimpleNamespace(run=saturated))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(mod.EmotionController.analyze_emotion(FakeUploadFile(b'imagebytes'), 'u', db=make_db()))
+
+    assert exc.value.status_code == 503
+
+
+def test_analyze_emotion_returns_503_when_local_backend_is_unavailable(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    from app.services.emotion_backends import EmotionRouter, OnnxEmotionBackend
+
+    monkeypatch.setattr('app.controllers.emotion_controller.rekognition_service', SimpleNamespace(validate_image=lambda b: {'valid': True}))
+    monkeypatch.setattr(mod, 'emotion_router', EmotionRouter(None, OnnxEmotionBackend(), mode='local'))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(mod.EmotionController.analyze_emotion(FakeUploadFile(b'imagebytes'), 'u', db=make_db()))
+
+    assert exc.value.status_code == 503
+
+
+def test_analyze_emotion_repeated_upload_is_served_from_cache(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    fake_prefetcher(monkeypatch)
+    calls = []
+
+    def detect(b):
+        calls.append(b)
+        return {
+            'success': True,
+            'faces_detected': 1,
+            'dominant_emotion': {'type': 'HAPPY', 'confidence': 91.0},
+            'all_emotions': {'HAPPY': 91.0},
+            'face_details': {}
+        }
+
+    monkeypatch.setattr('app.controllers.emotion_controller.rekognition_service', SimpleNamespace(validate_image=lambda b: {'valid': True}, detect_faces_and_emotions=detect))
+    saved = []
+    monkeypatch.setattr('app.controllers.emotion_controller.HistoryService', SimpleNamespace(create_emotion_analysis=lambda user_id, analysis_data, db: saved.append(analysis_data) or SimpleNamespace(id=1)))
+
+    first = asyncio.run(mod.EmotionController.analyze_emotion(FakeUploadFile(b'imagebytes'), 'u', db=make_db()))
+    second = asyncio.run(mod.EmotionController.analyze_emotion(FakeUploadFile(b'imagebytes'), 'u', db=make_db()))
+
+    assert len(calls) == 1
+    assert first.dominant_emotion.type == second.dominant_emotion.type == 'HAPPY'
+    assert [a.photo_metadata['cached'] for a in saved] == [False, True]
+
+
+def test_cache_hits_are_served_while_rekognition_pool_is_saturated(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    fake_prefetcher(monkeypatch)
+    from app.services.blocking_pool import PoolSaturatedError
+
+    detect = lambda b: {
+        'success': True,
+        'faces_detected': 1,
+        'dominant_emotion': {'type': 'SAD', 'confidence': 77.0},
+        'all_emotions': {'SAD': 77.0},
+        'face_details': {}
+    }
+    monkeypatch.setattr('app.controllers.emotion_controller.rekognition_service', SimpleNamespace(validate_image=lambda b: {'valid': True}, detect_faces_and_emotions=detect))
+    monkeypatch.setattr('app.controllers.emotion_controller.HistoryService', SimpleNamespace(create_emotion_analysis=lambda user_id, analysis_data, db: SimpleNamespace(id=1)))
+    asyncio.run(mod.EmotionController.analyze_emotion(FakeUploadFile(b'imagebytes'), 'u', db=make_db()))
+
+    async def saturated(fn, *args, **kwargs):
+        raise PoolSaturatedError('full')
+
+    monkeypatch.setattr('app.controllers.emotion_controller.rekognition_pool', SimpleNamespace(run=saturated))
+    res = asyncio.run(mod.EmotionController.analyze_emotion(FakeUploadFile(b'imagebytes'), 'u', db=make_db()))
+
+    assert res.dominant_emotion.type == 'SAD'
+
+
+def test_analyze_emotions_batch_bounds_concurrency_and_saves_once(monkeypatch):
+    import threading
+    import time
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    monkeypatch.setattr(mod, 'BATCH_CONCURRENCY', 2)
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def detect(b):
+        with lock:
+            in_flight.append(b)
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(b)
+        if b == b'noface':
+            return {'success': False, 'error': 'No se detectaron rostros en la imagen'}
+        return {
+            'success': True,
+            'faces_detected': 1,
+            'dominant_emotion': {'type': 'CALM', 'confidence': 70.0},
+            'all_emotions': {'CALM': 70.0}
+        }
+
+    monkeypatch.setattr('app.controllers.emotion_controller.rekognition_service', SimpleNamespace(
+        validate_image=lambda b: {'valid': b != b'bad', 'error': 'Formato no soportado'},
+        detect_faces_and_emotions=detect
+    ))
+    saves = []
+    monkeypatch.setattr('app.controllers.emotion_controller.HistoryService', SimpleNamespace(
+        create_emotion_analyses=lambda user_id, analyses, db: saves.append(analyses) or [f'id{i}' for i in range(len(analyses))]
+    ))
+
+    files = [FakeUploadFile(b'img%d' % i, filename=f'{i}.jpg') for i in range(5)]
+    files.insert(2, FakeUploadFile(b'bad'))
+    files.append(FakeUploadFile(b'noface'))
+
+    res = asyncio.run(mod.EmotionController.analyze_emotions_batch(files, 'u', db=make_db()))
+
+    assert (res.total, res.succeeded, res.failed) == (7, 5, 2)
+    assert max(peak) <= 2
+    assert len(saves) == 1 and len(saves[0]) == 5
+    assert [r.index for r in res.results] == list(range(7))
+    assert res.results[2].success is False and res.results[2].error == 'Formato no soportado'
+    assert res.results[6].error == 'No se detectaron rostros en la imagen'
+    assert [r.analysis_id for r in res.results if r.success] == ['id0', 'id1', 'id2', 'id3', 'id4']
+
+
+def test_analyze_emotions_batch_rejects_too_many_images(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    monkeypatch.setattr(mod, 'BATCH_MAX_IMAGES', 2)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(mod.EmotionController.analyze_emotions_batch([FakeUploadFile(b'x')] * 3, 'u', db=make_db()))
+
+    assert exc.value.status_code == 400
+
+
+def test_analyze_emotion_rejects_junk_after_first_chunk(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    rek = importlib.import_module('app.services.rekognition_service').RekognitionService
+    monkeypatch.setattr('app.controllers.emotion_controller.rekognition_service', SimpleNamespace(validate_image=lambda b: rek.validate_image(None, b)))
+    file = FakeUploadFile(b'GIF89a' + b'\0' * (1024 * 1024))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(mod.EmotionController.analyze_emotion(file, 'u', db=make_db()))
+
+    assert exc.value.status_code == 400
+    assert file.reads == 1
+
+
+def test_analyze_emotion_stops_reading_oversized_upload(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    monkeypatch.setattr(mod, 'UPLOAD_MAX_MB', 1)
+    rek = importlib.import_module('app.services.rekognition_service').RekognitionService
+    monkeypatch.setattr('app.controllers.emotion_controller.rekognition_service', SimpleNamespace(validate_image=lambda b: rek.validate_image(None, b)))
+    file = FakeUploadFile(b'\xff\xd8\xff' + b'\0' * (50 * 1024 * 1024))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(mod.EmotionController.analyze_emotion(file, 'u', db=make_db()))
+
+    assert exc.value.status_code == 413
+    assert file.reads <= 1024 * 1024 // (64 * 1024) + 1
+
+
+class FakeWebSocket:
+    def __init__(self, messages, headers=None):
+        self._messages = list(messages)
+        self.headers = headers or {}
+        self.sent = []
+        self.accepted = False
+        self.subprotocol = None
+        self.closed = None
+
+    async def accept(self, subprotocol=None):
+        self.accepted = True
+        self.subprotocol = subprotocol
+
+    async def receive(self):
+        await asyncio.sleep(0.01)  # deja terminar el análisis en curso, como un cliente a ~100 fps
+        if self._messages:
+            return self._messages.pop(0)
+        return {'type': 'websocket.disconnect'}
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=None):
+        self.closed = code
+
+
+def auth_message(token='token'):
+    return {'type': 'websocket.receive', 'text': json.dumps({'type': 'auth', 'token': token})}
+
+
+def jpeg(size=(64, 48), color=(90, 90, 90)):
+    import io as _io
+    from PIL import Image
+    out = _io.BytesIO()
+    Image.new('RGB', size, color).save(out, format='JPEG')
+    return out.getvalue()
+
+
+def test_stream_emotions_rejects_invalid_token(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    monkeypatch.setattr(mod.EmotionController, '_authenticate_token', staticmethod(lambda token: None))
+
+    ws = FakeWebSocket([], headers={'sec-websocket-protocol': 'bearer, bad'})
+    asyncio.run(mod.EmotionController.stream_emotions(ws))
+    assert ws.accepted is False and ws.closed == 1008
+
+    ws = FakeWebSocket([auth_message('bad')])
+    asyncio.run(mod.EmotionController.stream_emotions(ws))
+    assert ws.closed == 1008 and ws.sent == []
+
+
+def test_stream_emotions_requires_auth_before_frames(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    tokens = []
+    monkeypatch.setattr(mod.EmotionController, '_authenticate_token', staticmethod(lambda token: tokens.append(token) or 'u1'))
+
+    ws = FakeWebSocket([{'type': 'websocket.receive', 'bytes': jpeg()}])
+    asyncio.run(mod.EmotionController.stream_emotions(ws))
+
+    assert tokens == [] and ws.closed == 1008
+
+
+def test_stream_emotions_accepts_the_bearer_subprotocol(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    tokens = []
+    monkeypatch.setattr(mod.EmotionController, '_authenticate_token', staticmethod(lambda token: tokens.append(token) or 'u1'))
+
+    ws = FakeWebSocket([{'type': 'websocket.receive', 'text': '{"type": "stop"}'}],
+                       headers={'sec-websocket-protocol': 'bearer, jwt123'})
+    asyncio.run(mod.EmotionController.stream_emotions(ws))
+
+    assert tokens == ['jwt123'] and ws.subprotocol == 'bearer'
+    assert [m['type'] for m in ws.sent] == ['ready', 'summary']
+
+
+def test_stream_emotions_closes_on_oversized_or_invalid_frames(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    monkeypatch.setattr(mod.EmotionController, '_authenticate_token', staticmethod(lambda token: 'u1'))
+    monkeypatch.setattr(mod, 'STREAM_MAX_FRAME_BYTES', 1000)
+    calls = []
+    monkeypatch.setattr(mod, 'emotion_router', SimpleNamespace(detect_faces_and_emotions=lambda b: calls.append(b)))
+
+    big = FakeWebSocket([auth_message(), {'type': 'websocket.receive', 'bytes': b'\xff\xd8\xff' + b'\0' * 2000}])
+    asyncio.run(mod.EmotionController.stream_emotions(big))
+    assert big.closed == 1009
+
+    invalid = FakeWebSocket([auth_message(), {'type': 'websocket.receive', 'bytes': b'not an image'}])
+    asyncio.run(mod.EmotionController.stream_emotions(invalid))
+    assert invalid.closed == 1003
+
+    assert calls == []
+    assert [m['type'] for m in big.sent + invalid.sent] == ['ready', 'ready']
+
+
+def test_stream_emotions_sends_changes_and_saves_only_the_summary(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    monkeypatch.setattr(mod.EmotionController, '_authenticate_token', staticmethod(lambda token: 'u1'))
+    saved = []
+    monkeypatch.setattr(mod.EmotionController, '_save_stream_summary',
+                        staticmethod(lambda user_id, summary: saved.append((user_id, summary)) or SimpleNamespace(id='s1')))
+    monkeypatch.setenv('EMOTION_STREAM_MIN_INTERVAL_MS', '0')
+    calls = []
+
+    def detect(b):
+        calls.append(b)
+        return {'success': True, 'faces_detected': 1, 'all_emotions': {'CALM': 80.0, 'HAPPY': 20.0},
+                'dominant_emotion': {'type': 'CALM', 'confidence': 80.0}}
+
+    monkeypatch.setattr(mod, 'emotion_router', SimpleNamespace(detect_faces_and_emotions=detect))
+
+    still = jpeg()
+    ws = FakeWebSocket([auth_message()] + [{'type': 'websocket.receive', 'bytes': still}] * 3
+                       + [{'type': 'websocket.receive', 'text': '{"type": "stop"}'}])
+
+    asyncio.run(mod.EmotionController.stream_emotions(ws))
+
+    types = [m['type'] for m in ws.sent]
+    assert types == ['ready', 'emotion', 'summary']
+    assert len(calls) == 1  # fotogramas idénticos: solo se analiza el primero
+    assert len(saved) == 1 and saved[0][0] == 'u1'
+    assert saved[0][1]['dominant_emotion'] == 'CALM'
+    assert ws.sent[-1]['summary']['analysis_id'] == 's1'
+
+
+def test_stream_gate_runs_outside_the_rekognition_pool_and_saturation_is_counted(monkeypatch):
+    from app.services.blocking_pool import PoolSaturatedError
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    monkeypatch.setattr(mod.EmotionController, '_authenticate_token', staticmethod(lambda token: 'u1'))
+    monkeypatch.setenv('EMOTION_STREAM_MIN_INTERVAL_MS', '0')
+    pooled = []
+
+    async def saturated(fn, *args, **kwargs):
+        pooled.append(fn.__name__)
+        raise PoolSaturatedError('full')
+
+    monkeypatch.setattr(mod, 'rekognition_pool', SimpleNamespace(run=saturated))
+    still = jpeg()
+    ws = FakeWebSocket([auth_message()] + [{'type': 'websocket.receive', 'bytes': still}] * 3
+                       + [{'type': 'websocket.receive', 'text': '{"type": "stop"}'}])
+
+    asyncio.run(mod.EmotionController.stream_emotions(ws))
+
+    # solo el primer fotograma pasa el filtro; los idénticos no llegan al pool
+    assert pooled == ['analyze']
+    frames = ws.sent[-1]['frames']
+    assert frames['received'] == 3 and frames['skipped'] == 3 and frames['analyzed'] == 0
+
+
+def test_stream_reports_failed_analyses_before_replacing_them(monkeypatch, caplog):
+    import logging
+    mod = importlib.reload(importlib.import_module('app.controllers.emotion_controller'))
+    monkeypatch.setattr(mod.EmotionController, '_authenticate_token', staticmethod(lambda token: 'u1'))
+    monkeypatch.setenv('EMOTION_STREAM_MIN_INTERVAL_MS', '0')
+    monkeypatch.setattr(mod, 'emotion_router', SimpleNamespace(detect_faces_and_emotions=lambda b: {
+        'success': True, 'faces_detected': 1, 'all_emotions': {'CALM': 80.0},
+        'dominant_emotion': {'type': 'CALM', 'confidence': 80.0}}))
+
+    class DroppingWebSocket(FakeWebSocket):
+        async def send_json(self, data):
+            if data.get('type') == 'emotion':
+                raise ConnectionError('client gone')
+            await super().send_json(data)
+
+    idle = [{'type': 'websocket.receive', 'text': '{"type": "ping"}'}] * 20  # deja terminar el primer análisis
+    ws = DroppingWebSocket([auth_message(), {'type': 'websocket.receive', 'bytes': jpeg()}] + idle
+                           + [{'type': 'websocket.receive', 'bytes': jpeg(color=(200, 10, 10))}])
+
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(mod.EmotionController.stream_emotions(ws))
+
+    assert 'Error en el análisis de un fotograma: client gone' in caplog.text
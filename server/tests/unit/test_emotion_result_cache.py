@@ -0,0 +1,97 @@
+import io
+import time
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from app.services.emotion_result_cache import EmotionResultCache, perceptual_hash
+
+
+def encode(img, **kwargs):
+    out = io.BytesIO()
+    img.save(out, format='JPEG', **kwargs)
+    return out.getvalue()
+
+
+def face_like(seed=0, size=(640, 480)):
+    # Imagen con estructura (gradientes y bloques) para que el hash perceptual sea estable
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 255, (6, 8, 3), dtype=np.uint8)
+    return Image.fromarray(blocks).resize(size, Image.BILINEAR)
+
+
+def result(emotion='HAPPY'):
+    return {
+        'success': True,
+        'faces_detected': 1,
+        'dominant_emotion': {'type': emotion, 'confidence': 90.0},
+        'all_emotions': {emotion: 90.0}
+    }
+
+
+def test_exact_hit_returns_a_copy_of_the_stored_result():
+    cache = EmotionResultCache()
+    image = encode(face_like())
+
+    cached, fp = cache.lookup(image, 'u1')
+    assert cached is None
+    cache.store(fp, result())
+
+    hit, _ = cache.lookup(image, 'other-user')
+    assert hit['dominant_emotion']['type'] == 'HAPPY'
+    hit['dominant_emotion']['type'] = 'SAD'
+    again, _ = cache.lookup(image, 'u1')
+    assert again['dominant_emotion']['type'] == 'HAPPY'
+    assert cache.stats()['exact_hits'] == 2
+
+
+def test_recompressed_upload_hits_by_perceptual_hash_for_the_same_user_only():
+    cache = EmotionResultCache(phash_threshold=6)
+    img = face_like()
+    _, fp = cache.lookup(encode(img, quality=95), 'u1')
+    cache.store(fp, result())
+
+    resized = encode(img.resize((320, 240)).filter(ImageFilter.GaussianBlur(1)), quality=60)
+    hit, _ = cache.lookup(resized, 'u1')
+    assert hit is not None and cache.stats()['perceptual_hits'] == 1
+
+    other_user, _ = cache.lookup(resized, 'u2')
+    assert other_user is None
+
+
+def test_different_photo_misses():
+    cache = EmotionResultCache(phash_threshold=6)
+    _, fp = cache.lookup(encode(face_like(seed=1)), 'u1')
+    cache.store(fp, result())
+
+    hit, _ = cache.lookup(encode(face_like(seed=2)), 'u1')
+    assert hit is None
+
+
+def test_failed_results_are_not_cached():
+    cache = EmotionResultCache()
+    _, fp = cache.lookup(b'not an image', 'u1')
+    cache.store(fp, {'success': False, 'error': 'No se detectaron rostros'})
+    assert len(cache) == 0
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    cache = EmotionResultCache(max_entries=2, ttl=10, phash_threshold=0)
+    for data in (b'a', b'b'):
+        _, fp = cache.lookup(data)
+        cache.store(fp, result())
+    cache.lookup(b'a')  # 'a' pasa a ser la más reciente
+    _, fp = cache.lookup(b'c')
+    cache.store(fp, result())
+
+    assert cache.lookup(b'b')[0] is None
+    assert cache.lookup(b'a')[0] is not None
+
+    now = time.time()
+    monkeypatch.setattr('app.services.emotion_result_cache.time.time', lambda: now + 11)
+    assert cache.lookup(b'a')[0] is None
+
+
+def test_perceptual_hash_of_undecodable_bytes_is_none():
+    assert perceptual_hash(b'imagebytes') is None
+    assert isinstance(perceptual_hash(encode(face_like())), int)
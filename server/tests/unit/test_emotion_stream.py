@@ -0,0 +1,93 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.services.emotion_stream import EmotionSmoother, EmotionStreamSession, FrameGate
+
+
+def frame(level=0, noise_seed=None):
+    data = np.full((120, 160, 3), level, dtype=np.uint8)
+    if noise_seed is not None:
+        data[:40, :40] = np.random.default_rng(noise_seed).integers(0, 255, (40, 40, 3), dtype=np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(data).save(out, format='JPEG', quality=90)
+    return out.getvalue()
+
+
+def emotions(**values):
+    return {'success': True, 'faces_detected': 1, 'all_emotions': values,
+            'dominant_emotion': {'type': max(values, key=values.get), 'confidence': max(values.values())}}
+
+
+def test_gate_skips_unchanged_frames_until_heartbeat():
+    gate = FrameGate(min_interval=0.5, max_interval=5.0, diff_threshold=8.0)
+    still = frame(100)
+
+    assert gate.check(still, now=0.0) == (True, 'first')
+    assert gate.check(frame(200), now=0.2) == (False, 'interval')
+    assert gate.check(still, now=1.0) == (False, 'unchanged')
+    assert gate.check(frame(180), now=1.5) == (True, 'changed')
+    assert gate.check(frame(180), now=7.0) == (True, 'heartbeat')
+    assert gate.check(b'not an image', now=20.0) == (False, 'invalid')
+
+
+def test_smoother_needs_several_frames_to_flip_dominant():
+    smoother = EmotionSmoother(alpha=0.4)
+    smoother.update({'HAPPY': 90.0, 'SAD': 10.0})
+    smoother.update({'HAPPY': 10.0, 'SAD': 90.0})
+    assert smoother.dominant()[0] == 'HAPPY'
+    smoother.update({'HAPPY': 10.0, 'SAD': 90.0})
+    assert smoother.dominant()[0] == 'SAD'
+
+
+def test_session_pushes_only_dominant_changes_and_summarizes():
+    results = iter([
+        emotions(HAPPY=90.0, SAD=10.0),
+        emotions(HAPPY=80.0, SAD=20.0),
+        emotions(HAPPY=5.0, SAD=95.0),
+        emotions(HAPPY=5.0, SAD=95.0),
+    ])
+    session = EmotionStreamSession(detect=lambda b: next(results), gate=FrameGate(min_interval=0, diff_threshold=1.0),
+                                   smoother=EmotionSmoother(alpha=0.6))
+
+    updates = [session.process(frame(level * 40, noise_seed=level)) for level in range(4)]
+    assert [u['dominant_emotion']['type'] if u else None for u in updates] == ['HAPPY', None, 'SAD', None]
+
+    summary = session.summary()
+    assert summary['frames']['analyzed'] == 4
+    assert [step['emotion'] for step in summary['timeline']] == ['HAPPY', 'SAD']
+    assert set(summary['all_emotions']) == {'HAPPY', 'SAD'}
+
+
+def test_summary_averages_raw_frame_scores_not_the_smoothed_vector():
+    results = iter([emotions(HAPPY=100.0, SAD=0.0), emotions(HAPPY=0.0, SAD=100.0)])
+    session = EmotionStreamSession(detect=lambda b: next(results), gate=FrameGate(min_interval=0, diff_threshold=1.0),
+                                   smoother=EmotionSmoother(alpha=0.2))
+
+    session.process(frame(0, noise_seed=1))
+    session.process(frame(200, noise_seed=2))
+
+    assert session.summary()['all_emotions'] == {'HAPPY': 50.0, 'SAD': 50.0}
+
+
+def test_session_skips_oversized_frames_and_counts_faceless_ones():
+    session = EmotionStreamSession(detect=lambda b: {'success': False, 'error': 'sin rostro'},
+                                   gate=FrameGate(min_interval=0), max_frame_bytes=10_000)
+
+    assert session.process(b'\xff\xd8\xff' + b'\0' * 20_000) is None
+    assert session.process(frame(50)) is None
+    session.drop()
+
+    assert session.stats() == {'received': 3, 'analyzed': 0, 'skipped': 2, 'no_face': 1, 'errors': 0}
+    assert session.summary() is None
+
+
+def test_drop_after_admit_counts_the_frame_once():
+    session = EmotionStreamSession(detect=lambda b: emotions(HAPPY=90.0), gate=FrameGate(min_interval=0))
+
+    assert session.admit(frame(10)) is True
+    session.drop(admitted=True)
+    assert session.admit(frame(10)) is False
+
+    assert session.stats() == {'received': 2, 'analyzed': 0, 'skipped': 2, 'no_face': 0, 'errors': 0}
@@ -105,6 +105,13 @@ class FakeDB:
         self.add_called = True
         self._last_added = obj
 
+    def add_all(self, objs):
+        self.added_all = list(objs)
+
+    def flush(self):
+        for i, obj in enumerate(getattr(self, 'added_all', [])):
+            obj.id = f'generated-{i}'
+
     def commit(self):
         if hasattr(self, 'commit_raises') and self.commit_raises:
             raise Exception('db commit failed')
@@ -194,6 +201,36 @@ def test_create_emotion_analysis_db_error(monkeypatch):
     assert fake_db.rollback_called is True
 
 
+def test_create_emotion_analyses_single_transaction(monkeypatch):
+    from app.services.history_service import HistoryService
+    from app.schemas.history_schemas import EmotionAnalysisCreate
+
+    class SimpleAnalysis:
+        def __init__(self, **kw):
+            for k, v in kw.items():
+                setattr(self, k, v)
+            self.id = None
+
+    monkeypatch.setattr('app.services.history_service.EmotionAnalysis', SimpleAnalysis)
+    fake_db = FakeDB()
+    payloads = [
+        EmotionAnalysisCreate(dominant_emotion=e, confidence=80.0, emotion_details={e: 80.0}, photo_metadata={})
+        for e in ('HAPPY', 'SAD', 'CALM')
+    ]
+
+    ids = HistoryService.create_emotion_analyses('u1', payloads, fake_db)
+
+    assert ids == ['generated-0', 'generated-1', 'generated-2']
+    assert [a.dominant_emotion for a in fake_db.added_all] == ['HAPPY', 'SAD', 'CALM']
+    assert fake_db.commit_called is True
+
+    failing = FakeDB()
+    failing.commit_raises = True
+    with pytest.raises(HTTPException):
+        HistoryService.create_emotion_analyses('u1', payloads, failing)
+    assert failing.rollback_called is True
+
+
 def test_get_user_analyses_pagination_and_filters():
     from app.services.history_service import HistoryService
 
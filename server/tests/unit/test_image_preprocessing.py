@@ -0,0 +1,75 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_preprocessing import ImagePreprocessor
+
+
+def encode(img, fmt='JPEG', **kwargs):
+    out = io.BytesIO()
+    img.save(out, format=fmt, **kwargs)
+    return out.getvalue()
+
+
+def noisy(width, height, mode='RGB'):
+    channels = len(mode)
+    data = np.random.default_rng(0).integers(0, 255, (height, width, channels), dtype=np.uint8)
+    return Image.fromarray(data.squeeze(), mode)
+
+
+def test_large_photo_is_downscaled_and_reencoded():
+    original = encode(noisy(4000, 3000), quality=95)
+    pre = ImagePreprocessor(max_dimension=1024, quality=80)
+
+    data, info = pre.process(original)
+
+    assert info['processed'] is True
+    assert info['original_size'] == [4000, 3000]
+    assert info['size'] == [1024, 768]
+    assert len(data) < len(original) / 5
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.format == 'JPEG' and img.size == (1024, 768)
+
+
+def test_small_image_is_sent_untouched():
+    original = encode(noisy(200, 150), quality=80)
+    data, info = ImagePreprocessor(max_dimension=1024).process(original)
+    assert data is original
+    assert info['processed'] is False
+
+
+def test_exif_orientation_is_applied_even_when_small():
+    exif = Image.Exif()
+    exif[ImagePreprocessor.EXIF_ORIENTATION_TAG] = 6  # rotated 90° clockwise
+    original = encode(noisy(200, 100), exif=exif)
+
+    data, info = ImagePreprocessor(max_dimension=1024).process(original)
+
+    assert info['processed'] is True
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.size == (100, 200)
+
+
+def test_transparent_png_becomes_jpeg():
+    original = encode(noisy(2000, 2000, mode='RGBA'), fmt='PNG')
+    data, info = ImagePreprocessor(max_dimension=512).process(original)
+    assert info['processed'] is True
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.format == 'JPEG' and img.mode == 'RGB'
+
+
+def test_undecodable_or_disabled_returns_original():
+    data, info = ImagePreprocessor().process(b'not an image')
+    assert data == b'not an image' and info['processed'] is False
+
+    original = encode(noisy(3000, 3000))
+    data, info = ImagePreprocessor(enabled=False).process(original)
+    assert data is original
+
+
+def test_never_returns_a_heavier_image():
+    # a tiny, already well-compressed JPEG over the skip threshold would only grow
+    original = encode(Image.new('RGB', (1500, 1500), (10, 20, 30)), quality=10)
+    data, info = ImagePreprocessor(max_dimension=1400, quality=100, skip_bytes=0).process(original)
+    assert len(data) <= len(original)
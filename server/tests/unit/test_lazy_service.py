@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+from app.services import lazy_service
+from app.services.lazy_service import LazyService, warm_up_services, services_health
+
+
+def test_builds_once_on_first_access(monkeypatch):
+    monkeypatch.setattr(lazy_service, '_registry', {})
+    built = []
+
+    class Service:
+        value = 42
+
+    def factory():
+        built.append(1)
+        return Service()
+
+    proxy = LazyService('demo', factory)
+    assert not proxy.initialized
+    assert built == []
+
+    assert proxy.value == 42
+    assert proxy.value == 42
+    assert built == [1]
+
+
+def test_concurrent_first_access_builds_once(monkeypatch):
+    monkeypatch.setattr(lazy_service, '_registry', {})
+    built = []
+    gate = threading.Event()
+
+    def factory():
+        gate.wait(0.05)
+        built.append(1)
+        return object()
+
+    proxy = LazyService('demo', factory)
+    threads = [threading.Thread(target=proxy.get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert built == [1]
+
+
+def test_setattr_is_forwarded(monkeypatch):
+    monkeypatch.setattr(lazy_service, '_registry', {})
+
+    class Service:
+        pass
+
+    proxy = LazyService('demo', Service)
+    proxy.flag = True
+    assert proxy.get().flag is True
+
+
+def test_warm_up_reports_health_without_raising(monkeypatch):
+    monkeypatch.setattr(lazy_service, '_registry', {})
+
+    def failing_check(_):
+        raise ConnectionError("spotify down")
+
+    def failing_factory():
+        raise ValueError("sin credenciales")
+
+    LazyService('ok', object)
+    LazyService('degraded', object, check=failing_check)
+    LazyService('broken', failing_factory)
+    assert services_health()['ok']['status'] == 'pending'
+
+    report = asyncio.run(warm_up_services())
+
+    assert report['ok']['status'] == 'ok'
+    assert report['degraded']['status'] == 'degraded'
+    assert 'spotify down' in report['degraded']['error']
+    assert report['broken']['status'] == 'error'
+    assert services_health() == report
@@ -66,6 +66,26 @@ def test_get_recommendations_success(monkeypatch):
     assert res.playlist_description == 'desc'
 
 
+def test_get_recommendations_passes_deadline(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.music_controller'))
+    calls = []
+
+    def get_recommendations(e, l, deadline_ms=None):
+        calls.append(deadline_ms)
+        return {
+            'success': True, 'emotion': e, 'tracks': [], 'total': 0, 'genres_used': [],
+            'music_params': {'valence': '0.5', 'energy': '0.5', 'tempo': '100', 'mode': 'Mixto'},
+            'partial': True
+        }
+
+    fake = SimpleNamespace(get_recommendations=get_recommendations, create_playlist_description=lambda e: 'desc')
+    monkeypatch.setattr('app.controllers.music_controller.spotify_service', fake)
+
+    res = mod.MusicController.get_recommendations('HAPPY', limit=2, deadline_ms=800)
+    assert calls == [800]
+    assert res.partial is True
+
+
 def test_create_spotify_playlist_not_connected():
     mod = importlib.reload(importlib.import_module('app.controllers.music_controller'))
     user = make_user(spotify_connected=False)
@@ -111,3 +131,56 @@ def test_get_user_spotify_playlists_success(monkeypatch):
     res = mod.MusicController.get_user_spotify_playlists(user, db=SimpleNamespace(), limit=5)
     assert res['success'] is True
     assert res['total'] == 1
+
+
+def test_get_batch_recommendations_validates_and_delegates(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.music_controller'))
+    from app.schemas.music_schemas import BatchRecommendationsRequest
+    calls = []
+    params = {'valence': '0.5', 'energy': '0.5', 'tempo': '100 BPM', 'mode': 'Mixto'}
+
+    def get_batch_recommendations(emotions, limit=20, blend=False, **options):
+        calls.append((emotions, limit, blend, options))
+        return {
+            'success': True, 'blended': blend,
+            'emotions': [{'emotion': e, 'weight': w} for e, w in emotions],
+            'results': [{'emotion': e, 'weight': w, 'tracks': [], 'total': 0, 'genres_used': [],
+                         'music_params': params} for e, w in emotions]
+        }
+
+    monkeypatch.setattr('app.controllers.music_controller.spotify_service',
+                        SimpleNamespace(get_batch_recommendations=get_batch_recommendations))
+
+    request = BatchRecommendationsRequest(emotions=[{'emotion': 'sad', 'weight': 2}, {'emotion': 'fear'}], limit=5)
+    res = mod.MusicController.get_batch_recommendations(request)
+    assert calls == [([('SAD', 2.0), ('FEAR', 1.0)], 5, False, {})]
+    assert [r.emotion for r in res.results] == ['SAD', 'FEAR']
+
+    timed = BatchRecommendationsRequest(emotions=[{'emotion': 'calm'}], limit=5, deadline_ms=800)
+    mod.MusicController.get_batch_recommendations(timed)
+    assert calls[-1] == ([('CALM', 1.0)], 5, False, {'deadline_ms': 800})
+
+    bad = BatchRecommendationsRequest(emotions=[{'emotion': 'BORED'}])
+    with pytest.raises(Exception) as exc:
+        mod.MusicController.get_batch_recommendations(bad)
+    assert getattr(exc.value, 'status_code', None) == 400
+
+
+def test_get_recommendations_served_from_prefetch(monkeypatch):
+    mod = importlib.reload(importlib.import_module('app.controllers.music_controller'))
+    from app.services.recommendation_prefetch import RecommendationPrefetcher
+
+    params = {'valence': '0.5', 'energy': '0.5', 'tempo': '100 BPM', 'mode': 'Mixto'}
+    payload = {'success': True, 'emotion': 'SAD', 'tracks': [], 'total': 0, 'genres_used': [], 'music_params': params}
+    prefetcher = RecommendationPrefetcher(loader=lambda e, l: payload)
+    prefetcher.schedule('u1', 'SAD')
+    monkeypatch.setattr('app.controllers.music_controller.recommendation_prefetcher', prefetcher)
+
+    def not_called(*a, **k):
+        raise AssertionError('should be served from the prefetch')
+
+    fake = SimpleNamespace(get_recommendations=not_called, create_playlist_description=lambda e: 'desc')
+    monkeypatch.setattr('app.controllers.music_controller.spotify_service', fake)
+
+    res = mod.MusicController.get_recommendations('sad', limit=5, user_id='u1')
+    assert res.emotion == 'SAD' and res.playlist_description == 'desc'
@@ -0,0 +1,19 @@
+from fastapi import FastAPI
+
+
+def test_stream_route_keeps_format_query_parameter(monkeypatch):
+    from app.routes import music_routes
+
+    calls = []
+    monkeypatch.setattr(music_routes.MusicController, 'stream_recommendations',
+                        staticmethod(lambda emotion, limit, fmt, deadline_ms: calls.append((emotion, limit, fmt, deadline_ms)) or 'ok'))
+    app = FastAPI()
+    app.include_router(music_routes.router)
+
+    operation = app.openapi()['paths']['/api/music/recommendations/{emotion}/stream']['get']
+    assert 'format' in [p['name'] for p in operation['parameters']]
+
+    assert music_routes.stream_music_recommendations(
+        'happy', limit=5, response_format='sse', deadline_ms=800, current_user=None
+    ) == 'ok'
+    assert calls == [('happy', 5, 'sse', 800)]
@@ -0,0 +1,119 @@
+import threading
+import time
+
+from app.services.recommendation_prefetch import RecommendationPrefetcher
+
+
+def make_result(emotion, n):
+    return {'success': True, 'emotion': emotion, 'tracks': [{'id': f't{i}'} for i in range(n)], 'total': n}
+
+
+def make_prefetcher(**kwargs):
+    calls = []
+
+    def loader(emotion, limit):
+        calls.append((emotion, limit))
+        return make_result(emotion, limit)
+
+    return RecommendationPrefetcher(loader=loader, **kwargs), calls
+
+
+def test_prefetched_result_is_served_once():
+    prefetcher, calls = make_prefetcher()
+    prefetcher.schedule('u1', 'happy')
+
+    res = prefetcher.take('u1', 'HAPPY', 10)
+    assert res['total'] == 10 and [t['id'] for t in res['tracks']] == [f't{i}' for i in range(10)]
+    assert calls == [('HAPPY', 20)]
+    # single use: a second request goes back to the normal path
+    assert prefetcher.take('u1', 'HAPPY', 10) is None
+    assert prefetcher.stats()['hits'] == 1
+
+
+def test_other_emotion_user_or_bigger_limit_miss():
+    prefetcher, _ = make_prefetcher()
+    prefetcher.schedule('u1', 'SAD')
+
+    assert prefetcher.take('u2', 'SAD', 5) is None
+    assert prefetcher.take('u1', 'HAPPY', 5) is None
+    assert prefetcher.take('u1', 'SAD', 50) is None
+    assert prefetcher.take('u1', 'SAD', 5)['emotion'] == 'SAD'
+
+
+def test_expired_entry_is_not_served():
+    prefetcher, _ = make_prefetcher(ttl=0.01)
+    prefetcher.schedule('u1', 'CALM')
+    time.sleep(0.02)
+    assert prefetcher.take('u1', 'CALM', 5) is None
+
+
+def test_take_waits_for_prefetch_in_flight():
+    release = threading.Event()
+    calls = []
+
+    def loader(emotion, limit):
+        calls.append(emotion)
+        release.wait(2)
+        return make_result(emotion, limit)
+
+    prefetcher = RecommendationPrefetcher(loader=loader)
+    prefetcher.schedule('u1', 'FEAR')
+    threading.Timer(0.05, release.set).start()
+
+    assert prefetcher.take('u1', 'FEAR', 20)['total'] == 20
+    assert calls == ['FEAR']
+
+
+def test_timeout_and_failures_fall_back():
+    def slow(emotion, limit):
+        time.sleep(0.2)
+        return make_result(emotion, limit)
+
+    prefetcher = RecommendationPrefetcher(loader=slow, wait_timeout=0.01)
+    prefetcher.schedule('u1', 'SAD')
+    assert prefetcher.take('u1', 'SAD', 5) is None
+
+    def boom(emotion, limit):
+        raise RuntimeError('spotify down')
+
+    prefetcher = RecommendationPrefetcher(loader=boom)
+    prefetcher.schedule('u1', 'SAD')
+    assert prefetcher.take('u1', 'SAD', 5) is None
+
+
+def test_wait_is_capped_by_the_request_deadline():
+    release = threading.Event()
+
+    def slow(emotion, limit):
+        release.wait(1)
+        return make_result(emotion, limit)
+
+    prefetcher = RecommendationPrefetcher(loader=slow, wait_timeout=5)
+    prefetcher.schedule('u1', 'SAD')
+    started = time.monotonic()
+    assert prefetcher.take('u1', 'SAD', 5, deadline=0.1) is None
+    assert time.monotonic() - started < 0.5
+    release.set()
+
+    assert prefetcher._wait_for(None) == 5
+    assert prefetcher._wait_for(1.0) == 0.5
+    assert RecommendationPrefetcher().wait_timeout < 30
+
+
+def test_latest_analysis_replaces_previous_and_users_are_bounded():
+    prefetcher, calls = make_prefetcher(max_users=2)
+    prefetcher.schedule('u1', 'SAD')
+    prefetcher.schedule('u1', 'HAPPY')
+    assert prefetcher.take('u1', 'SAD', 5) is None
+
+    prefetcher.schedule('u2', 'CALM')
+    prefetcher.schedule('u3', 'CALM')
+    assert prefetcher.stats()['entries'] == 2
+    assert prefetcher.take('u1', 'HAPPY', 5) is None
+
+
+def test_disabled_by_env(monkeypatch):
+    monkeypatch.setenv('RECOMMENDATIONS_PREFETCH', 'false')
+    prefetcher, calls = make_prefetcher()
+    assert prefetcher.schedule('u1', 'HAPPY') is None
+    assert calls == []
@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, n):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'result'
+
+    results, errors = run_concurrently(flight, 'k', fn, 8)
+
+    assert calls == [1]
+    assert results == ['result'] * 8
+    assert errors == []
+    assert flight.stats() == {'in_flight': 0, 'executed': 1, 'shared': 7}
+
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.05)
+        raise RuntimeError('boom')
+
+    results, errors = run_concurrently(flight, 'k', fail, 4)
+    assert results == []
+    assert len(errors) == 4 and all(str(e) == 'boom' for e in errors)
+
+    # Una vez terminada, la siguiente llamada vuelve a ejecutarse
+    assert flight.do('k', lambda: 'ok') == 'ok'
+
+
+def test_distinct_keys_run_independently():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.stats()['executed'] == 2
+    assert not flight.in_flight('a')
+
+
+def test_leader_sees_its_own_exception():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do('k', lambda: (_ for _ in ()).throw(ValueError('x')))
+
+
+def test_start_returns_the_shared_future_without_blocking():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return 'result'
+
+    first = flight.start('k', fn)
+    second = flight.start('k', fn)
+    assert first is second and not first.done()
+    assert flight.in_flight('k')
+
+    release.set()
+    assert first.result(timeout=2) == 'result'
+    assert calls == [1]
+    assert not flight.in_flight('k')
+
+
+def test_do_many_claims_free_keys_and_joins_the_rest():
+    flight = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_a():
+        started.set()
+        release.wait(2)
+        return 'a-from-do'
+
+    leader = threading.Thread(target=lambda: flight.do('a', slow_a))
+    leader.start()
+    started.wait(2)
+
+    claimed = []
+
+    def build(keys):
+        claimed.append(keys)
+        return {key: f'{key}-from-many' for key in keys}
+
+    threading.Timer(0.05, release.set).start()
+    results = flight.do_many(['a', 'b', 'c'], build)
+    leader.join()
+
+    assert claimed == [['b', 'c']]
+    assert results == {'a': 'a-from-do', 'b': 'b-from-many', 'c': 'c-from-many'}
+    assert flight.stats() == {'in_flight': 0, 'executed': 3, 'shared': 1}
+
+
+def test_do_many_shares_errors_with_every_claimed_key():
+    flight = SingleFlight()
+    with pytest.raises(RuntimeError):
+        flight.do_many(['a', 'b'], lambda keys: (_ for _ in ()).throw(RuntimeError('boom')))
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_start_many_runs_claimed_keys_in_background():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def build(keys):
+        release.wait(2)
+        return {key: key.upper() for key in keys}
+
+    futures = flight.start_many(['a', 'b'], build)
+    assert not any(f.done() for f in futures.values())
+    assert flight.start_many(['b'], build)['b'] is futures['b']
+
+    release.set()
+    assert {k: f.result(timeout=2) for k, f in futures.items()} == {'a': 'A', 'b': 'B'}
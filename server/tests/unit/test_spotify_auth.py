@@ -3,8 +3,8 @@ import sys
 import types
 import pytest
 
-# Tests for spotify_auth_service.py import-time validation and token refresh logic.
-def test_import_raises_when_env_missing(monkeypatch):
+# Tests for spotify_auth_service.py credential validation and token refresh logic.
+def test_first_use_raises_when_env_missing(monkeypatch):
     # Ensure env vars and dotenv loading do not provide credentials
     monkeypatch.delenv('SPOTIFY_CLIENT_ID', raising=False)
     monkeypatch.delenv('SPOTIFY_CLIENT_SECRET', raising=False)
@@ -14,17 +14,18 @@ def test_import_raises_when_env_missing(monkeypatch):
     fake_dotenv = types.SimpleNamespace(load_dotenv=lambda *a, **k: False)
     monkeypatch.setitem(sys.modules, 'dotenv', fake_dotenv)
 
-    # reload module and expect ValueError because credentials are missing
+    # import is lazy; the global instance raises ValueError on first use
     sys.modules.pop('app.services.spotify_auth_service', None)
+    mod = importlib.import_module('app.services.spotify_auth_service')
     with pytest.raises(ValueError):
-        importlib.import_module('app.services.spotify_auth_service')
+        mod.spotify_auth_service.get()
 
 
 def test_token_refresh_success(monkeypatch):
     # Provide env vars to allow module import
     monkeypatch.setenv('SPOTIFY_CLIENT_ID', 'id')
     monkeypatch.setenv('SPOTIFY_CLIENT_SECRET', 'secret')
-    # Stub requests.post to return a fake successful token response
+    # Stub spotify_http.post to return a fake successful token response
     import requests as _requests
 
     class FakeResponse:
@@ -36,7 +37,7 @@ def test_token_refresh_success(monkeypatch):
     def fake_post(url, data=None, timeout=None):
         return FakeResponse()
 
-    monkeypatch.setattr('requests.post', fake_post)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post)
 
     # reload module fresh
     sys.modules.pop('app.services.spotify_auth_service', None)
@@ -52,14 +53,14 @@ def test_token_refresh_success(monkeypatch):
 def test_token_refresh_handles_exceptions(monkeypatch):
     monkeypatch.setenv('SPOTIFY_CLIENT_ID', 'id')
     monkeypatch.setenv('SPOTIFY_CLIENT_SECRET', 'secret')
-    # Simulate requests.post throwing a RequestException
+    # Simulate spotify_http.post throwing a RequestException
     import requests as _requests
     from requests.exceptions import RequestException
 
     def fake_post_fail(url, data=None, timeout=None):
         raise RequestException('network error')
 
-    monkeypatch.setattr('requests.post', fake_post_fail)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post_fail)
 
     sys.modules.pop('app.services.spotify_auth_service', None)
     mod = importlib.import_module('app.services.spotify_auth_service')
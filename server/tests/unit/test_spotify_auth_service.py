@@ -61,7 +61,7 @@ def test_get_authorization_url_and_state(monkeypatch):
 
 def test_exchange_code_for_token_success(monkeypatch):
     setup_env(monkeypatch)
-    # stub requests.post
+    # stub spotify_http.post
     def fake_post(url, data=None, timeout=None):
         class R:
             def raise_for_status(self):
@@ -72,7 +72,7 @@ def test_exchange_code_for_token_success(monkeypatch):
 
         return R()
 
-    monkeypatch.setattr('requests.post', fake_post)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post)
 
     mod = importlib.reload(importlib.import_module('app.services.spotify_auth_service'))
     svc = mod.spotify_auth_service
@@ -87,7 +87,7 @@ def test_exchange_code_for_token_failure_raises(monkeypatch):
         # Raise the same exception type the service catches
         raise requests.exceptions.RequestException('net')
 
-    monkeypatch.setattr('requests.post', fake_post_fail)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post_fail)
     mod = importlib.reload(importlib.import_module('app.services.spotify_auth_service'))
     svc = mod.spotify_auth_service
 
@@ -108,7 +108,7 @@ def test_refresh_access_token_success(monkeypatch):
 
         return R()
 
-    monkeypatch.setattr('requests.post', fake_post)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post)
     mod = importlib.reload(importlib.import_module('app.services.spotify_auth_service'))
     svc = mod.spotify_auth_service
 
@@ -123,7 +123,7 @@ def test_refresh_access_token_failure_raises(monkeypatch):
         # Simulate a requests exception that the service will catch
         raise requests.exceptions.RequestException('boom')
 
-    monkeypatch.setattr('requests.post', fake_post_fail)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post_fail)
     mod = importlib.reload(importlib.import_module('app.services.spotify_auth_service'))
     svc = mod.spotify_auth_service
 
@@ -144,7 +144,7 @@ def test_get_spotify_user_info_success_and_failure(monkeypatch):
 
         return R()
 
-    monkeypatch.setattr('requests.get', fake_get)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', fake_get)
     mod = importlib.reload(importlib.import_module('app.services.spotify_auth_service'))
     svc = mod.spotify_auth_service
 
@@ -155,7 +155,7 @@ def test_get_spotify_user_info_success_and_failure(monkeypatch):
         # Simulate requests failure
         raise requests.exceptions.RequestException('net')
 
-    monkeypatch.setattr('requests.get', fake_get_fail)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', fake_get_fail)
     with pytest.raises(HTTPException):
         svc.get_spotify_user_info('t')
 
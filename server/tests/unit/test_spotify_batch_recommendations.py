@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+
+
+def _track(tid, artist):
+    return {'id': tid, 'name': tid, 'artists': [{'id': artist, 'name': artist}],
+            'album': {'name': f'{tid}-album', 'images': [], 'release_date': '2015-01-01'},
+            'external_urls': {'spotify': 'u'}, 'popularity': 40}
+
+
+class RecordingSpotify:
+    def __init__(self, *a, **k):
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def search(self, q=None, type=None, limit=10, market=None):
+        with self._lock:
+            self.queries.append((type, q))
+        if type == 'track':
+            return {'tracks': {'items': [_track(f'{q}-{i}', f'{q}-artist{i}') for i in range(4)]}}
+        if type == 'playlist':
+            return {'playlists': {'items': [{'id': f'pl-{q}'}]}}
+        if type == 'artist':
+            return {'artists': {'items': [{'id': f'ar-{q}'}]}}
+        return {}
+
+    def playlist_items(self, playlist_id, limit=30, market=None):
+        with self._lock:
+            self.queries.append(('playlist_items', playlist_id))
+        return {'items': [{'track': _track(f'{playlist_id}-{i}', f'{playlist_id}-artist{i}')} for i in range(4)]}
+
+    def artist_top_tracks(self, artist_id, country=None):
+        with self._lock:
+            self.queries.append(('top', artist_id))
+        return {'tracks': [_track(f'{artist_id}-top', artist_id)]}
+
+
+def test_overlapping_queries_are_fetched_once(spotify_service_factory):
+    svc = spotify_service_factory(RecordingSpotify(), cache=False)
+
+    res = svc.get_batch_recommendations([('SAD', 2), ('FEAR', 1)], limit=5)
+
+    queries = svc.sp.queries
+    assert len(queries) == len(set(queries))
+    # 'best indie' is planned by both emotions but searched a single time
+    assert queries.count(('playlist', 'best indie')) == 1
+    assert [r['emotion'] for r in res['results']] == ['SAD', 'FEAR']
+    assert all(r['total'] == 5 for r in res['results'])
+    assert res['blended'] is False and 'tracks' not in res
+    assert res['emotions'] == [{'emotion': 'SAD', 'weight': 0.6667}, {'emotion': 'FEAR', 'weight': 0.3333}]
+
+
+def test_batch_publishes_pools_for_later_requests(spotify_service_factory):
+    svc = spotify_service_factory(RecordingSpotify(), cache=False)
+    svc.get_batch_recommendations([('CALM', 1), ('SAD', 1)], limit=5)
+    calls = len(svc.sp.queries)
+
+    assert svc.get_recommendations('CALM', limit=5)['total'] == 5
+    assert len(svc.sp.queries) == calls
+
+
+def test_concurrent_batches_and_requests_share_pool_builds(monkeypatch, spotify_service_factory):
+    svc = spotify_service_factory(RecordingSpotify(), cache=False)
+    release = threading.Event()
+    shared_collections = []
+    original = svc._collect_shared_candidates
+
+    def gated_shared(emotions, markets, **kwargs):
+        shared_collections.append(sorted(emotions))
+        release.wait(2)
+        return original(emotions, markets, **kwargs)
+
+    monkeypatch.setattr(svc, '_collect_shared_candidates', gated_shared)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(svc.get_batch_recommendations([('SAD', 1), ('FEAR', 1)], limit=5))),
+        threading.Thread(target=lambda: results.append(svc.get_batch_recommendations([('FEAR', 1), ('SAD', 1)], limit=5))),
+        threading.Thread(target=lambda: results.append(svc.get_recommendations('SAD', limit=5)))
+    ]
+    threads[0].start()
+    deadline = time.time() + 2
+    while not shared_collections and time.time() < deadline:
+        time.sleep(0.01)
+    for t in threads[1:]:
+        t.start()
+    while svc._pool_flights.stats()['shared'] < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    # one shared crawl for both keys; the second batch and the plain request join it
+    assert shared_collections == [['FEAR', 'SAD']]
+    assert svc._pool_flights.stats() == {'in_flight': 0, 'executed': 2, 'shared': 3}
+    assert len(results) == 3
+
+
+def test_batch_deadline_serves_partial_pools(spotify_service_factory):
+    svc = spotify_service_factory(RecordingSpotify(), cache=False)
+    release = threading.Event()
+    original_search = svc.sp.search
+
+    def search(q=None, type=None, limit=10, market=None):
+        if len(svc.sp.queries) >= 4:
+            release.wait(2)
+        return original_search(q=q, type=type, limit=limit, market=market)
+
+    svc.sp.search = search
+    start = time.time()
+    try:
+        res = svc.get_batch_recommendations([('SAD', 1), ('FEAR', 1)], limit=5, deadline_ms=300)
+    finally:
+        release.set()
+
+    assert time.time() - start < 1.0
+    assert res['partial'] is True
+    assert [r['emotion'] for r in res['results']] == ['SAD', 'FEAR']
+
+
+def test_blend_splits_limit_by_weight(spotify_service_factory):
+    svc = spotify_service_factory(RecordingSpotify(), cache=False)
+
+    res = svc.get_batch_recommendations([('HAPPY', 3), ('SURPRISED', 1)], limit=8, blend=True)
+
+    ids = [t['id'] for t in res['tracks']]
+    assert res['blended'] is True and res['total'] == 8
+    assert len(ids) == len(set(ids))
+    by_emotion = {r['emotion']: r['total'] for r in res['results']}
+    assert by_emotion == {'HAPPY': 6, 'SURPRISED': 2}
+    assert res['music_params']['tempo'].endswith('BPM')
+
+
+def test_quota_allocation_and_interleaving(spotify_service_factory):
+    svc = spotify_service_factory(RecordingSpotify(), cache=False)
+    quotas = svc._allocate_quotas({'A': 0.5, 'B': 0.3, 'C': 0.2}, 7)
+    assert sum(quotas.values()) == 7
+    assert quotas['A'] >= quotas['B'] >= quotas['C']
+
+    selections = {'A': [{'id': 'a1'}, {'id': 'a2'}], 'B': [{'id': 'b1'}]}
+    order = [t['id'] for t in svc._interleave(selections, {'A': 2 / 3, 'B': 1 / 3})]
+    assert order == ['a1', 'b1', 'a2']
+
+
+def test_unknown_emotion_raises(spotify_service_factory):
+    svc = spotify_service_factory(RecordingSpotify(), cache=False)
+    with pytest.raises(ValueError):
+        svc.get_batch_recommendations([('HAPPY', 1), ('BORED', 1)])
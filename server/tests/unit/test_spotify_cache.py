@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from app.services.spotify_cache import SpotifyResponseCache
+
+
+def test_get_set_and_lru_eviction():
+    cache = SpotifyResponseCache(max_entries=2)
+    cache.set('search_tracks', 'pop happy', 'US', 50, [1])
+    cache.set('search_tracks', 'pop sad', 'US', 50, [2])
+    # touch the first entry so the second becomes least recently used
+    assert cache.get('search_tracks', 'pop happy', 'US', 50) == [1]
+    cache.set('search_tracks', 'rock angry', 'US', 50, [3])
+
+    assert len(cache) == 2
+    assert cache.get('search_tracks', 'pop sad', 'US', 50) is None
+    assert cache.get('search_tracks', 'rock angry', 'US', 50) == [3]
+
+
+def test_key_includes_market_and_limit():
+    cache = SpotifyResponseCache()
+    cache.set('search_tracks', 'q', 'US', 50, ['us'])
+    assert cache.get('search_tracks', 'q', 'GB', 50) is None
+    assert cache.get('search_tracks', 'q', 'US', 20) is None
+    assert cache.get('search_tracks', 'q', 'US', 50) == ['us']
+
+
+def test_entries_expire_by_endpoint_ttl(monkeypatch):
+    cache = SpotifyResponseCache(ttls={'search_tracks': 10, 'artist_top_tracks': 1000})
+    now = time.time()
+    monkeypatch.setattr('app.services.spotify_cache.time.time', lambda: now)
+    cache.set('search_tracks', 'q', 'US', 50, ['a'])
+    cache.set('artist_top_tracks', 'Adele', 'US', None, ['b'])
+
+    monkeypatch.setattr('app.services.spotify_cache.time.time', lambda: now + 60)
+    assert cache.get('search_tracks', 'q', 'US', 50) is None
+    assert cache.get('artist_top_tracks', 'Adele', 'US', None) == ['b']
+
+
+def test_get_or_fetch_does_not_cache_errors():
+    cache = SpotifyResponseCache()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise RuntimeError('spotify down')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch('search_tracks', 'q', 'US', 50, failing)
+    assert cache.get('search_tracks', 'q', 'US', 50) is None
+
+    value = cache.get_or_fetch('search_tracks', 'q', 'US', 50, lambda: ['ok'])
+    assert value == ['ok']
+    assert cache.get_or_fetch('search_tracks', 'q', 'US', 50, failing) == ['ok']
+    assert len(calls) == 1
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / 'spotify_cache.sqlite3')
+    first = SpotifyResponseCache(db_path=db_path)
+    first.set('playlist_items', 'pl1', 'US', 30, [{'id': 't1'}])
+
+    second = SpotifyResponseCache(db_path=db_path)
+    assert second.get('playlist_items', 'pl1', 'US', 30) == [{'id': 't1'}]
+    assert second.stats()['persistent'] is True
+
+
+def test_service_fetch_methods_use_cache(spotify_service_factory):
+    class CountingSpotify:
+        def __init__(self):
+            self.calls = 0
+
+        def search(self, q=None, type=None, limit=10, market=None):
+            self.calls += 1
+            if type == 'artist':
+                return {'artists': {'items': [{'id': 'a1'}]}}
+            return {'tracks': {'items': [{'id': 't1'}]}}
+
+        def artist_top_tracks(self, artist_id, country=None):
+            self.calls += 1
+            return {'tracks': [{'id': 'top1'}]}
+
+    svc = spotify_service_factory(CountingSpotify())
+
+    assert [t.id for t in svc._safe_search_tracks('pop happy', limit=50, market='US')] == ['t1']
+    assert [t.id for t in svc._safe_search_tracks('pop happy', limit=50, market='US')] == ['t1']
+    assert [t.id for t in svc._get_artist_top_tracks('Adele')] == ['top1']
+    assert [t.id for t in svc._get_artist_top_tracks('Adele')] == ['top1']
+    assert svc.sp.calls == 3
+
+
+def test_memory_hits_do_not_wait_for_sqlite_writes(tmp_path):
+    import threading
+
+    cache = SpotifyResponseCache(db_path=str(tmp_path / 'cache.db'))
+    cache.set('search_tracks', 'warm', 'US', 50, ['hit'])
+
+    # Simula un disco lento: la escritura queda bloqueada con el cerrojo de SQLite tomado
+    cache._db_lock.acquire()
+    writer = threading.Thread(target=cache.set, args=('search_tracks', 'cold', 'US', 50, ['new']))
+    writer.start()
+    try:
+        result = []
+        reader = threading.Thread(target=lambda: result.append(cache.get('search_tracks', 'warm', 'US', 50)))
+        reader.start()
+        reader.join(timeout=2)
+        assert result == [['hit']]
+    finally:
+        cache._db_lock.release()
+        writer.join(timeout=2)
+
+    assert cache.get('search_tracks', 'cold', 'US', 50) == ['new']
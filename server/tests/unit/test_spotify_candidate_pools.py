@@ -0,0 +1,185 @@
+import threading
+import time
+
+
+class CountingSpotify:
+    def __init__(self, *a, **k):
+        self.calls = 0
+
+    def search(self, q=None, type=None, limit=10, market=None):
+        self.calls += 1
+        if type == 'track':
+            return {'tracks': {'items': [
+                {'id': f'{q}-{i}', 'name': q, 'artists': [{'name': f'{q}-artist{i}'}],
+                 'album': {'name': f'{q}-album', 'images': [], 'release_date': '2015-01-01'},
+                 'external_urls': {'spotify': 'u'}, 'popularity': 40}
+                for i in range(3)
+            ]}}
+        if type == 'playlist':
+            return {'playlists': {'items': []}}
+        if type == 'artist':
+            return {'artists': {'items': []}}
+        return {}
+
+
+def test_recommendations_are_served_from_warm_pool(spotify_service_factory):
+    svc = spotify_service_factory(CountingSpotify(), cache=False)
+
+    first = svc.get_recommendations('HAPPY', limit=5)
+    calls_after_first = svc.sp.calls
+    second = svc.get_recommendations('HAPPY', limit=5)
+
+    assert first['total'] == 5 and second['total'] == 5
+    assert calls_after_first > 0
+    assert svc.sp.calls == calls_after_first
+
+
+def test_stale_pool_is_served_and_refreshed_in_background(spotify_service_factory):
+    svc = spotify_service_factory(CountingSpotify(), cache=False)
+    svc.get_recommendations('SAD', limit=5)
+    key = next(iter(svc._pools))
+    built_at, pool = svc._pools[key]
+    svc._pools[key] = (built_at - svc.pool_ttl - 1, pool)
+    calls_before = svc.sp.calls
+
+    res = svc.get_recommendations('SAD', limit=5)
+    assert res['total'] == 5
+
+    deadline = time.time() + 2
+    while (key in svc._refreshing or svc._pools[key][0] < built_at) and time.time() < deadline:
+        time.sleep(0.01)
+    assert svc._pools[key][0] >= built_at
+    assert svc.sp.calls > calls_before
+
+
+def test_empty_refresh_keeps_previous_pool(monkeypatch, spotify_service_factory):
+    svc = spotify_service_factory(CountingSpotify(), cache=False)
+    descriptors = svc.EMOTION_DESCRIPTORS['CALM']
+    key = svc._pool_key('CALM', descriptors['genres'], svc.markets)
+    svc._pools[key] = (0, [{'id': 'keep'}])
+    monkeypatch.setattr(svc, '_collect_diverse_candidates', lambda **k: [])
+
+    assert svc._build_pool(key, descriptors) == [{'id': 'keep'}]
+
+
+def test_pool_refresher_prewarms_every_emotion(spotify_service_factory):
+    svc = spotify_service_factory(CountingSpotify(), cache=False)
+    svc.start_pool_refresher(interval=60)
+    try:
+        deadline = time.time() + 5
+        while len(svc._pools) < len(svc.EMOTION_DESCRIPTORS) and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(svc._pools) == len(svc.EMOTION_DESCRIPTORS)
+    finally:
+        svc.stop_pool_refresher()
+
+
+def test_concurrent_cold_requests_share_one_collection(monkeypatch, spotify_service_factory):
+    svc = spotify_service_factory(CountingSpotify(), cache=False)
+    collections = []
+    release = threading.Event()
+    original = svc._collect_diverse_candidates
+
+    def slow_collect(**kwargs):
+        collections.append(1)
+        release.wait(2)
+        return original(**kwargs)
+
+    monkeypatch.setattr(svc, '_collect_diverse_candidates', slow_collect)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(svc.get_recommendations('FEAR', limit=5)))
+        for _ in range(6)
+    ]
+    for t in threads:
+        t.start()
+    deadline = time.time() + 2
+    while svc._pool_flights.stats()['shared'] < 5 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert collections == [1]
+    assert len(results) == 6 and all(r['total'] == 5 for r in results)
+    assert svc._pool_flights.stats() == {'in_flight': 0, 'executed': 1, 'shared': 5}
+
+
+def test_deadline_returns_partial_results_and_keeps_building(spotify_service_factory):
+    svc = spotify_service_factory(CountingSpotify(), cache=False)
+    release = threading.Event()
+    original_search = svc.sp.search
+
+    def search(q=None, type=None, limit=10, market=None):
+        # the first few searches answer at once, the rest hang until released
+        if svc.sp.calls >= 3:
+            release.wait(2)
+        return original_search(q=q, type=type, limit=limit, market=market)
+
+    svc.sp.search = search
+    start = time.time()
+    res = svc.get_recommendations('HAPPY', limit=5, deadline_ms=300)
+    elapsed = time.time() - start
+
+    assert elapsed < 1.0
+    assert res['partial'] is True
+    assert 0 < res['total'] <= 5
+
+    # the build keeps going and publishes the full pool for the next request
+    release.set()
+    deadline = time.time() + 3
+    while not svc._pools and time.time() < deadline:
+        time.sleep(0.01)
+    second = svc.get_recommendations('HAPPY', limit=5, deadline_ms=300)
+    assert second['partial'] is False and second['total'] == 5
+
+
+def test_deadline_requests_wait_on_the_flight_without_extra_threads(monkeypatch, spotify_service_factory):
+    svc = spotify_service_factory(CountingSpotify(), cache=False)
+    release = threading.Event()
+    original = svc._collect_diverse_candidates
+
+    def gated_collect(**kwargs):
+        release.wait(2)
+        return original(**kwargs)
+
+    monkeypatch.setattr(svc, '_collect_diverse_candidates', gated_collect)
+    try:
+        results = [svc.get_recommendations('ANGRY', limit=5, deadline_ms=100) for _ in range(3)]
+        builders = [t for t in threading.enumerate() if t.name.startswith('spotify-pool-')]
+    finally:
+        release.set()
+
+    assert all(r['partial'] is True for r in results)
+    # the three requests share one build and one builder thread
+    assert svc._pool_flights.stats()['executed'] == 1
+    assert len(builders) == 1
+
+
+def test_deadline_is_not_partial_when_pool_is_ready(spotify_service_factory):
+    svc = spotify_service_factory(CountingSpotify(), cache=False)
+    res = svc.get_recommendations('CALM', limit=5, deadline_ms=5000)
+    assert res['partial'] is False and res['total'] == 5
+    assert svc.get_recommendations('CALM', limit=5)['partial'] is False
+
+
+def test_pool_build_timeout_cancels_slow_strategies(spotify_service_factory):
+    svc = spotify_service_factory(CountingSpotify(), cache=False)
+    svc.pool_build_timeout = 0.2
+    release = threading.Event()
+    original_search = svc.sp.search
+
+    def search(q=None, type=None, limit=10, market=None):
+        if type == 'playlist':
+            release.wait(2)  # one slow strategy must not hold the whole build
+        return original_search(q=q, type=type, limit=limit, market=market)
+
+    svc.sp.search = search
+    start = time.time()
+    try:
+        res = svc.get_recommendations('SAD', limit=5)
+    finally:
+        release.set()
+
+    assert time.time() - start < 1.0
+    assert res['total'] == 5
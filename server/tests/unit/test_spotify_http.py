@@ -0,0 +1,63 @@
+import threading
+
+from app.services.spotify_http import SpotifyHttpClient
+
+
+class FakeResponse:
+    status_code = 200
+
+
+def test_session_is_shared_and_pooled():
+    client = SpotifyHttpClient(pool_connections=2, pool_maxsize=7, pool_block=True)
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(client.session)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(s) for s in sessions}) == 1
+    adapter = client.session.get_adapter('https://api.spotify.com/v1/me')
+    assert adapter._pool_maxsize == 7
+    assert adapter._pool_block is True
+
+
+def test_retry_policy_only_retries_idempotent_methods():
+    client = SpotifyHttpClient(max_retries=2)
+    retry = client.session.get_adapter('https://accounts.spotify.com/api/token').max_retries
+
+    assert retry.total == 2
+    assert 'GET' in retry.allowed_methods and 'PUT' in retry.allowed_methods
+    assert 'POST' not in retry.allowed_methods
+    assert 429 not in retry.status_forcelist
+    assert 503 in retry.status_forcelist
+
+
+def test_verbs_go_through_the_shared_session(monkeypatch):
+    client = SpotifyHttpClient()
+    calls = []
+    monkeypatch.setattr(
+        client.session, 'request',
+        lambda method, url, **kw: calls.append((method, url, kw)) or FakeResponse()
+    )
+
+    client.get('https://api.spotify.com/v1/me', headers={'a': 'b'}, timeout=10)
+    client.post('https://api.spotify.com/v1/playlists/p/tracks', json={'uris': []}, timeout=10)
+
+    assert calls[0] == ('GET', 'https://api.spotify.com/v1/me', {'headers': {'a': 'b'}, 'timeout': 10})
+    assert calls[1][0] == 'POST'
+
+
+def test_close_drops_the_session():
+    client = SpotifyHttpClient()
+    first = client.session
+    client.close()
+    assert client.session is not first
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv('SPOTIFY_HTTP_POOL_MAXSIZE', '32')
+    monkeypatch.setenv('SPOTIFY_HTTP_POOL_BLOCK', 'true')
+    monkeypatch.setenv('SPOTIFY_HTTP_MAX_RETRIES', '1')
+    client = SpotifyHttpClient.from_env()
+    assert client.pool_maxsize == 32 and client.pool_block is True and client.max_retries == 1
@@ -1,4 +1,5 @@
 import importlib
+import time
 import types
 import pytest
 
@@ -38,8 +39,14 @@ class FakeSpotifyFull:
 
 
 class FakeCredentials:
-    def __init__(self, *args, **kwargs):
-        pass
+    def __init__(self, *args, client_id=None, **kwargs):
+        self.client_id = client_id
+
+    def _request_access_token(self):
+        return {'access_token': 'test-token', 'token_type': 'Bearer', 'expires_in': 3600}
+
+    def _add_custom_values_to_token_info(self, token_info):
+        return dict(token_info, expires_at=int(time.time()) + token_info['expires_in'])
 
 
 def _patch_spotipy(monkeypatch, spotify_impl):
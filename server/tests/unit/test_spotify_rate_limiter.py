@@ -0,0 +1,177 @@
+import pytest
+
+from app.services.spotify_rate_limiter import RateLimitTimeoutError, SpotifyRateLimiter, build_spotify_session
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Fake429(Exception):
+    def __init__(self, headers=None):
+        super().__init__("rate limited")
+        self.http_status = 429
+        self.headers = headers
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def make_limiter(clock, **kwargs):
+    return SpotifyRateLimiter(sleep=clock.sleep, clock=clock.time, **kwargs)
+
+
+def test_burst_then_throttles_to_rate():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=2, burst=3)
+
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == []
+
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_retry_after_from_exception_blocks_and_retries():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=10, burst=10)
+    calls = []
+
+    def fn():
+        calls.append(clock.now)
+        if len(calls) == 1:
+            raise Fake429(headers={'Retry-After': '3'})
+        return 'ok'
+
+    assert limiter.call(fn) == 'ok'
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 3
+    assert limiter.current_rate < 10
+
+
+def test_retry_after_from_response_status():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=10, burst=10)
+    responses = [FakeResponse(429, {'Retry-After': '2'}), FakeResponse(200)]
+
+    result = limiter.call(lambda: responses.pop(0))
+
+    assert result.status_code == 200
+    assert sum(clock.sleeps) >= 2
+
+
+def test_backoff_without_header_and_gives_up_after_max_retries():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=10, burst=10, max_retries=2)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise Fake429()
+
+    with pytest.raises(Fake429):
+        limiter.call(fn)
+    assert len(calls) == 3
+    assert sum(clock.sleeps) >= 1 + 2
+
+
+def test_final_429_response_is_returned_without_raising_the_rate():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=10, burst=10, max_retries=1)
+
+    result = limiter.call(lambda: FakeResponse(429, {'Retry-After': '1'}))
+
+    assert result.status_code == 429
+    assert limiter.current_rate == 5  # solo se penaliza el primer 429; el último no recupera el ritmo
+
+
+def test_other_errors_are_not_retried():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        limiter.call(fn)
+    assert len(calls) == 1
+
+
+def test_rate_recovers_after_successes():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=10, burst=10)
+    limiter.penalize(0)
+    assert limiter.current_rate == 5
+
+    for _ in range(20):
+        limiter.reward()
+    assert limiter.current_rate == 10
+
+
+def test_large_retry_after_is_clamped():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=10, burst=10, max_retry_after=60, max_wait=None)
+    limiter.penalize(3600)
+
+    limiter.acquire()
+
+    assert sum(clock.sleeps) == pytest.approx(60)
+
+
+def test_acquire_raises_instead_of_waiting_past_the_timeout():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=10, burst=10)
+    limiter.penalize(20)
+
+    with pytest.raises(RateLimitTimeoutError):
+        limiter.acquire(timeout=5)
+    assert clock.sleeps == []
+
+    limiter.acquire(timeout=30)
+    assert sum(clock.sleeps) == pytest.approx(20)
+
+
+def test_call_gives_up_when_the_block_outlasts_max_wait():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=10, burst=10, max_wait=5)
+    calls = []
+    limiter.penalize(30)
+
+    with pytest.raises(RateLimitTimeoutError):
+        limiter.call(lambda: calls.append(1))
+    assert calls == []
+
+
+def test_file_state_is_shared_between_instances(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "bucket.json")
+    first = make_limiter(clock, rate=1, burst=2, state_file=path)
+    second = make_limiter(clock, rate=1, burst=2, state_file=path)
+
+    first.acquire()
+    first.acquire()
+    second.acquire()  # el bucket compartido ya está vacío
+
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_session_does_not_retry_429():
+    session = build_spotify_session()
+    retry = session.get_adapter('https://api.spotify.com').max_retries
+
+    assert not retry.is_retry('GET', 429, has_retry_after=True)
@@ -1,5 +1,6 @@
 import importlib
 import os
+import time
 import types
 import pytest
 
@@ -24,18 +25,25 @@ class FakeSpotify:
 
 
 class FakeCredentials:
-    def __init__(self, *args, **kwargs):
-        pass
+    def __init__(self, *args, client_id=None, **kwargs):
+        self.client_id = client_id
+
+    def _request_access_token(self):
+        return {'access_token': 'test-token', 'token_type': 'Bearer', 'expires_in': 3600}
+
+    def _add_custom_values_to_token_info(self, token_info):
+        return dict(token_info, expires_at=int(time.time()) + token_info['expires_in'])
 
 
 def test_init_raises_without_env(monkeypatch):
     # Ensure env vars are empty for this test
     monkeypatch.setenv('SPOTIFY_CLIENT_ID', '')
     monkeypatch.setenv('SPOTIFY_CLIENT_SECRET', '')
-    # Importing the module will attempt to construct the global instance and should raise
+    # Importing the module is lazy; the global instance raises on first use
     import importlib
+    mod = importlib.reload(importlib.import_module('app.services.spotify_service'))
     with pytest.raises(ValueError):
-        importlib.reload(importlib.import_module('app.services.spotify_service'))
+        mod.spotify_service.get()
 
 
 def test_init_success_with_mocked_spotify(monkeypatch):
@@ -0,0 +1,124 @@
+import threading
+import time
+
+
+def _track(tid, artist='A'):
+    return {'id': tid, 'name': tid, 'artists': [{'name': artist}], 'album': {'name': 'Alb', 'images': []}}
+
+
+class SlowSpotify:
+    """Fake spotipy client where every call takes `delay` seconds."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+
+    def search(self, q=None, type=None, limit=10, market=None):
+        self._enter()
+        if type == 'track':
+            # every query returns one unique track plus a shared duplicate
+            return {'tracks': {'items': [_track(f'track-{q}'), _track('dup')]}}
+        if type == 'playlist':
+            return {'playlists': {'items': [{'id': f'pl-{q}'}]}}
+        if type == 'artist':
+            return {'artists': {'items': [{'id': f'ar-{q}'}]}}
+        return {}
+
+    def playlist_items(self, playlist_id, limit=30, market=None):
+        self._enter()
+        return {'items': [{'track': _track(f'item-{playlist_id}')}, {'track': _track('dup')}]}
+
+    def artist_top_tracks(self, artist_id, country=None):
+        self._enter()
+        return {'tracks': [_track(f'top-{artist_id}')]}
+
+
+def test_collect_runs_strategies_concurrently_and_dedups(spotify_service_factory):
+    sp = SlowSpotify(delay=0.1)
+    svc = spotify_service_factory(sp, max_concurrency=16, cache=False)
+    descriptors = svc.EMOTION_DESCRIPTORS['HAPPY']
+
+    start = time.time()
+    candidates = svc._collect_diverse_candidates(
+        emotion='HAPPY',
+        genres=descriptors['genres'],
+        descriptors=descriptors,
+        markets=['US'],
+        target_count=10_000
+    )
+    elapsed = time.time() - start
+
+    # 24 searches + 4 playlist searches + 4 playlist item calls + 4 artist lookups (x2 calls)
+    # would take >3.6s sequentially; concurrently it is bounded by a few round-trips
+    assert elapsed < 1.5
+    assert sp.max_active > 1
+    ids = [t.id for t in candidates]
+    assert len(ids) == len(set(ids))
+    assert ids.count('dup') == 1
+    # strategy order is preserved: genre+mood tracks first, seed artists last
+    assert ids[0].startswith('track-')
+    assert ids[-1].startswith('top-')
+
+
+def test_collect_respects_concurrency_cap_and_target_count(spotify_service_factory):
+    sp = SlowSpotify(delay=0.02)
+    svc = spotify_service_factory(sp, max_concurrency=2, cache=False)
+    descriptors = svc.EMOTION_DESCRIPTORS['SAD']
+
+    candidates = svc._collect_diverse_candidates(
+        emotion='SAD',
+        genres=descriptors['genres'],
+        descriptors=descriptors,
+        markets=['US', 'GB'],
+        target_count=5
+    )
+
+    assert sp.max_active <= 2
+    # the cut-off is checked between queries, like the sequential version
+    assert 5 <= len(candidates) <= 6
+
+
+class CountingSpotify(SlowSpotify):
+    """SlowSpotify that also counts calls; every track shares the same artist."""
+
+    def __init__(self, delay=0.0):
+        super().__init__(delay)
+        self.calls = 0
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+        super()._enter()
+
+
+def test_adaptive_budget_stops_after_low_yield_wave(spotify_service_factory):
+    sp = CountingSpotify()
+    svc = spotify_service_factory(sp, max_concurrency=4, cache=False)
+    descriptors = svc.EMOTION_DESCRIPTORS['HAPPY']
+    args = dict(
+        emotion='HAPPY', genres=descriptors['genres'], descriptors=descriptors,
+        markets=['US'], target_count=10_000
+    )
+
+    svc._collect_diverse_candidates(**args)
+    full_calls = sp.calls
+
+    sp.calls = 0
+    candidates = svc._collect_diverse_candidates(limit=20, **args)
+
+    # each query yields ~1 new track: the first wave shows diminishing returns
+    assert 0 < sp.calls < full_calls / 2
+    ids = [t.id for t in candidates]
+    assert len(ids) == len(set(ids))
+    # the wave interleaves strategies instead of running only genre+mood searches
+    assert any(i.startswith('item-') for i in ids)
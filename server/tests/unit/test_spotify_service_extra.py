@@ -1,11 +1,23 @@
 import importlib
 import sys
+import time
 import types
 import pytest
 
+class FakeCredentials:
+    def __init__(self, *args, client_id=None, **kwargs):
+        self.client_id = client_id
+
+    def _request_access_token(self):
+        return {'access_token': 'test-token', 'token_type': 'Bearer', 'expires_in': 3600}
+
+    def _add_custom_values_to_token_info(self, token_info):
+        return dict(token_info, expires_at=int(time.time()) + token_info['expires_in'])
+
+
 # Helpers to inject a fake spotipy module before importing the service
 def inject_fake_spotipy(monkeypatch, spotify_cls, exceptions_cls=None):
-    fake_spotipy = types.SimpleNamespace(Spotify=spotify_cls, oauth2=types.SimpleNamespace(SpotifyClientCredentials=lambda *a, **k: None))
+    fake_spotipy = types.SimpleNamespace(Spotify=spotify_cls, oauth2=types.SimpleNamespace(SpotifyClientCredentials=FakeCredentials))
     monkeypatch.setitem(sys.modules, 'spotipy', fake_spotipy)
     monkeypatch.setitem(sys.modules, 'spotipy.oauth2', fake_spotipy.oauth2)
     if exceptions_cls is None:
@@ -58,11 +70,9 @@ class FakeSpotifyHappy:
         return {'tracks': []}
 
 
-def test_passes_filters_and_diversify_methods():
-    # Import SpotifyService directly (no spotipy needed for pure helpers)
-    mod = importlib.import_module('app.services.spotify_service')
-    SpotifyService = mod.SpotifyService
-    svc = SpotifyService.__new__(SpotifyService)
+def test_passes_filters_and_diversify_methods(spotify_service_factory):
+    # Pure helpers: no spotipy calls are made
+    svc = spotify_service_factory(None)
 
     # _passes_filters
     good = {'valence': 0.7, 'energy': 0.7, 'tempo': 100}
@@ -57,11 +57,9 @@ def test_create_playlist_description(monkeypatch):
     assert 'Música personalizada' in default or 'personalizada' in default
 
 
-def test_passes_filters_basic():
+def test_passes_filters_basic(spotify_service_factory):
     # create features and filter
-    from app.services.spotify_service import SpotifyService
-
-    svc = object.__new__(SpotifyService)
+    svc = spotify_service_factory(None)
     # Test valence min
     features = {'valence': 0.7, 'energy': 0.5, 'danceability': 0.5, 'acousticness': 0.1, 'tempo': 120}
     filters = {'min_valence': 0.6}
@@ -75,10 +73,8 @@ def test_passes_filters_basic():
     assert svc._passes_filters(features, filters) is False
 
 
-def test_process_track_and_diversify(monkeypatch):
-    mod = import_spotify_module(monkeypatch)
-    SpotifyService = mod.SpotifyService
-    svc = object.__new__(SpotifyService)
+def test_process_track_and_diversify(spotify_service_factory):
+    svc = spotify_service_factory(None)
 
     # Build tracks with varying artists and popularity
     tracks = []
@@ -110,10 +106,8 @@ def test_process_track_and_diversify(monkeypatch):
     assert proc['name'] == 'Track 0'
 
 
-def test_analyze_track_features(monkeypatch):
-    mod = import_spotify_module(monkeypatch)
-    SpotifyService = mod.SpotifyService
-    svc = object.__new__(SpotifyService)
+def test_analyze_track_features(spotify_service_factory):
+    svc = spotify_service_factory(None)
     # audio features unavailable -> default
     svc._audio_features_available = False
     res = svc._analyze_track_features(['t1', 't2'])
@@ -131,10 +125,8 @@ def test_analyze_track_features(monkeypatch):
     assert res['mode_text'] in ('Mayor (alegre)', 'Menor (triste)', 'Mixto')
 
 
-def test_filter_tracks_by_features_short_circuit(monkeypatch):
-    mod = import_spotify_module(monkeypatch)
-    SpotifyService = mod.SpotifyService
-    svc = object.__new__(SpotifyService)
+def test_filter_tracks_by_features_short_circuit(spotify_service_factory):
+    svc = spotify_service_factory(None)
     svc._audio_features_available = False
     tracks = [{'id': 'a1'}, {'id': 'a2'}]
     filtered = svc._filter_tracks_by_features(tracks, {'min_valence': 0.4})
@@ -1,6 +1,7 @@
 import importlib
 import types
 import random
+import time
 
 import pytest
 
@@ -36,13 +37,24 @@ def make_fake_spotipy(audio_features_return=None, search_return=None, playlist_i
     return FakeSpotify
 
 
+class FakeCredentials:
+    def __init__(self, *args, client_id=None, **kwargs):
+        self.client_id = client_id
+
+    def _request_access_token(self):
+        return {'access_token': 'test-token', 'token_type': 'Bearer', 'expires_in': 3600}
+
+    def _add_custom_values_to_token_info(self, token_info):
+        return dict(token_info, expires_at=int(time.time()) + token_info['expires_in'])
+
+
 def make_service(monkeypatch, fake_sp=None):
     # Ensure envs don't block
     monkeypatch.setenv('SPOTIFY_CLIENT_ID', 'id')
     monkeypatch.setenv('SPOTIFY_CLIENT_SECRET', 'secret')
 
     # Monkeypatch credentials and spotipy.Spotify used by the module
-    monkeypatch.setattr('app.services.spotify_service.SpotifyClientCredentials', lambda *a, **k: None)
+    monkeypatch.setattr('app.services.spotify_service.SpotifyClientCredentials', FakeCredentials)
     if fake_sp is None:
         fake_sp = make_fake_spotipy()
     monkeypatch.setattr('app.services.spotify_service.spotipy.Spotify', fake_sp)
@@ -0,0 +1,201 @@
+import asyncio
+import importlib
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+
+def _track(tid, artist):
+    return {'id': tid, 'name': tid, 'artists': [{'name': artist}],
+            'album': {'name': f'{artist}-album', 'images': [], 'release_date': '2015-01-01'},
+            'external_urls': {'spotify': 'u'}, 'popularity': 40}
+
+
+class FakeSpotify:
+    def __init__(self, delay=0.01):
+        self.calls = 0
+        self.delay = delay
+
+    def search(self, q=None, type=None, limit=10, market=None):
+        self.calls += 1
+        time.sleep(self.delay)  # batches arrive over time, as from the real API
+        if type == 'track':
+            return {'tracks': {'items': [_track(f'{q}-{i}', f'{q}-artist{i}') for i in range(3)]}}
+        if type == 'playlist':
+            return {'playlists': {'items': []}}
+        return {'artists': {'items': []}}
+
+
+def body(response):
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+    return asyncio.run(collect())
+
+
+def test_cold_stream_refines_then_summarizes_and_publishes_pool(spotify_service_factory):
+    svc = spotify_service_factory(FakeSpotify(delay=0), markets=['US'], max_concurrency=4, cache=False)
+    release = threading.Event()
+    original_search = svc.sp.search
+
+    def search(q=None, type=None, limit=10, market=None):
+        # the rest of the build waits until the stream has sent its first frame
+        if svc.sp.calls >= 3:
+            release.wait(2)
+        return original_search(q=q, type=type, limit=limit, market=market)
+
+    svc.sp.search = search
+    frames = []
+    for frame in svc.stream_recommendations('HAPPY', limit=5):
+        frames.append(frame)
+        release.set()
+
+    track_frames = [f for f in frames if f['event'] == 'tracks']
+    assert len(track_frames) >= 2
+    assert [f['stage'] for f in track_frames] == sorted(f['stage'] for f in track_frames)
+    assert track_frames[-1]['final'] is True
+    assert not any(f['final'] for f in track_frames[:-1])
+    assert track_frames[-1]['total'] == 5
+
+    summary = frames[-1]
+    assert summary['event'] == 'summary'
+    assert set(summary['music_params']) == {'valence', 'energy', 'tempo', 'mode'}
+    assert summary['playlist_description']
+
+    # El resultado de la recolección queda como pool para la siguiente petición
+    assert len(svc._pools) == 1
+
+
+def test_warm_stream_sends_single_tracks_frame(spotify_service_factory):
+    svc = spotify_service_factory(FakeSpotify(), markets=['US'], max_concurrency=4, cache=False)
+    list(svc.stream_recommendations('HAPPY', limit=5))
+    calls = svc.sp.calls
+
+    frames = list(svc.stream_recommendations('HAPPY', limit=5))
+
+    assert [f['event'] for f in frames] == ['tracks', 'summary']
+    assert frames[0]['final'] is True
+    assert svc.sp.calls == calls
+
+
+def test_cold_streams_and_requests_share_one_pool_build(monkeypatch, spotify_service_factory):
+    svc = spotify_service_factory(FakeSpotify(), markets=['US'], max_concurrency=4, cache=False)
+    release = threading.Event()
+    collections = []
+    original = svc._collect_diverse_candidates
+
+    def gated_collect(**kwargs):
+        collections.append(1)
+        release.wait(2)
+        return original(**kwargs)
+
+    monkeypatch.setattr(svc, '_collect_diverse_candidates', gated_collect)
+    streams, plain = [], []
+    threads = [threading.Thread(target=lambda: streams.append(list(svc.stream_recommendations('HAPPY', limit=5))))
+               for _ in range(2)]
+    threads.append(threading.Thread(target=lambda: plain.append(svc.get_recommendations('HAPPY', limit=5))))
+    for t in threads:
+        t.start()
+    deadline = time.time() + 2
+    while svc._pool_flights.stats()['shared'] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert collections == [1]
+    assert svc._pool_flights.stats() == {'in_flight': 0, 'executed': 1, 'shared': 2}
+    assert plain[0]['total'] == 5
+    for frames in streams:
+        assert frames[-2]['final'] is True and frames[-2]['total'] == 5
+        assert frames[-1]['event'] == 'summary'
+
+
+def test_stream_refines_with_the_pool_build_progress(spotify_service_factory):
+    svc = spotify_service_factory(FakeSpotify(), markets=['US'], max_concurrency=4, cache=False)
+
+    frames = [f for f in svc.stream_recommendations('SAD', limit=5) if f['event'] == 'tracks']
+
+    # progressive frames come from the shared build; the final one from the published pool
+    key = svc._pool_key('SAD', svc.EMOTION_DESCRIPTORS['SAD']['genres'], ['US'])
+    assert frames[-1]['candidates'] == len(svc._pools[key][1])
+    assert all(a['candidates'] < b['candidates'] for a, b in zip(frames[:-2], frames[1:-1]))
+    assert svc._pool_progress == {}
+
+
+def test_follower_survives_progress_removed_before_the_build_settles(spotify_service_factory):
+    from concurrent.futures import Future
+    svc = spotify_service_factory(FakeSpotify(), markets=['US'], cache=False)
+    key = ('HAPPY', (), ('US',))
+    build = Future()
+    svc._pool_progress[key] = ['t1', 't2']
+    follower = svc._follow_pool_build(key, build)
+
+    assert next(follower) == ['t1', 't2']
+
+    def finish():
+        # the collection ends (progress removed and followers woken) before the flight settles
+        with svc._pool_progress_changed:
+            svc._pool_progress.pop(key)
+            svc._pool_progress_changed.notify_all()
+        time.sleep(0.05)
+        build.set_result(['t1', 't2', 't3'])
+
+    threading.Thread(target=finish).start()
+    assert list(follower) == []
+    assert build.done()
+
+
+def test_stream_deadline_ends_with_partial_summary(monkeypatch, spotify_service_factory):
+    svc = spotify_service_factory(FakeSpotify(delay=0), markets=['US'], max_concurrency=4, cache=False)
+    release = threading.Event()
+    original_search = svc.sp.search
+
+    def search(q=None, type=None, limit=10, market=None):
+        if svc.sp.calls >= 3:
+            release.wait(2)
+        return original_search(q=q, type=type, limit=limit, market=market)
+
+    svc.sp.search = search
+    start = time.time()
+    try:
+        frames = list(svc.stream_recommendations('CALM', limit=5, deadline_ms=300))
+    finally:
+        release.set()
+
+    assert time.time() - start < 1.0
+    assert frames[-2]['final'] is True and 0 < frames[-2]['total'] <= 5
+    assert frames[-1]['event'] == 'summary' and frames[-1]['partial'] is True
+
+
+def test_controller_encodes_ndjson_and_sse(monkeypatch):
+    mod = importlib.import_module('app.controllers.music_controller')
+    frames = [{'event': 'tracks', 'tracks': []}, {'event': 'summary', 'success': True}]
+    fake = SimpleNamespace(stream_recommendations=lambda e, l: iter(frames))
+    monkeypatch.setattr('app.controllers.music_controller.spotify_service', fake)
+
+    ndjson = mod.MusicController.stream_recommendations('happy', 5, 'ndjson')
+    assert ndjson.media_type == 'application/x-ndjson'
+    lines = body(ndjson)
+    assert [json.loads(line)['event'] for line in lines] == ['tracks', 'summary']
+
+    sse = mod.MusicController.stream_recommendations('happy', 5, 'sse')
+    assert sse.media_type == 'text/event-stream'
+    chunks = body(sse)
+    assert chunks[0].startswith('event: tracks\ndata: ')
+    assert chunks[1].endswith('\n\n')
+
+
+def test_controller_emits_error_frame(monkeypatch):
+    mod = importlib.import_module('app.controllers.music_controller')
+
+    def failing(e, l):
+        yield {'event': 'tracks', 'tracks': []}
+        raise RuntimeError('spotify down')
+
+    monkeypatch.setattr('app.controllers.music_controller.spotify_service', SimpleNamespace(stream_recommendations=failing))
+
+    response = mod.MusicController.stream_recommendations('HAPPY', 5, 'ndjson')
+    events = [json.loads(line) for line in body(response)]
+    assert events[-1]['event'] == 'error'
+    assert 'spotify down' in events[-1]['error']
@@ -0,0 +1,190 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+
+from app.services.spotify_token_store import (
+    DEFAULT_TOKEN_FILE,
+    FileTokenStore,
+    MemoryTokenStore,
+    RedisTokenStore,
+    SharedTokenCache,
+    token_store_from_env,
+)
+
+
+def make_cache(store, expires_in=3600, refresh_margin=300, delay=0.0):
+    cache = SharedTokenCache(store, refresh_margin=refresh_margin)
+    fetched = []
+
+    def fetch():
+        time.sleep(delay)
+        fetched.append(1)
+        return {'access_token': f'tok-{len(fetched)}', 'expires_in': expires_in,
+                'expires_at': int(time.time()) + expires_in}
+
+    cache._fetch = fetch
+    return cache, fetched
+
+
+def test_file_store_round_trip(tmp_path):
+    path = tmp_path / 'token.json'
+    store = FileTokenStore(str(path))
+    assert store.get() is None
+
+    store.set({'access_token': 'a', 'expires_at': 1})
+    assert json.loads(path.read_text())['access_token'] == 'a'
+    # another worker (another store on the same file) sees the same token
+    assert FileTokenStore(str(path)).get()['access_token'] == 'a'
+
+
+def test_fresh_token_is_served_without_fetching(tmp_path):
+    store = FileTokenStore(str(tmp_path / 'token.json'))
+    store.set({'access_token': 'shared', 'expires_at': int(time.time()) + 3600})
+    cache, fetched = make_cache(store)
+
+    assert cache.get_cached_token()['access_token'] == 'shared'
+    assert fetched == []
+
+
+def test_missing_token_is_fetched_once_across_workers(tmp_path):
+    path = str(tmp_path / 'token.json')
+    workers = [make_cache(FileTokenStore(path), delay=0.05) for _ in range(4)]
+    tokens = []
+    threads = [threading.Thread(target=lambda c=c: tokens.append(c.get_cached_token())) for c, _ in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(len(fetched) for _, fetched in workers) == 1
+    assert {t['access_token'] for t in tokens} == {'tok-1'}
+
+
+def test_token_near_expiry_is_refreshed_in_background():
+    store = MemoryTokenStore()
+    store.set({'access_token': 'old', 'expires_at': int(time.time()) + 120})
+    cache, fetched = make_cache(store)
+
+    # still valid for spotipy: served immediately while a refresh runs
+    assert cache.get_cached_token()['access_token'] == 'old'
+    deadline = time.time() + 2
+    while not fetched and time.time() < deadline:
+        time.sleep(0.01)
+    assert store.get()['access_token'] == 'tok-1'
+
+
+def test_expired_token_is_refreshed_inline():
+    store = MemoryTokenStore()
+    store.set({'access_token': 'old', 'expires_at': int(time.time()) + 10})
+    cache, fetched = make_cache(store)
+
+    assert cache.get_cached_token()['access_token'] == 'tok-1'
+    assert cache.refreshes == 1
+
+
+def test_failed_refresh_keeps_current_token():
+    store = MemoryTokenStore()
+    store.set({'access_token': 'old', 'expires_at': int(time.time()) + 10})
+    cache = SharedTokenCache(store)
+
+    def boom():
+        raise RuntimeError('accounts down')
+
+    cache._fetch = boom
+    assert cache.refresh()['access_token'] == 'old'
+
+
+def test_unbound_cache_behaves_like_a_plain_cache():
+    cache = SharedTokenCache(MemoryTokenStore())
+    assert cache.get_cached_token() is None
+    cache.save_token_to_cache({'access_token': 'x', 'expires_at': 0})
+    assert cache.get_cached_token()['access_token'] == 'x'
+
+
+def test_bind_fetches_through_the_auth_manager():
+    class FakeAuth:
+        client_id = 'client-a'
+
+        def _request_access_token(self):
+            return {'access_token': 'fresh', 'expires_in': 3600}
+
+        def _add_custom_values_to_token_info(self, token):
+            return dict(token, expires_at=int(time.time()) + token['expires_in'])
+
+    cache = SharedTokenCache(MemoryTokenStore()).bind(FakeAuth())
+
+    assert cache.get_cached_token()['access_token'] == 'fresh'
+    assert cache.refreshes == 1
+
+
+def test_bind_warns_when_the_auth_manager_cannot_refresh(caplog):
+    import logging
+
+    with caplog.at_level(logging.WARNING, logger='spotify_token_store'):
+        cache = SharedTokenCache(MemoryTokenStore()).bind(object())
+
+    assert cache._fetch is None
+    assert '_request_access_token' in caplog.text
+
+
+def test_spotipy_credentials_provide_the_methods_bind_needs():
+    from spotipy.oauth2 import SpotifyClientCredentials
+
+    for name in SharedTokenCache.AUTH_METHODS:
+        assert callable(getattr(SpotifyClientCredentials, name, None)), name
+
+
+def test_file_store_is_private(tmp_path):
+    path = tmp_path / 'private' / 'token.json'
+    store = FileTokenStore(str(path))
+    store.set({'access_token': 'a', 'expires_at': 1})
+
+    assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_token_is_scoped_by_client_id(tmp_path):
+    class FakeAuth:
+        def __init__(self, client_id):
+            self.client_id = client_id
+
+    for store in (MemoryTokenStore(), FileTokenStore(str(tmp_path / 'token.json'))):
+        first = SharedTokenCache(store).bind(FakeAuth('client-a'))
+        second = SharedTokenCache(store).bind(FakeAuth('client-b'))
+        first.save_token_to_cache({'access_token': 'a', 'expires_at': int(time.time()) + 3600})
+
+        assert second.store.get() is None
+        second.save_token_to_cache({'access_token': 'b', 'expires_at': int(time.time()) + 3600})
+        assert first.store.get()['access_token'] == 'a'
+        assert SharedTokenCache(store, client_id='client-a').store.get()['access_token'] == 'a'
+
+
+def test_file_and_redis_names_carry_a_client_hash(tmp_path):
+    file_store = FileTokenStore(str(tmp_path / 'token.json')).for_client('client-a')
+    assert file_store.path != str(tmp_path / 'token.json')
+    assert 'client-a' not in file_store.path and file_store.path.endswith('.json')
+
+    redis_store = RedisTokenStore(client=object()).for_client('client-a')
+    assert redis_store.key.startswith('anima:spotify:app_token:')
+    assert redis_store.key != RedisTokenStore(client=object()).for_client('client-b').key
+
+
+def test_store_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv('SPOTIFY_TOKEN_STORE', 'memory')
+    assert isinstance(token_store_from_env(), MemoryTokenStore)
+
+    monkeypatch.setenv('SPOTIFY_TOKEN_STORE', 'file')
+    monkeypatch.setenv('SPOTIFY_TOKEN_FILE', str(tmp_path / 't.json'))
+    store = token_store_from_env()
+    assert isinstance(store, FileTokenStore) and store.path.endswith('t.json')
+
+    # without the redis package (or server) it falls back to the local file
+    monkeypatch.setenv('SPOTIFY_TOKEN_STORE', 'redis')
+    monkeypatch.setenv('SPOTIFY_TOKEN_REDIS_URL', 'redis://127.0.0.1:1/0')
+    assert not isinstance(token_store_from_env(), MemoryTokenStore)
+
+    # default location: a private per-user directory, not the shared temp dir
+    assert not DEFAULT_TOKEN_FILE.startswith(tempfile.gettempdir())
@@ -104,7 +104,7 @@ def test_create_playlist_success(monkeypatch):
             return FakeResp({'snapshot_id': 's1'})
         raise RuntimeError('unexpected url')
 
-    monkeypatch.setattr('requests.post', fake_post)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post)
 
     result = svc.create_playlist(user, name='X', description='desc', tracks=['1', '2'], public=False, db=db)
 
@@ -144,7 +144,7 @@ def test_create_playlist_api_error_includes_spotify_message(monkeypatch):
         e.response = resp
         raise e
 
-    monkeypatch.setattr('requests.post', fake_post_err)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post_err)
 
     with pytest.raises(HTTPException) as exc:
         svc.create_playlist(user, name='X', description='desc', tracks=['1'], public=False, db=db)
@@ -168,7 +168,7 @@ def test_add_tracks_to_playlist_batching_and_error(monkeypatch):
         # Successful add
         return types.SimpleNamespace(status_code=201, text='ok', _json={}, raise_for_status=lambda: None, json=lambda: {})
 
-    monkeypatch.setattr('requests.post', fake_post)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post)
     monkeypatch.setattr('app.services.spotify_user_service.spotify_auth_service', types.SimpleNamespace(refresh_access_token=lambda r: {'access_token': 'ok', 'expires_in': 3600}))
 
     ids = [str(i) for i in range(205)]
@@ -211,7 +211,7 @@ def test_get_user_playlists_and_check_ownership(monkeypatch):
             payload = {'owner': {'id': 'owner1'}}
             return types.SimpleNamespace(status_code=200, text='ok', _json=payload, raise_for_status=lambda: None, json=lambda: payload)
 
-    monkeypatch.setattr('requests.get', fake_get)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', fake_get)
     monkeypatch.setattr('app.services.spotify_user_service.spotify_auth_service', types.SimpleNamespace(refresh_access_token=lambda r: {'access_token': 'ok', 'expires_in': 3600}))
 
     pls = svc.get_user_playlists(user, db, limit=10)
@@ -234,7 +234,7 @@ def test_check_playlist_ownership_api_error_returns_false(monkeypatch):
     def fake_get(url, headers=None, timeout=None):
         raise requests.exceptions.RequestException('boom')
 
-    monkeypatch.setattr('requests.get', fake_get)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', fake_get)
     monkeypatch.setattr('app.services.spotify_user_service.spotify_auth_service', types.SimpleNamespace(refresh_access_token=lambda r: {'access_token': 'ok', 'expires_in': 3600}))
 
     assert svc.check_playlist_ownership(user, 'pX', db) is False
@@ -56,7 +56,7 @@ def test_get_user_spotify_profile_success_and_failure(monkeypatch):
         def json(self):
             return {'id': 'u1'}
 
-    monkeypatch.setattr('requests.get', lambda url, headers=None, timeout=None: R())
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', lambda url, headers=None, timeout=None: R())
     user = make_user()
     db = make_fake_db()
     res = svc.get_user_spotify_profile(user, db)
@@ -66,7 +66,7 @@ def test_get_user_spotify_profile_success_and_failure(monkeypatch):
     def fake_get_fail(url, headers=None, timeout=None):
         raise requests.exceptions.RequestException('fail')
 
-    monkeypatch.setattr('requests.get', fake_get_fail)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', fake_get_fail)
     with pytest.raises(Exception):
         svc.get_user_spotify_profile(user, db)
 
@@ -90,7 +90,7 @@ def test_add_tracks_to_playlist_batches(monkeypatch):
         calls.append(url)
         return FakeResp()
 
-    monkeypatch.setattr('requests.post', fake_post)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.post', fake_post)
 
     # 250 tracks -> 3 calls (100,100,50)
     track_ids = [str(i) for i in range(250)]
@@ -112,7 +112,7 @@ def test_get_user_playlists_parsing_and_error(monkeypatch):
         def json(self):
             return {'items': [{'id': 'p1', 'name': 'P1', 'description': '', 'external_urls': {'spotify': 'u'}, 'images': [], 'tracks': {'total': 3}, 'public': False, 'collaborative': False}]}
 
-    monkeypatch.setattr('requests.get', lambda url, headers=None, params=None, timeout=None: R())
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', lambda url, headers=None, params=None, timeout=None: R())
     res = svc.get_user_playlists(user, db)
     assert isinstance(res, list) and res[0]['id'] == 'p1'
 
@@ -128,7 +128,7 @@ def test_get_user_playlists_parsing_and_error(monkeypatch):
         e.response = ErrResp()
         raise e
 
-    monkeypatch.setattr('requests.get', fake_get_err)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', fake_get_err)
     with pytest.raises(Exception):
         svc.get_user_playlists(user, db)
 
@@ -146,7 +146,7 @@ def test_check_playlist_ownership_true_false_and_failure(monkeypatch):
         def json(self):
             return {'owner': {'id': 'owner1'}}
 
-    monkeypatch.setattr('requests.get', lambda url, headers=None, timeout=None: R())
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', lambda url, headers=None, timeout=None: R())
     assert svc.check_playlist_ownership(user, 'pl', db) is True
 
     class R2:
@@ -156,11 +156,11 @@ def test_check_playlist_ownership_true_false_and_failure(monkeypatch):
         def json(self):
             return {'owner': {'id': 'someone_else'}}
 
-    monkeypatch.setattr('requests.get', lambda url, headers=None, timeout=None: R2())
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', lambda url, headers=None, timeout=None: R2())
     assert svc.check_playlist_ownership(user, 'pl', db) is False
 
     def fake_get_fail(url, headers=None, timeout=None):
         raise requests.exceptions.RequestException('fail')
 
-    monkeypatch.setattr('requests.get', fake_get_fail)
+    monkeypatch.setattr('app.services.spotify_http.spotify_http.get', fake_get_fail)
     assert svc.check_playlist_ownership(user, 'pl', db) is False
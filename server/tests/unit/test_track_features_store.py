@@ -0,0 +1,100 @@
+import types
+
+from app.services.track_features_store import TrackFeaturesStore
+
+
+def feat(tid, valence=0.7, energy=0.7, tempo=120, mode=1):
+    return {'id': tid, 'valence': valence, 'energy': energy, 'tempo': tempo, 'mode': mode}
+
+
+def test_memory_tier_and_lru_eviction():
+    store = TrackFeaturesStore(max_entries=2, persist=False)
+    store.put_many([feat('a'), feat('b')])
+    assert set(store.get_many(['a'])) == {'a'}
+    store.put_many([feat('c')])
+
+    found = store.get_many(['a', 'b', 'c'])
+    assert set(found) == {'a', 'c'}
+    assert store.misses == 1
+
+
+def test_persistence_failure_falls_back_to_memory():
+    def broken_session():
+        raise RuntimeError('db down')
+
+    store = TrackFeaturesStore(session_factory=broken_session)
+    store.put_many([feat('a')])
+    assert store._db_backoff.ready() is False
+    assert store.get_many(['a', 'b']) == {'a': feat('a')}
+
+
+def test_persistence_is_retried_after_the_backoff(monkeypatch):
+    calls = []
+
+    def flaky_session():
+        calls.append(1)
+        raise RuntimeError('db down')
+
+    store = TrackFeaturesStore(session_factory=flaky_session)
+    store.get_many(['a'])
+    store.get_many(['b'])
+    assert len(calls) == 1  # en pausa: no se vuelve a intentar
+
+    store._db_backoff._until = 0.0  # vence la pausa
+    store.get_many(['c'])
+    assert len(calls) == 2
+    assert store._db_backoff._delay == 4 * store._db_backoff.initial
+
+
+def test_db_tier_is_consulted_for_memory_misses():
+    class FakeQuery:
+        def __init__(self, rows):
+            self.rows = rows
+
+        def filter(self, *a, **k):
+            return self
+
+        def all(self):
+            return self.rows
+
+    class FakeSession:
+        def query(self, model):
+            return FakeQuery([types.SimpleNamespace(track_id='x', features=feat('x'))])
+
+        def close(self):
+            pass
+
+    store = TrackFeaturesStore(session_factory=FakeSession)
+    assert store.get_many(['x']) == {'x': feat('x')}
+    # promoted to memory
+    assert len(store) == 1
+
+
+def test_filter_then_analysis_fetches_each_track_once(monkeypatch, spotify_service_factory):
+    class CountingSpotify:
+        def __init__(self):
+            self.batches = []
+
+        def audio_features(self, ids):
+            self.batches.append(list(ids))
+            return [feat(i) for i in ids]
+
+    monkeypatch.setattr('time.sleep', lambda s: None)
+    sp = CountingSpotify()
+    svc = spotify_service_factory(sp)
+    svc._audio_features_available = True
+    tracks = [{'id': f't{i}'} for i in range(250)]
+
+    filtered = svc._filter_tracks_by_features(tracks, {'min_valence': 0.5})
+    assert len(filtered) == 250
+    # only full batches of 100 (plus the remainder)
+    assert [len(b) for b in sp.batches] == [100, 100, 50]
+
+    sp.batches.clear()
+    res = svc._analyze_track_features([t['id'] for t in filtered[:20]])
+    assert sp.batches == []
+    assert res['mode_text'].startswith('Mayor')
+
+    # a second filter pass only asks for the new ids
+    svc._filter_tracks_by_features(tracks + [{'id': 'new'}], {'min_valence': 0.5})
+    assert sp.batches == [['new']]
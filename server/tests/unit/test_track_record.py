@@ -0,0 +1,70 @@
+import sys
+
+from app.services.diversification import diversify, track_meta
+from app.services.spotify_cache import SpotifyResponseCache
+from app.services.track_record import Track, ingest_tracks, track_id
+
+
+def spotify_item(tid='t1', artist='Adele', artist_id='a1'):
+    return {
+        'id': tid,
+        'name': 'Hello',
+        'artists': [{'id': artist_id, 'name': artist}, {'id': 'a2', 'name': 'Other'}],
+        'album': {
+            'id': 'al1', 'name': '25', 'release_date': '2015-11-20',
+            'images': [{'url': 'big.jpg', 'height': 640}, {'url': 'small.jpg', 'height': 64}],
+            'available_markets': ['US'] * 180,
+        },
+        'available_markets': ['US'] * 180,
+        'preview_url': 'p.mp3',
+        'external_urls': {'spotify': 'https://open.spotify.com/track/t1'},
+        'duration_ms': 295000,
+        'popularity': 80,
+    }
+
+
+def test_from_spotify_keeps_only_response_and_diversity_fields():
+    track = Track.from_spotify(spotify_item())
+
+    assert track.to_response() == {
+        'id': 't1',
+        'name': 'Hello',
+        'artists': ['Adele', 'Other'],
+        'album': '25',
+        'album_image': 'big.jpg',
+        'preview_url': 'p.mp3',
+        'external_url': 'https://open.spotify.com/track/t1',
+        'duration_ms': 295000,
+        'popularity': 80,
+    }
+    assert (track.artist_id, track.album_id, track.year) == ('a1', 'al1', 2015)
+    assert not hasattr(track, '__dict__')
+
+
+def test_ingest_drops_invalid_items_and_is_smaller():
+    items = [spotify_item(), None, {'name': 'no id'}]
+    tracks = ingest_tracks(items)
+
+    assert [track_id(t) for t in tracks] == ['t1']
+    assert sys.getsizeof(tracks[0]) < sys.getsizeof(str(items[0]))
+
+
+def test_diversify_treats_tracks_like_dicts():
+    items = [spotify_item(f't{i}', artist=f'artist{i % 3}', artist_id=f'a{i % 3}') for i in range(12)]
+    tracks = ingest_tracks(items)
+
+    assert track_meta(0, tracks[0])[1:] == track_meta(0, items[0])[1:]
+    selected = diversify(tracks, 6)
+    assert len(selected) == 6
+    assert all(isinstance(t, Track) for t in selected)
+
+
+def test_tracks_survive_sqlite_cache_roundtrip(tmp_path):
+    db_path = str(tmp_path / 'cache.sqlite3')
+    tracks = ingest_tracks([spotify_item('t1'), spotify_item('t2')])
+    SpotifyResponseCache(db_path=db_path).set('search_tracks', 'q', 'US', 50, tracks)
+
+    restored = SpotifyResponseCache(db_path=db_path).get('search_tracks', 'q', 'US', 50)
+
+    assert restored == tracks
+    assert all(isinstance(t, Track) for t in restored)
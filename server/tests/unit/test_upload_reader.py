@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.services.upload_reader import UploadRejectedError, UploadTooLargeError, read_upload
+
+
+class ChunkedUpload:
+    def __init__(self, data: bytes, size=None):
+        self._data = data
+        self._pos = 0
+        self.size = size
+        self.reads = 0
+
+    async def read(self, size=-1):
+        self.reads += 1
+        end = len(self._data) if size < 0 else self._pos + size
+        chunk, self._pos = self._data[self._pos:end], min(end, len(self._data))
+        return chunk
+
+
+def test_reads_whole_upload_into_a_single_buffer():
+    data = bytes(range(256)) * 1000
+    upload = ChunkedUpload(data)
+
+    buffer = asyncio.run(read_upload(upload, max_bytes=len(data), chunk_size=4096))
+
+    assert isinstance(buffer, bytearray)
+    assert buffer == data
+    assert upload.reads == len(data) // 4096 + 2  # el último read devuelve b''
+
+
+def test_declared_size_over_limit_is_rejected_without_reading():
+    upload = ChunkedUpload(b'x' * 10, size=10 * 1024 * 1024)
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(read_upload(upload, max_bytes=1024))
+
+    assert upload.reads == 0
+
+
+def test_stops_reading_once_limit_is_exceeded():
+    upload = ChunkedUpload(b'x' * 1_000_000)
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(read_upload(upload, max_bytes=10_000, chunk_size=4096))
+
+    assert upload.reads == 3
+
+
+def test_head_check_rejects_after_first_chunk():
+    upload = ChunkedUpload(b'junk' * 100_000)
+
+    with pytest.raises(UploadRejectedError) as exc:
+        asyncio.run(read_upload(upload, max_bytes=10 ** 7, check_head=lambda head: None if head.startswith(b'\xff\xd8') else 'formato'))
+
+    assert str(exc.value) == 'formato'
+    assert upload.reads == 1